@@ -0,0 +1,213 @@
+import numpy as np
+
+from django.db.models.functions import Extract, TruncDate
+
+from .models import Exercise, Training, MovementSettings, MovementSettingsPerMovementsPerExercise
+
+METRICS = ('volume', 'tonnage', 'distance', 'calories')
+
+# 1970-01-01 is a thursday, shifting by 3 days makes the weeks start on monday
+WEEK_OFFSET = 3
+
+class TrainingAnalytics:
+    """
+    This class computes the training load of a user with NumPy arrays.
+    For each done training, the exercise's movements settings give one round of:
+        -> volume: the repetitions
+        -> tonnage: the repetitions x (weight + weighted vest)
+        -> distance and calories
+    multiplied by the number of rounds (the performance if it is a number of rounds,
+    the goal of the exercise if it is a number of rounds, 1 otherwise).
+    The sessions are then aggregated per week with the acute:chronic workload ratio
+    (load of the week / mean load of the last 4 weeks) and the monotony
+    (mean daily load of the week / standard deviation of the daily load).
+    """
+
+    def __init__(self, user, metric='volume'):
+        self.user = user
+        self.metric = metric
+
+    def load_sessions(self):
+        """
+        Pull the done trainings of the user with one query
+        """
+        rows = list(Training.objects.filter(founder=self.user, done=True)
+                    .annotate(day=TruncDate('date'))
+                    .order_by('date')
+                    .values_list('id', 'day', 'exercise_id', 'performance_type', 'performance_value',
+                                 'exercise__goal_type', 'exercise__goal_value'))
+        if not rows:
+            return None
+        ids, days, exercises, performance_types, performance_values, goal_types, goal_values = zip(*rows)
+        return {
+            'id': np.array(ids, dtype=np.int64),
+            'day': np.array(days, dtype='datetime64[D]').astype(np.int64),
+            'exercise': np.array(exercises, dtype=np.int64),
+            'performance_is_round': np.array(performance_types) == Training.ROUND,
+            'performance_value': np.array(performance_values, dtype=np.float64),
+            'goal_is_round': np.array(goal_types) == Exercise.ROUND,
+            'goal_value': np.array(goal_values, dtype=np.float64),
+        }
+
+    def load_exercises(self, exercise_ids):
+        """
+        Compute one round of each exercise from its movements settings
+        Return the sorted exercise ids and a dict of arrays aligned on them
+        """
+        exercises = np.unique(exercise_ids)
+        rows = list(MovementSettingsPerMovementsPerExercise.objects
+                    .filter(exercise_movement__exercise__in=exercises.tolist())
+                    .values_list('exercise_movement__exercise_id', 'exercise_movement_id',
+                                 'setting__name', 'setting_value'))
+        totals = {metric: np.zeros(len(exercises)) for metric in METRICS}
+        if not rows:
+            return exercises, totals
+
+        exercise_of_row, movement_of_row, names, values = zip(*rows)
+        names = np.array(names)
+        values = np.array(values, dtype=np.float64)
+        movements, movement_index = np.unique(np.array(movement_of_row, dtype=np.int64), return_inverse=True)
+        movement_exercise = np.zeros(len(movements), dtype=np.int64)
+        movement_exercise[movement_index] = np.searchsorted(exercises, np.array(exercise_of_row, dtype=np.int64))
+
+        def per_movement(setting):
+            return np.bincount(movement_index, weights=np.where(names == setting, values, 0), minlength=len(movements))
+
+        repetitions = per_movement(MovementSettings.REPETITIONS)
+        load = per_movement(MovementSettings.WEIGHT) + per_movement(MovementSettings.LEST)
+        per_movement_metrics = {
+            'volume': repetitions,
+            'tonnage': repetitions * load,
+            'distance': per_movement(MovementSettings.DISTANCE),
+            'calories': per_movement(MovementSettings.CALORIES),
+        }
+        for metric, movement_values in per_movement_metrics.items():
+            totals[metric] = np.bincount(movement_exercise, weights=movement_values, minlength=len(exercises))
+        return exercises, totals
+
+    def compute(self):
+        sessions = self.load_sessions()
+        if sessions is None:
+            return {'sessions': {key: [] for key in ('id', 'date') + METRICS},
+                    'weeks': {key: [] for key in ('week', 'sessions') + METRICS + ('acwr', 'monotony')}}
+
+        exercises, totals = self.load_exercises(sessions['exercise'])
+        exercise_index = np.searchsorted(exercises, sessions['exercise'])
+        rounds = np.where(sessions['performance_is_round'] & ~np.isnan(sessions['performance_value']),
+                          sessions['performance_value'],
+                          np.where(sessions['goal_is_round'] & ~np.isnan(sessions['goal_value']),
+                                   sessions['goal_value'],
+                                   1))
+        session_metrics = {metric: totals[metric][exercise_index] * rounds for metric in METRICS}
+
+        # Daily and weekly aggregations on the whole period, the empty days count as rest
+        days = sessions['day']
+        first_week = (days[0] + WEEK_OFFSET) // 7
+        day_index = days - (first_week * 7 - WEEK_OFFSET)
+        week_index = day_index // 7
+        weeks_count = week_index[-1] + 1
+        weeks = {metric: np.bincount(week_index, weights=session_metrics[metric], minlength=weeks_count)
+                 for metric in METRICS}
+        weeks['sessions'] = np.bincount(week_index, minlength=weeks_count)
+
+        daily = np.bincount(day_index, weights=session_metrics[self.metric], minlength=weeks_count * 7)
+        daily = daily.reshape(weeks_count, 7)
+        weekly_load = daily.sum(axis=1)
+        cumulative = np.concatenate(([0], np.cumsum(weekly_load)))
+        last_weeks = np.minimum(np.arange(1, weeks_count + 1), 4)
+        chronic = (cumulative[1:] - cumulative[np.arange(weeks_count) + 1 - last_weeks]) / last_weeks
+        standard_deviation = daily.std(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            acwr = np.where(chronic > 0, weekly_load / chronic, np.nan)
+            monotony = np.where(standard_deviation > 0, daily.mean(axis=1) / standard_deviation, np.nan)
+
+        week_starts = (np.arange(weeks_count) + first_week) * 7 - WEEK_OFFSET
+        return {
+            'sessions': dict({
+                'id': sessions['id'].tolist(),
+                'date': days.astype('datetime64[D]').astype(str).tolist(),
+            }, **{metric: session_metrics[metric].tolist() for metric in METRICS}),
+            'weeks': dict({
+                'week': week_starts.astype('datetime64[D]').astype(str).tolist(),
+                'sessions': weeks['sessions'].tolist(),
+                'acwr': self.to_list(acwr),
+                'monotony': self.to_list(monotony),
+            }, **{metric: weeks[metric].tolist() for metric in METRICS}),
+        }
+
+    @staticmethod
+    def to_list(array):
+        """
+        Convert the undefined values (nan) to None so they can be rendered in JSON
+        """
+        return [None if np.isnan(value) else round(value, 3) for value in array.tolist()]
+
+
+def downsample_lttb(x, y, threshold):
+    """
+    Return the indexes of the points kept by the Largest-Triangle-Three-Buckets algorithm.
+    The first and last points are kept, the others are split in threshold - 2 buckets
+    and each bucket keeps the point making the largest triangle with the point kept
+    in the previous bucket and the mean of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    threshold = max(threshold, 3)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    widths = np.diff(edges)
+    means_x = np.add.reduceat(x[:n - 1], edges[:-1]) / widths
+    means_y = np.add.reduceat(y[:n - 1], edges[:-1]) / widths
+    # The last bucket is followed by the last point
+    next_x = np.append(means_x[1:], x[n - 1])
+    next_y = np.append(means_y[1:], y[n - 1])
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        areas = np.abs((x[a] - next_x[i]) * (y[start:end] - y[a])
+                       - (x[a] - x[start:end]) * (next_y[i] - y[a]))
+        a = start + int(np.argmax(areas))
+        kept[i + 1] = a
+    return kept
+
+class PerformanceProgression:
+    """
+    This class returns the (date, performance value) series of a user on one exercise,
+    downsampled to a number of points. The rows are read with a server-side cursor
+    straight into NumPy arrays.
+    """
+
+    CHUNK_SIZE = 2000
+
+    def __init__(self, user, exercise, performance_type):
+        self.user = user
+        self.exercise = exercise
+        self.performance_type = performance_type
+
+    def load(self):
+        rows = (Training.objects.filter(founder=self.user,
+                                        exercise=self.exercise,
+                                        performance_type=self.performance_type,
+                                        done=True,
+                                        performance_value__isnull=False)
+                .annotate(epoch=Extract('date', 'epoch'))
+                .order_by('date')
+                .values_list('epoch', 'performance_value'))
+        series = np.fromiter(rows.iterator(chunk_size=self.CHUNK_SIZE), dtype=[('x', 'f8'), ('y', 'f8')])
+        return series['x'], series['y']
+
+    def compute(self, points):
+        x, y = self.load()
+        kept = downsample_lttb(x, y, points)
+        dates = (x[kept] * 1e6).astype('datetime64[us]').astype('datetime64[s]')
+        return {
+            'exercise': self.exercise.pk,
+            'performance_type': self.performance_type,
+            'count': len(x),
+            'date': np.datetime_as_string(dates, timezone='UTC').tolist(),
+            'performance_value': y[kept].astype(np.int64).tolist(),
+        }
@@ -0,0 +1,103 @@
+import io
+import json
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from rest_framework import exceptions
+
+VIEWS_MODULE = __package__ + '.views'
+# Names of the routes of the API which cannot be called from a batch: a batch
+# in a batch, and the streamed responses which a batch would read in memory
+EXCLUDED_ROUTES = ('batch', 'trainings_export')
+
+class Batch:
+    """
+    This class runs a list of sub-requests (method, path, body, headers) in the
+    process, without going through the network, the middlewares and the
+    authentication again: the views get the user of the batch request.
+    The paths are relative to the API root (exercises/1/) and only reach its routes,
+    except the ones which stream their response.
+    With atomic, the sub-requests run in one transaction which is rolled back,
+    and the next ones skipped, as soon as one of them fails.
+    """
+
+    def __init__(self, request, root, sub_requests, atomic=False):
+        self.request = request
+        self.root = root
+        self.sub_requests = sub_requests
+        self.atomic = atomic
+
+    def resolve(self, path):
+        """
+        Return the path from the server root, the query string and the route of a sub-request path
+        """
+        path, _, query_string = path.partition('?')
+        path = path.lstrip('/')
+        if path.startswith(self.root.lstrip('/')):
+            path = path[len(self.root.lstrip('/')):]
+        path = self.root + path
+        try:
+            match = resolve(path)
+        except Resolver404:
+            match = None
+        if match is None or match.func.__module__ != VIEWS_MODULE or match.url_name in EXCLUDED_ROUTES:
+            raise exceptions.ValidationError({'path': '"{}" is not a route of the API.'.format(path)})
+        return path, query_string, match
+
+    def build_request(self, method, path, query_string, body=None, headers=None):
+        """
+        Return a Django request for a sub-request, authenticated as the batch request
+        """
+        content = b'' if body is None else json.dumps(body, cls=DjangoJSONEncoder).encode()
+        environ = {key: value for key, value in self.request.META.items()
+                   if not key.startswith('HTTP_') or key in ('HTTP_HOST', 'HTTP_COOKIE')}
+        environ.update({
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query_string,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(content)),
+            'HTTP_ACCEPT': 'application/json',
+            'wsgi.input': io.BytesIO(content),
+        })
+        for name, value in (headers or {}).items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+        sub_request = WSGIRequest(environ)
+        sub_request.user = self.request.user
+        sub_request._force_auth_user = self.request.user
+        sub_request._force_auth_token = self.request.auth
+        return sub_request
+
+    def dispatch(self, sub_request):
+        path, query_string, match = self.resolve(sub_request['path'])
+        django_request = self.build_request(sub_request['method'], path, query_string,
+                                            sub_request.get('body'), sub_request.get('headers'))
+        response = match.func(django_request, *match.args, **match.kwargs)
+        if response.streaming:
+            response.close()
+            raise exceptions.ValidationError({'path': '"{}" streams its response, it cannot be called '
+                                                      'from a batch.'.format(path)})
+        body = response.data if hasattr(response, 'data') else response.content.decode(response.charset)
+        return {'status': response.status_code, 'headers': dict(response.items()), 'body': body}
+
+    def run(self):
+        """
+        Return the responses of the sub-requests and if all of them succeeded
+        """
+        # All the paths are checked before running anything
+        for sub_request in self.sub_requests:
+            self.resolve(sub_request['path'])
+        if not self.atomic:
+            responses = [self.dispatch(sub_request) for sub_request in self.sub_requests]
+            return responses, all(response['status'] < 400 for response in responses)
+
+        responses = []
+        with transaction.atomic():
+            for sub_request in self.sub_requests:
+                responses.append(self.dispatch(sub_request))
+                if responses[-1]['status'] >= 400:
+                    transaction.set_rollback(True)
+                    return responses, False
+        return responses, True
@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.db.models import Q
+
+from .models import Equipment, Movement, MovementSettings, Exercise, Training
+from .serializers import EquipmentSerializer, MovementSerializer, MovementSettingsSerializer, ExerciseSerializer, TrainingSerializer
+
+CATALOG_CACHE_KEY = 'bootstrap:catalog'
+# The catalog is dropped from the cache of the writing process once its write is
+# committed, each process has its own cache so the timeout bounds how long another
+# one serves an old catalog
+CATALOG_TIMEOUT = 60
+
+def in_thread(function):
+    """
+    Wrap a part run in a worker thread so that it closes the connection it has opened
+    """
+    def run():
+        try:
+            return function()
+        finally:
+            connections.close_all()
+    return run
+
+def load_catalog():
+    return {
+        'equipments': EquipmentSerializer(Equipment.objects.order_by('id'), many=True).data,
+        'movements': MovementSerializer(Movement.objects.prefetch_related('settings').order_by('id'), many=True).data,
+        'movement_settings': MovementSettingsSerializer(MovementSettings.objects.order_by('id'), many=True).data,
+    }
+
+def get_catalog():
+    """
+    Return the equipments, movements and movement settings, from the cache if possible
+    """
+    catalog = cache.get(CATALOG_CACHE_KEY)
+    if catalog is None:
+        catalog = load_catalog()
+        cache.set(CATALOG_CACHE_KEY, catalog, CATALOG_TIMEOUT)
+    return catalog
+
+def invalidate_catalog():
+    """
+    Drop the cached catalog once the transaction of the write is committed, so that
+    a read in between does not cache the catalog again without the write
+    """
+    transaction.on_commit(lambda: cache.delete(CATALOG_CACHE_KEY))
+
+class Bootstrap:
+    """
+    This class returns everything the app needs when it starts:
+        -> the catalog: equipments, movements and movement settings (cached)
+        -> the exercises the user can see, with their movements
+        -> the last trainings of the user
+    The parts are queried concurrently: the request thread queries the exercises on
+    its connection while the trainings, and the catalog when it is not cached, are
+    queried by at most two workers of the request, each on its own connection. The
+    workers belong to the request, so a bootstrap never waits for the parts of another one.
+    Inside a transaction the other connections would not see its writes, so the
+    parts are then queried one after the other on the connection of the request.
+    """
+
+    def __init__(self, request, trainings_count):
+        self.request = request
+        self.trainings_count = trainings_count
+
+    def exercises(self):
+        user = self.request.user
+        exercises = Exercise.objects.all() if user.is_staff else Exercise.objects.filter(Q(is_default=True) | Q(founder=user))
+        exercises = ExerciseSerializer.setup_queryset(exercises.order_by('id'), self.request)
+        return ExerciseSerializer(exercises, many=True, context={'request': self.request}).data
+
+    def trainings(self):
+        trainings = Training.objects.filter(founder=self.request.user).order_by('-date', '-id')
+        trainings = TrainingSerializer.setup_queryset(trainings, self.request)[:self.trainings_count]
+        return TrainingSerializer(trainings, many=True, context={'request': self.request}).data
+
+    def compute(self):
+        if connection.in_atomic_block:
+            return {'catalog': get_catalog(), 'exercises': self.exercises(), 'trainings': self.trainings()}
+        catalog = cache.get(CATALOG_CACHE_KEY)
+        parts = {'trainings': self.trainings}
+        if catalog is None:
+            parts['catalog'] = get_catalog
+        with ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix='bootstrap') as executor:
+            futures = {name: executor.submit(in_thread(part)) for name, part in parts.items()}
+            result = {'catalog': catalog, 'exercises': self.exercises()}
+            result.update((name, future.result()) for name, future in futures.items())
+        return result
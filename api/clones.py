@@ -0,0 +1,71 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Exercise
+from .similarity import similarities
+
+CLONE_EXERCISE_SQL = """
+    INSERT INTO api_exercise (name, description, exercise_type, goal_type, goal_value,
+                              founder_id, is_default, updated_at, required_equipment,
+                              estimated_duration, total_repetitions, total_distance, total_load,
+                              training_count, done_count, version)
+    SELECT %(name)s, description, exercise_type, goal_type, goal_value,
+           %(founder)s, FALSE, %(now)s, required_equipment,
+           estimated_duration, total_repetitions, total_distance, total_load, 0, 0, 1
+    FROM api_exercise
+    WHERE id = %(source)s
+    RETURNING id
+"""
+
+# The ids of the copied movements are drawn from their sequence before the insert,
+# so each setting is mapped to the copy of its own movement
+CLONE_MOVEMENTS_SQL = """
+    WITH source AS (
+        SELECT id, nextval(pg_get_serial_sequence('api_movementsperexercise', 'id')) AS clone_id,
+               movement_id, movement_number
+        FROM api_movementsperexercise
+        WHERE exercise_id = %(source)s
+    ), movements AS (
+        INSERT INTO api_movementsperexercise (id, exercise_id, movement_id, movement_number, updated_at)
+        SELECT clone_id, %(clone)s, movement_id, movement_number, %(now)s
+        FROM source
+    )
+    INSERT INTO api_movementsettingspermovementsperexercise (exercise_movement_id, setting_id, setting_value, updated_at)
+    SELECT source.clone_id, setting.setting_id, setting.setting_value, %(now)s
+    FROM api_movementsettingspermovementsperexercise setting
+    INNER JOIN source ON source.id = setting.exercise_movement_id
+    ORDER BY setting.id
+"""
+
+def clone_name(name, founder):
+    """
+    Return the name, or the first "name (n)" which is not already the name
+    of an exercise of the founder, the name being cut to keep the number
+    """
+    max_length = Exercise._meta.get_field('name').max_length
+    names = set(Exercise.objects.filter(founder=founder, name__startswith=name[:max_length // 2])
+                .values_list('name', flat=True))
+    candidate, number = name, 2
+    while candidate in names:
+        suffix = ' ({})'.format(number)
+        candidate = name[:max_length - len(suffix)] + suffix
+        number += 1
+    return candidate
+
+@transaction.atomic
+def clone_exercise(exercise, founder, name=None):
+    """
+    Copy an exercise with its movements and their settings for a user, with
+    one statement for the exercise and one for its movements and settings.
+    Without name, the copy takes the name of the exercise, numbered if the user
+    already has an exercise with this name. Return the id of the copy.
+    """
+    params = {'source': exercise.pk, 'founder': founder.pk, 'now': timezone.now(),
+              'name': name if name is not None else clone_name(exercise.name, founder)}
+    with connection.cursor() as cursor:
+        cursor.execute(CLONE_EXERCISE_SQL, params)
+        params['clone'] = cursor.fetchone()[0]
+        cursor.execute(CLONE_MOVEMENTS_SQL, params)
+    # The statements do not send the signals
+    similarities.invalidate(params['clone'])
+    return params['clone']
@@ -0,0 +1,156 @@
+from django.db import connection, transaction
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Greatest
+
+from .models import Training, UserStats
+
+COUNTER_FIELDS = ('training_count', 'done_count', 'last_trained_at')
+
+# The counters never go below zero, even if they had drifted before a removal.
+# The last date cannot be decremented, it is read again among the done trainings left.
+APPLY_EXERCISES_SQL = """
+    UPDATE api_exercise exercise
+    SET training_count = GREATEST(exercise.training_count + %(sign)s * counts.trainings, 0),
+        done_count = GREATEST(exercise.done_count + %(sign)s * counts.done, 0),
+        last_trained_at = CASE
+            WHEN counts.done = 0 THEN exercise.last_trained_at
+            WHEN %(sign)s > 0 THEN GREATEST(exercise.last_trained_at, counts.last_done)
+            ELSE (SELECT MAX(training.date) FROM api_training training
+                  WHERE training.exercise_id = exercise.id AND training.done)
+        END
+    FROM unnest(%(exercise_ids)s::integer[], %(trainings)s::integer[], %(done)s::integer[],
+                %(last_done)s::timestamptz[]) AS counts (exercise_id, trainings, done, last_done)
+    WHERE exercise.id = counts.exercise_id
+"""
+
+# A removal never inserts, the stats may have been deleted with their user
+ADD_USER_SQL = """
+    INSERT INTO api_userstats (user_id, training_count, done_count, last_trained_at)
+    VALUES (%(founder)s, %(trainings)s, %(done)s, %(last_done)s)
+    ON CONFLICT (user_id)
+    DO UPDATE SET training_count = api_userstats.training_count + EXCLUDED.training_count,
+                  done_count = api_userstats.done_count + EXCLUDED.done_count,
+                  last_trained_at = GREATEST(api_userstats.last_trained_at, EXCLUDED.last_trained_at)
+"""
+
+# The counters which are already right are not written, so the row counts are the repairs
+REBUILD_EXERCISES_SQL = """
+    UPDATE api_exercise exercise
+    SET training_count = counters.training_count,
+        done_count = counters.done_count,
+        last_trained_at = counters.last_trained_at
+    FROM (
+        SELECT exercise.id, COUNT(training.id) AS training_count,
+               COUNT(training.id) FILTER (WHERE training.done) AS done_count,
+               MAX(training.date) FILTER (WHERE training.done) AS last_trained_at
+        FROM api_exercise exercise
+        LEFT JOIN api_training training ON training.exercise_id = exercise.id
+        WHERE {exercise_filter}
+        GROUP BY exercise.id
+    ) counters
+    WHERE counters.id = exercise.id
+      AND (exercise.training_count, exercise.done_count, exercise.last_trained_at)
+          IS DISTINCT FROM (counters.training_count, counters.done_count, counters.last_trained_at)
+"""
+
+# The users without training nor stats do not get a row
+REBUILD_USERS_SQL = """
+    INSERT INTO api_userstats (user_id, training_count, done_count, last_trained_at)
+    SELECT founder.id, COUNT(training.id),
+           COUNT(training.id) FILTER (WHERE training.done),
+           MAX(training.date) FILTER (WHERE training.done)
+    FROM auth_user founder
+    LEFT JOIN api_training training ON training.founder_id = founder.id
+    WHERE {founder_filter}
+    GROUP BY founder.id
+    HAVING COUNT(training.id) > 0 OR EXISTS (SELECT 1 FROM api_userstats WHERE user_id = founder.id)
+    ON CONFLICT (user_id)
+    DO UPDATE SET training_count = EXCLUDED.training_count,
+                  done_count = EXCLUDED.done_count,
+                  last_trained_at = EXCLUDED.last_trained_at
+    WHERE (api_userstats.training_count, api_userstats.done_count, api_userstats.last_trained_at)
+          IS DISTINCT FROM (EXCLUDED.training_count, EXCLUDED.done_count, EXCLUDED.last_trained_at)
+"""
+
+def apply_trainings(founder_id, counts, sign):
+    """
+    Add (sign=1) or remove (sign=-1) trainings of a user in the counters of the user and
+    of the exercises, from their numbers by exercise:
+    {exercise_id: (trainings, done trainings, date of the last done one)}
+    """
+    if not counts:
+        return
+    exercise_ids = list(counts)
+    trainings, done, last_done = (list(column) for column in zip(*(counts[pk] for pk in exercise_ids)))
+    with connection.cursor() as cursor:
+        cursor.execute(APPLY_EXERCISES_SQL, {'sign': sign, 'exercise_ids': exercise_ids, 'trainings': trainings,
+                                             'done': done, 'last_done': last_done})
+        if sign > 0:
+            last_done = max((date for date in last_done if date is not None), default=None)
+            cursor.execute(ADD_USER_SQL, {'founder': founder_id, 'trainings': sum(trainings),
+                                          'done': sum(done), 'last_done': last_done})
+            return
+    changes = {'training_count': Greatest(F('training_count') - sum(trainings), 0),
+               'done_count': Greatest(F('done_count') - sum(done), 0)}
+    if sum(done):
+        last = Training.objects.filter(founder=OuterRef('user'), done=True).order_by().values('founder')
+        changes['last_trained_at'] = Subquery(last.annotate(last=Max('date')).values('last'))
+    UserStats.objects.filter(user=founder_id).update(**changes)
+
+def apply_training(values, sign):
+    """
+    Add (sign=1) or remove (sign=-1) a training in the counters of its exercise and founder
+    """
+    done = 1 if values['done'] else 0
+    apply_trainings(values['founder_id'], {values['exercise_id']: (1, done, values['date'] if done else None)}, sign)
+
+def add_to_counters(training, values):
+    """
+    Count a new training, the counters are rebuilt when its values are unknown
+    """
+    if values is None:
+        rebuild_counters(exercise_ids=[training.exercise_id], founder_ids=[training.founder_id])
+        return
+    apply_training(values, 1)
+
+def update_counters(training, previous, current):
+    """
+    Move a training from its previous values to its current ones in the counters,
+    they are rebuilt when one of them is unknown
+    """
+    if previous is None or current is None:
+        rebuild_counters(exercise_ids=[training.exercise_id], founder_ids=[training.founder_id])
+        return
+    if previous == current:
+        return
+    apply_training(previous, -1)
+    apply_training(current, 1)
+
+def remove_from_counters(training, values):
+    """
+    Uncount a deleted training, the counters are rebuilt when its values are unknown
+    """
+    if values is None:
+        rebuild_counters(exercise_ids=[training.exercise_id], founder_ids=[training.founder_id])
+        return
+    apply_training(values, -1)
+
+@transaction.atomic
+def rebuild_counters(exercise_ids=None, founder_ids=None):
+    """
+    Recompute the counters of some exercises and users (all by default) from the trainings
+    with one statement each, return the number of exercises and users repaired
+    """
+    exercise_filter, founder_filter, params = "TRUE", "TRUE", {}
+    if exercise_ids is not None:
+        exercise_filter = "exercise.id = ANY(%(exercise_ids)s)"
+        params['exercise_ids'] = list(exercise_ids)
+    if founder_ids is not None:
+        founder_filter = "founder.id = ANY(%(founder_ids)s)"
+        params['founder_ids'] = list(founder_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD_EXERCISES_SQL.format(exercise_filter=exercise_filter), params)
+        exercises = cursor.rowcount
+        cursor.execute(REBUILD_USERS_SQL.format(founder_filter=founder_filter), params)
+        users = cursor.rowcount
+    return exercises, users
@@ -0,0 +1,77 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import TrainingRollup, Tombstone
+from .leaderboards import refresh_best
+from .counters import apply_trainings
+
+# The tombstones are written and the rollups of the periods of the deleted done
+# trainings are decremented by the same statement, the deleted trainings are
+# returned grouped by what has to be refreshed
+DELETE_SQL = """
+    WITH deleted AS (
+        DELETE FROM api_training
+        WHERE founder_id = %(founder)s {training_filter}
+        RETURNING id, exercise_id, performance_type, done, date, performance_value
+    ), tombstones AS (
+        INSERT INTO api_tombstone (object_type, object_id, owner_id, is_default, deleted_at)
+        SELECT %(object_type)s, id, %(founder)s, FALSE, %(now)s FROM deleted
+    ), rollups AS (
+        UPDATE api_trainingrollup rollup
+        SET done_count = rollup.done_count - removed.done_count,
+            performance_sum = rollup.performance_sum - removed.performance_sum
+        FROM (
+            SELECT periods.period, date_trunc(periods.period, deleted.date AT TIME ZONE %(time_zone)s)::date AS period_start,
+                   exercise.exercise_type, COUNT(*) AS done_count,
+                   COALESCE(SUM(deleted.performance_value), 0) AS performance_sum
+            FROM deleted
+            INNER JOIN api_exercise exercise ON exercise.id = deleted.exercise_id
+            CROSS JOIN unnest(%(periods)s::varchar[]) AS periods (period)
+            WHERE deleted.done
+            GROUP BY 1, 2, 3
+        ) removed
+        WHERE rollup.founder_id = %(founder)s AND rollup.period = removed.period
+          AND rollup.period_start = removed.period_start AND rollup.exercise_type = removed.exercise_type
+    )
+    SELECT exercise_id, performance_type, done, COUNT(*) FROM deleted GROUP BY 1, 2, 3
+"""
+
+@transaction.atomic
+def delete_trainings(founder, ids=None, start=None, end=None):
+    """
+    Delete the trainings of a user among some ids and/or between two dates (included)
+    with one statement, without the signals of the deletions: the tombstones and the
+    rollups are written by this statement, the counters are decremented from the deleted
+    numbers by exercise and the bests of the user are recomputed on the leaderboards of
+    the deleted done trainings. The percentile sketches forget them when they are rebuilt. Return how many trainings were deleted.
+    """
+    training_filter = ""
+    params = {'founder': founder.pk, 'object_type': Tombstone.TRAINING, 'now': timezone.now(),
+              'time_zone': settings.TIME_ZONE, 'periods': [period for period, _ in TrainingRollup.PERIOD]}
+    if ids is not None:
+        training_filter += " AND id = ANY(%(ids)s)"
+        params['ids'] = list(ids)
+    if start is not None:
+        training_filter += " AND date >= %(start)s"
+        params['start'] = timezone.make_aware(datetime.combine(start, time.min))
+    if end is not None:
+        training_filter += " AND date < %(end)s"
+        params['end'] = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    with connection.cursor() as cursor:
+        cursor.execute(DELETE_SQL.format(training_filter=training_filter), params)
+        deleted = cursor.fetchall()
+    if not deleted:
+        return 0
+
+    counts = {}
+    for exercise_id, _, done, count in deleted:
+        trainings, done_trainings, _ = counts.get(exercise_id, (0, 0, None))
+        counts[exercise_id] = (trainings + count, done_trainings + (count if done else 0), None)
+    apply_trainings(founder.pk, counts, -1)
+    ranked = {(exercise_id, performance_type) for exercise_id, performance_type, done, _ in deleted if done}
+    for exercise_id, performance_type in ranked:
+        refresh_best(exercise_id, performance_type, founder.pk)
+    return sum(count for _, _, _, count in deleted)
@@ -0,0 +1,74 @@
+import csv
+import json
+
+from rest_framework import serializers
+
+from .models import Exercise
+from .renderers import Echo
+
+class TrainingExport:
+    """
+    This class streams trainings as CSV or newline-delimited JSON lines.
+    The rows are read with a server-side cursor and the exercise name and type
+    come from a join, so the memory used does not depend on the number of trainings.
+    """
+
+    FIELDS = ('id', 'date', 'performance_type', 'performance_value', 'done',
+              'exercise_id', 'exercise_name', 'exercise_type')
+    COLUMNS = ('id', 'date', 'performance_type', 'performance_value', 'done',
+               'exercise_id', 'exercise__name', 'exercise__exercise_type')
+    CHUNK_SIZE = 2000
+
+    def __init__(self, trainings):
+        self.trainings = trainings
+        self.date_field = serializers.DateTimeField()
+
+    def rows(self):
+        rows = self.trainings.order_by('date', 'id').values_list(*self.COLUMNS)
+        for row in rows.iterator(chunk_size=self.CHUNK_SIZE):
+            row = list(row)
+            row[1] = self.date_field.to_representation(row[1])
+            yield row
+
+    def csv_lines(self):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.FIELDS)
+        for row in self.rows():
+            yield writer.writerow(row)
+
+    def ndjson_lines(self):
+        for row in self.rows():
+            yield json.dumps(dict(zip(self.FIELDS, row))) + '\n'
+
+
+class TrainingColumns:
+    """
+    This class builds the columnar representation of trainings: one array per field
+    and the referenced exercises once, read with values_list() without instantiating
+    any model or serializer.
+    Only the fields asked with ?fields= are returned (the exercise field gives the
+    exercise_id column and the exercises), the id always is.
+    """
+
+    FIELDS = ('id', 'date', 'performance_type', 'performance_value', 'done', 'exercise_id')
+    EXERCISE_FIELDS = ('id', 'name', 'exercise_type', 'goal_type', 'goal_value', 'is_default')
+
+    def __init__(self, trainings, fields=None):
+        self.trainings = trainings
+        if fields is None:
+            self.fields = self.FIELDS
+        else:
+            fields = {'exercise_id' if field == 'exercise' else field for field in fields} | {'id'}
+            self.fields = tuple(field for field in self.FIELDS if field in fields)
+
+    def data(self):
+        rows = list(self.trainings.values_list(*self.fields))
+        columns = dict(zip(self.fields, map(list, zip(*rows)))) if rows else {field: [] for field in self.fields}
+        if 'date' in columns:
+            to_representation = serializers.DateTimeField().to_representation
+            columns['date'] = [to_representation(date) for date in columns['date']]
+
+        if 'exercise_id' in columns:
+            exercises = Exercise.objects.filter(pk__in=set(columns['exercise_id'])).values_list(*self.EXERCISE_FIELDS)
+            columns['exercises'] = {exercise[0]: dict(zip(self.EXERCISE_FIELDS[1:], exercise[1:])) for exercise in exercises}
+        return columns
@@ -0,0 +1,69 @@
+from rest_framework import exceptions
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Exercise, MovementsPerExercise
+from .totals import TOTAL_FIELDS
+from .counters import COUNTER_FIELDS
+
+class ExerciseFilterBackend(BaseFilterBackend):
+    """
+    Filter the exercises with the query parameters:
+        -> exercise_type, goal_type: one of the choices of the field
+        -> is_default: true or false
+        -> movement: the exercises containing this movement (repeatable, all of them are required)
+        -> equipment: the exercises with a movement done with this equipment (repeatable)
+        -> min_<total>, max_<total>: bounds of estimated_duration, total_repetitions,
+            total_distance or total_load (included)
+        -> ordering: comma separated fields among ORDERING_FIELDS, - first for a descending order
+    The movements and equipments are filtered with semi-joins on the movements of
+    the exercises (id IN (subquery)), so an exercise is never returned twice.
+    """
+    BOOLEANS = {'true': True, '1': True, 'false': False, '0': False}
+    ORDERING_FIELDS = ('id', 'name') + TOTAL_FIELDS + COUNTER_FIELDS
+
+    @staticmethod
+    def get_choice(params, name, choices):
+        value = params[name]
+        if value not in dict(choices):
+            raise exceptions.ValidationError({name: '"{}" is not a valid choice.'.format(value)})
+        return value
+
+    @staticmethod
+    def get_integers(params, name):
+        try:
+            return [int(value) for value in params.getlist(name)]
+        except ValueError:
+            raise exceptions.ValidationError({name: 'A valid integer is required.'})
+
+    def get_ordering(self, params):
+        ordering = [field.strip() for field in params['ordering'].split(',') if field.strip()]
+        for field in ordering:
+            if field.lstrip('-') not in self.ORDERING_FIELDS:
+                raise exceptions.ValidationError({'ordering': '"{}" is not a valid field.'.format(field)})
+        # The ties are kept in the same order from a page to another
+        return ordering + ['id']
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        if 'exercise_type' in params:
+            queryset = queryset.filter(exercise_type=self.get_choice(params, 'exercise_type', Exercise.EXERCISE_TYPE))
+        if 'goal_type' in params:
+            queryset = queryset.filter(goal_type=self.get_choice(params, 'goal_type', Exercise.PERFORMANCE_TYPE))
+        if 'is_default' in params:
+            if params['is_default'].lower() not in self.BOOLEANS:
+                raise exceptions.ValidationError({'is_default': 'Must be a valid boolean.'})
+            queryset = queryset.filter(is_default=self.BOOLEANS[params['is_default'].lower()])
+        for movement in self.get_integers(params, 'movement'):
+            exercises = MovementsPerExercise.objects.filter(movement=movement).values('exercise_id')
+            queryset = queryset.filter(pk__in=exercises)
+        for equipment in self.get_integers(params, 'equipment'):
+            exercises = MovementsPerExercise.objects.filter(movement__equipment=equipment).values('exercise_id')
+            queryset = queryset.filter(pk__in=exercises)
+        for field in TOTAL_FIELDS:
+            for bound, lookup in (('min', 'gte'), ('max', 'lte')):
+                name = '{}_{}'.format(bound, field)
+                for value in self.get_integers(params, name):
+                    queryset = queryset.filter(**{'{}__{}'.format(field, lookup): value})
+        if 'ordering' in params:
+            queryset = queryset.order_by(*self.get_ordering(params))
+        return queryset
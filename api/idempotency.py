@@ -0,0 +1,140 @@
+import hashlib
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.utils import timezone
+from rest_framework import exceptions, status
+
+from .models import IdempotencyKey
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+
+# The lock is taken when the key is new, when its response has expired or when
+# the request holding it has not answered before locked_until
+CLAIM_SQL = """
+    INSERT INTO api_idempotencykey (user_id, path, key, fingerprint, token, locked_until, created_at)
+    VALUES (%(user)s, %(path)s, %(key)s, %(fingerprint)s, %(token)s, %(locked_until)s, %(now)s)
+    ON CONFLICT (user_id, path, key)
+    DO UPDATE SET fingerprint = EXCLUDED.fingerprint,
+                  token = EXCLUDED.token,
+                  locked_until = EXCLUDED.locked_until,
+                  created_at = EXCLUDED.created_at,
+                  status_code = NULL,
+                  response = NULL
+    WHERE (api_idempotencykey.status_code IS NULL AND api_idempotencykey.locked_until < %(now)s)
+       OR api_idempotencykey.created_at < %(expired)s
+    RETURNING id
+"""
+
+class RequestInProgress(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still in progress.'
+    default_code = 'conflict'
+
+class IdempotentRequest:
+    """
+    This class keeps the response of a create request sent with an Idempotency-Key
+    header, so that the retries of the client get it back without creating the
+    object twice. The key is scoped to the user and the path, and bound to the body:
+    the same key with another body is refused.
+    The keys are rows of the IdempotencyKey table, so every process sees them.
+    Concurrent duplicates are serialized on the row: the first request takes its
+    lock with a token while the others wait for its response.
+    """
+    # Time during which a response is replayed
+    TTL = 24 * 60 * 60
+    # Time after which the lock of a request which never answered can be taken again
+    LOCK_TIMEOUT = 30
+    # Time a duplicate waits for the response of the first request
+    WAIT_TIMEOUT = 10
+    WAIT_INTERVAL = 0.05
+    MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+    def __init__(self, request, key):
+        self.user_id = request.user.pk
+        self.path = request.path
+        self.key = key
+        body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+        self.fingerprint = hashlib.sha256(body.encode()).hexdigest()
+        # Identify the lock of this request among the ones taken on the key
+        self.token = uuid.uuid4()
+
+    @classmethod
+    def from_request(cls, request):
+        """
+        Return the IdempotentRequest of a request, None if it has no Idempotency-Key
+        """
+        key = request.META.get(HEADER, '').strip()
+        if not key:
+            return None
+        if len(key) > cls.MAX_KEY_LENGTH:
+            raise exceptions.ValidationError({'Idempotency-Key': 'Ensure this key has no more than {} characters.'
+                                                                 .format(cls.MAX_KEY_LENGTH)})
+        return cls(request, key)
+
+    def rows(self):
+        return IdempotencyKey.objects.filter(user_id=self.user_id, path=self.path, key=self.key)
+
+    def stored(self):
+        """
+        Return the stored (fingerprint, status, data) of the key, None if there is none
+        """
+        expired = timezone.now() - timedelta(seconds=self.TTL)
+        return (self.rows().filter(status_code__isnull=False, created_at__gte=expired)
+                .values_list('fingerprint', 'status_code', 'response').first())
+
+    def claim(self):
+        """
+        Take the lock of the key with the token of this request, return False if it is held
+        """
+        now = timezone.now()
+        params = {'user': self.user_id, 'path': self.path, 'key': self.key, 'fingerprint': self.fingerprint,
+                  'token': self.token, 'locked_until': now + timedelta(seconds=self.LOCK_TIMEOUT),
+                  'now': now, 'expired': now - timedelta(seconds=self.TTL)}
+        with connection.cursor() as cursor:
+            cursor.execute(CLAIM_SQL, params)
+            return cursor.fetchone() is not None
+
+    def acquire(self):
+        """
+        Take the lock of the key or wait until the request holding it has answered.
+        Return the stored response if there is one, None once the lock is taken.
+        """
+        deadline = time.monotonic() + self.WAIT_TIMEOUT
+        while True:
+            if self.claim():
+                return None
+            stored = self.stored()
+            if stored is not None:
+                return stored
+            if time.monotonic() >= deadline:
+                raise RequestInProgress()
+            time.sleep(self.WAIT_INTERVAL)
+
+    def save(self, response):
+        """
+        Store the response in the transaction of the create. If the lock has expired and
+        another request has taken it, a 409 error is raised so that the create is rolled back.
+        """
+        if not self.rows().filter(token=self.token).update(status_code=response.status_code, response=response.data):
+            raise RequestInProgress()
+
+    def release(self):
+        """
+        Drop the lock if this request still holds it without a stored response,
+        the lock of another request is never dropped
+        """
+        self.rows().filter(token=self.token, status_code__isnull=True).delete()
+
+
+def prune_idempotency_keys():
+    """
+    Delete the keys whose response is not replayed anymore, return how many were deleted
+    """
+    expired = timezone.now() - timedelta(seconds=IdempotentRequest.TTL)
+    count, _ = IdempotencyKey.objects.filter(created_at__lt=expired).delete()
+    return count
@@ -0,0 +1,217 @@
+import time
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from .models import LeaderboardEntry, Training
+
+# The best of the user is only written when the new value beats it, the previous
+# best is returned with the new one so the cached snapshots can be moved in place
+SUBMIT_SQL = """
+    WITH previous AS (
+        SELECT best FROM api_leaderboardentry
+        WHERE exercise_id = %(exercise)s AND performance_type = %(performance_type)s AND founder_id = %(founder)s
+    )
+    INSERT INTO api_leaderboardentry (exercise_id, performance_type, founder_id, best)
+    VALUES (%(exercise)s, %(performance_type)s, %(founder)s, %(value)s)
+    ON CONFLICT (exercise_id, performance_type, founder_id)
+    DO UPDATE SET best = EXCLUDED.best
+    WHERE EXCLUDED.best {better} api_leaderboardentry.best
+    RETURNING (SELECT best FROM previous), best
+"""
+
+class Leaderboard:
+    """
+    This class represents the ranking of the users on one default exercise
+    for one performance type.
+    Only the best done training of each user is ranked, it is kept in the
+    LeaderboardEntry table on each training write. The top is read on the index
+    of this table. The snapshot of the bests is cached and kept sorted on a key
+    where the lowest key is the best performance, so the rank of a user is found
+    with a binary search. A committed training write moves its user in the cached
+    snapshot instead of dropping it.
+    """
+
+    CACHE_KEY = "leaderboard:{}:{}"
+    # Each process has its own cache, the timeout bounds how long the writes of another one are missed
+    TIMEOUT = 60
+
+    def __init__(self, exercise_id, performance_type, bests=()):
+        self.exercise_id = exercise_id
+        self.performance_type = performance_type
+        self.keys = sorted(self.key(value) for value in bests)
+        self.expires_at = time.time() + self.TIMEOUT
+
+    def is_ascending(self):
+        """
+        A time is better when it is lower, every other performance is better when higher
+        """
+        return self.performance_type == Training.TIME
+
+    def key(self, value):
+        return value if self.is_ascending() else -value
+
+    @property
+    def count(self):
+        return len(self.keys)
+
+    @classmethod
+    def cache_key(cls, exercise_id, performance_type):
+        return cls.CACHE_KEY.format(exercise_id, performance_type)
+
+    @classmethod
+    def ranked_trainings(cls, exercise_id, performance_type):
+        return Training.objects.filter(exercise_id=exercise_id,
+                                       performance_type=performance_type,
+                                       done=True,
+                                       performance_value__isnull=False)
+
+    @classmethod
+    def entries(cls, exercise_id, performance_type):
+        return LeaderboardEntry.objects.filter(exercise_id=exercise_id, performance_type=performance_type)
+
+    @classmethod
+    def build(cls, exercise_id, performance_type):
+        """
+        Build the snapshot with one scan of the leaderboard index, one row per ranked user
+        """
+        bests = cls.entries(exercise_id, performance_type).values_list('best', flat=True)
+        return cls(exercise_id, performance_type, bests)
+
+    @classmethod
+    def get(cls, exercise_id, performance_type):
+        """
+        Return the cached snapshot or build it if it does not exist yet
+        """
+        key = cls.cache_key(exercise_id, performance_type)
+        leaderboard = cache.get(key)
+        if leaderboard is None:
+            leaderboard = cls.build(exercise_id, performance_type)
+            leaderboard.save()
+        return leaderboard
+
+    def save(self):
+        """
+        Cache the snapshot until the end of the timeout given when it was built,
+        the in place updates do not extend it
+        """
+        timeout = self.expires_at - time.time()
+        if timeout > 0:
+            cache.set(self.cache_key(self.exercise_id, self.performance_type), self, timeout)
+
+    def top(self, k):
+        """
+        Return the k first (rank, founder_id, value) read on the leaderboard index,
+        users with the same best share the same rank
+        """
+        entries = (self.entries(self.exercise_id, self.performance_type)
+                   .order_by('best' if self.is_ascending() else '-best', 'founder')
+                   .values_list('founder', 'best')[:k])
+        rows = []
+        for position, (founder_id, value) in enumerate(entries):
+            rank = rows[-1][0] if rows and rows[-1][2] == value else position + 1
+            rows.append((rank, founder_id, value))
+        return rows
+
+    def best(self, founder_id):
+        return (self.entries(self.exercise_id, self.performance_type)
+                .filter(founder_id=founder_id).values_list('best', flat=True).first())
+
+    def rank(self, founder_id, value=None):
+        """
+        Return the rank of the user (1 is the best) or None if the user is not ranked:
+        one more than the number of users with a better best in the snapshot
+        """
+        if value is None:
+            value = self.best(founder_id)
+        if value is None:
+            return None
+        return bisect_left(self.keys, self.key(value)) + 1
+
+    def move(self, previous, current):
+        """
+        Replace the previous best of a user (None if the user was not ranked) by the current one
+        """
+        if previous is not None:
+            index = bisect_left(self.keys, self.key(previous))
+            if index < len(self.keys) and self.keys[index] == self.key(previous):
+                del self.keys[index]
+        if current is not None:
+            insort(self.keys, self.key(current))
+
+
+def move_in_snapshot(exercise_id, performance_type, previous, current):
+    """
+    Move a user in the cached snapshot once the transaction of the write is committed,
+    a rolled back write leaves it untouched
+    """
+    if previous == current:
+        return
+
+    def move():
+        leaderboard = cache.get(Leaderboard.cache_key(exercise_id, performance_type))
+        if leaderboard is not None:
+            leaderboard.move(previous, current)
+            leaderboard.save()
+    transaction.on_commit(move)
+
+
+def submit_best(exercise_id, performance_type, founder_id, value):
+    """
+    Keep a done performance as the best of the user if it beats the current one
+    """
+    sql = SUBMIT_SQL.format(better='<' if performance_type == Training.TIME else '>')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'exercise': exercise_id, 'performance_type': performance_type,
+                             'founder': founder_id, 'value': value})
+        row = cursor.fetchone()
+    if row is not None:
+        move_in_snapshot(exercise_id, performance_type, *row)
+
+
+def refresh_best(exercise_id, performance_type, founder_id):
+    """
+    Recompute the best of one user, used when one of their trainings has been updated
+    or deleted and may not be their best anymore
+    """
+    best = Min if performance_type == Training.TIME else Max
+    current = (Leaderboard.ranked_trainings(exercise_id, performance_type)
+               .filter(founder_id=founder_id)
+               .aggregate(best=best('performance_value'))['best'])
+    entries = Leaderboard.entries(exercise_id, performance_type).filter(founder_id=founder_id)
+    previous = entries.values_list('best', flat=True).first()
+    if current is None:
+        entries.delete()
+    elif previous is None:
+        LeaderboardEntry.objects.create(exercise_id=exercise_id, performance_type=performance_type,
+                                        founder_id=founder_id, best=current)
+    elif previous != current:
+        entries.update(best=current)
+    move_in_snapshot(exercise_id, performance_type, previous, current)
+
+
+def update_leaderboard(training, previous, current):
+    """
+    Apply a training write to the bests of its founder, they are recomputed when
+    the values of the training are unknown
+    """
+    if previous is None or current is None:
+        for performance_type, _ in Training.PERFORMANCE_TYPE:
+            refresh_best(training.exercise_id, performance_type, training.founder_id)
+        return
+    was_ranked = Training.performance_state(previous)
+    is_ranked = Training.performance_state(current)
+    if previous == current:
+        return
+    if is_ranked[0] and not was_ranked[0]:
+        submit_best(current['exercise_id'], current['performance_type'], current['founder_id'],
+                    current['performance_value'])
+        return
+    refreshed = set()
+    for values, state in ((previous, was_ranked), (current, is_ranked)):
+        if state[0]:
+            refreshed.add((values['exercise_id'], values['performance_type'], values['founder_id']))
+    for exercise_id, performance_type, founder_id in refreshed:
+        refresh_best(exercise_id, performance_type, founder_id)
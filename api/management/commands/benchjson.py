@@ -0,0 +1,34 @@
+#! /usr/bin/env python3
+# coding: utf-8
+import timeit
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from ...models import Exercise
+from ...renderers import FastJSONRenderer, orjson
+from ...serializers import ExerciseSerializer
+
+class Command(BaseCommand):
+    help = "Compare the render time of the exercise list with the stdlib and the orjson renderers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000,
+                            help="Number of exercises in the rendered list (the exercises in db are repeated)")
+        parser.add_argument('--repeat', type=int, default=20,
+                            help="Number of renders timed for each renderer")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed, FastJSONRenderer falls back to the stdlib")
+        exercises = ExerciseSerializer(Exercise.objects.all(), many=True).data
+        if not exercises:
+            raise CommandError("There is no exercise in db, run ./manage.py dbinit first")
+        data = (exercises * (options['size'] // len(exercises) + 1))[:options['size']]
+
+        self.stdout.write("Rendering {} exercises {} times".format(len(data), options['repeat']))
+        results = {}
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            assert renderer.render(data)
+            duration = timeit.timeit(lambda: renderer.render(data), number=options['repeat'])
+            results[renderer.__class__.__name__] = duration / options['repeat'] * 1000
+            self.stdout.write("{}: {:.2f} ms".format(renderer.__class__.__name__, results[renderer.__class__.__name__]))
+        self.stdout.write("Speedup: x{:.1f}".format(results['JSONRenderer'] / results['FastJSONRenderer']))
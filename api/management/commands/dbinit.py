@@ -68,7 +68,7 @@ class DBinit:
 
         # We create the necessary equipments
         kb = Equipment.objects.create(name="kettlebell", founder=founder)
-        anyone = Equipment.objects.create(name="aucun", founder=founder)
+        anyone = Equipment.objects.create(name=Equipment.NONE, founder=founder)
         ball = Equipment.objects.create(name="wallball", founder=founder)
         drawbar = Equipment.objects.create(name="barre de traction", founder=founder)
         dipbar = Equipment.objects.create(name="barre à dips", founder=founder)
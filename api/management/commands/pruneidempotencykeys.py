@@ -0,0 +1,10 @@
+#! /usr/bin/env python3
+# coding: utf-8
+from django.core.management.base import BaseCommand
+from ...idempotency import prune_idempotency_keys
+
+class Command(BaseCommand):
+    help = "Delete the Idempotency-Key responses older than their replay time"
+
+    def handle(self, *args, **options):
+        self.stdout.write("{} idempotency keys deleted".format(prune_idempotency_keys()))
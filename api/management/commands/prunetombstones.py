@@ -0,0 +1,10 @@
+#! /usr/bin/env python3
+# coding: utf-8
+from django.core.management.base import BaseCommand
+from ...sync import prune_tombstones
+
+class Command(BaseCommand):
+    help = "Delete the tombstones older than the sync retention"
+
+    def handle(self, *args, **options):
+        self.stdout.write("{} tombstones deleted".format(prune_tombstones()))
@@ -0,0 +1,14 @@
+#! /usr/bin/env python3
+# coding: utf-8
+from django.core.management.base import BaseCommand
+from ...rollups import rebuild_rollups
+
+class Command(BaseCommand):
+    help = "Recompute the weekly and monthly training rollups from the trainings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--founder', type=int, action='append', dest='founders',
+                            help="Only rebuild the rollups of this user id (repeatable)")
+
+    def handle(self, *args, **options):
+        rebuild_rollups(founder_ids=options['founders'])
@@ -0,0 +1,11 @@
+#! /usr/bin/env python3
+# coding: utf-8
+from django.core.management.base import BaseCommand
+from ...counters import rebuild_counters
+
+class Command(BaseCommand):
+    help = "Recompute the training counters of the exercises and the users from the trainings"
+
+    def handle(self, *args, **options):
+        exercises, users = rebuild_counters()
+        self.stdout.write("{} exercises and {} users repaired".format(exercises, users))
@@ -0,0 +1,22 @@
+# Generated by Django 2.1.3 on 2026-10-19 02:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_auto_20181114_1631'),
+    ]
+
+    # Partial indexes can not be declared in Meta.indexes with Django 2.1
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                CREATE INDEX api_training_leaderboard_idx
+                ON api_training (exercise_id, performance_type, performance_value)
+                WHERE done AND performance_value IS NOT NULL;
+            """,
+            reverse_sql="DROP INDEX api_training_leaderboard_idx;",
+        ),
+    ]
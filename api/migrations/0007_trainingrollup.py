@@ -0,0 +1,49 @@
+# Generated by Django 2.1.3 on 2026-10-19 02:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0006_training_leaderboard_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'week'), ('month', 'month')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('exercise_type', models.CharField(choices=[('RUNNING', 'RUNNING'), ('FORTIME', 'FORTIME'), ('AMRAP', 'AMRAP'), ('WARMUP', 'ECHAUFFEMENT'), ('STRENGTH', 'FORCE'), ('EMOM', 'EMOM'), ('CONDITIONNING', 'CONDITIONNEMENT')], max_length=20)),
+                ('done_count', models.IntegerField(default=0)),
+                ('performance_sum', models.BigIntegerField(default=0)),
+                ('founder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='training_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='trainingrollup',
+            unique_together={('founder', 'period', 'period_start', 'exercise_type')},
+        ),
+        migrations.RunSQL(
+            sql=[(
+                """
+                INSERT INTO api_trainingrollup (founder_id, period, period_start, exercise_type, done_count, performance_sum)
+                SELECT training.founder_id, periods.period,
+                       date_trunc(periods.period, training.date AT TIME ZONE %s)::date,
+                       exercise.exercise_type, COUNT(*), COALESCE(SUM(training.performance_value), 0)
+                FROM api_training training
+                INNER JOIN api_exercise exercise ON exercise.id = training.exercise_id
+                CROSS JOIN (VALUES ('week'), ('month')) AS periods (period)
+                WHERE training.done
+                GROUP BY 1, 2, 3, 4
+                """,
+                [settings.TIME_ZONE],
+            )],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.1.3 on 2026-10-19 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_trainingrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='training',
+            index=models.Index(fields=['founder', 'exercise', 'date'], name='api_training_progression_idx'),
+        ),
+    ]
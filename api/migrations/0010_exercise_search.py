@@ -0,0 +1,45 @@
+# Generated by Django 2.1.3 on 2026-10-19 02:37
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_sync_tracking'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='exercise',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='api_exercise_search_idx'),
+        ),
+        # The vector is computed by the database so every write keeps it up to date,
+        # including the set-based inserts (clones). The updates which do not set the
+        # description (counters, versions, totals) do not compute it again.
+        migrations.RunSQL(
+            sql=[
+                """
+                CREATE TRIGGER api_exercise_search_vector_trigger
+                BEFORE INSERT OR UPDATE OF description ON api_exercise
+                FOR EACH ROW EXECUTE PROCEDURE
+                tsvector_update_trigger(search_vector, 'pg_catalog.french', description)
+                """,
+                "UPDATE api_exercise SET search_vector = to_tsvector('pg_catalog.french', COALESCE(description, ''))",
+            ],
+            reverse_sql="DROP TRIGGER api_exercise_search_vector_trigger ON api_exercise",
+        ),
+        migrations.RunSQL(
+            sql="CREATE INDEX api_exercise_name_trgm_idx ON api_exercise USING gin (name gin_trgm_ops)",
+            reverse_sql="DROP INDEX api_exercise_name_trgm_idx",
+        ),
+    ]
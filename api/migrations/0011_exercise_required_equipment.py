@@ -0,0 +1,44 @@
+# Generated by Django 2.1.3 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+def give_equipment_bits(apps, schema_editor):
+    Equipment = apps.get_model('api', 'Equipment')
+    for bit, equipment in enumerate(Equipment.objects.order_by('id')[:63]):
+        equipment.bit = bit
+        equipment.save(update_fields=['bit'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_exercise_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='required_equipment',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(give_equipment_bits, migrations.RunPython.noop),
+        migrations.RunSQL(
+            sql="""
+                UPDATE api_exercise exercise
+                SET required_equipment = COALESCE((
+                    SELECT bit_or(1::bigint << COALESCE(equipment.bit, 63))
+                    FROM api_movementsperexercise exercise_movement
+                    INNER JOIN api_movement movement ON movement.id = exercise_movement.movement_id
+                    INNER JOIN api_equipment equipment ON equipment.id = movement.equipment_id
+                    WHERE exercise_movement.exercise_id = exercise.id
+                ), 0)
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 2.1.3 on 2026-10-19 02:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0009_alter_user_last_name_max_length'),
+        ('api', '0012_exercise_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='training_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('training_count', models.PositiveIntegerField(default=0)),
+                ('done_count', models.PositiveIntegerField(default=0)),
+                ('last_trained_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='done_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='last_trained_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='training_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql=[
+                """
+                UPDATE api_exercise exercise
+                SET training_count = counters.training_count,
+                    done_count = counters.done_count,
+                    last_trained_at = counters.last_trained_at
+                FROM (
+                    SELECT exercise.id, COUNT(training.id) AS training_count,
+                           COUNT(training.id) FILTER (WHERE training.done) AS done_count,
+                           MAX(training.date) FILTER (WHERE training.done) AS last_trained_at
+                    FROM api_exercise exercise
+                    LEFT JOIN api_training training ON training.exercise_id = exercise.id
+                    GROUP BY exercise.id
+                ) counters
+                WHERE counters.id = exercise.id
+                """,
+                """
+                INSERT INTO api_userstats (user_id, training_count, done_count, last_trained_at)
+                SELECT training.founder_id, COUNT(*),
+                       COUNT(*) FILTER (WHERE training.done),
+                       MAX(training.date) FILTER (WHERE training.done)
+                FROM api_training training
+                GROUP BY training.founder_id
+                """,
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.1.3 on 2026-10-19 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_training_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='training',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
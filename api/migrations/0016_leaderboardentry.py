@@ -0,0 +1,46 @@
+# Generated by Django 2.1.3 on 2026-10-19 03:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0015_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('performance_type', models.CharField(choices=[('duree', 'duree'), ('round', 'round'), ('distance', 'distance'), ('anyone', 'anyone')], max_length=20)),
+                ('best', models.IntegerField()),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='api.Exercise')),
+                ('founder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['exercise', 'performance_type', 'best'], name='api_leaderboard_best_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='leaderboardentry',
+            unique_together={('exercise', 'performance_type', 'founder')},
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO api_leaderboardentry (exercise_id, performance_type, founder_id, best)
+                SELECT exercise_id, performance_type, founder_id,
+                       CASE WHEN performance_type = 'duree' THEN MIN(performance_value)
+                            ELSE MAX(performance_value) END
+                FROM api_training
+                WHERE done AND performance_value IS NOT NULL
+                GROUP BY exercise_id, performance_type, founder_id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
+from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 
 class Training(models.Model):
     """
@@ -32,9 +36,44 @@ class Training(models.Model):
                                         choices=PERFORMANCE_TYPE)
     performance_value = models.IntegerField(null=True)
 
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Incremented by each update of the API, compared with the If-Match header
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['founder', 'exercise', 'date'], name='api_training_progression_idx'),
+        ]
+
     def __str__(self):
         return "{} - {}".format(self.exercise.name, self.date)
 
+    # Fields remembered when loaded, so the writes can tell how a training has changed
+    TRACKED_FIELDS = ('founder_id', 'exercise_id', 'date', 'done', 'performance_type', 'performance_value')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_values = instance.tracked_values()
+        return instance
+
+    def tracked_values(self):
+        """
+        Return the tracked fields as a dict or None if one of them has not been loaded
+        """
+        if any(field not in self.__dict__ for field in self.TRACKED_FIELDS):
+            return None
+        return {field: self.__dict__[field] for field in self.TRACKED_FIELDS}
+
+    @staticmethod
+    def performance_state(values):
+        """
+        Return (is ranked, performance type, performance value) from tracked values
+        """
+        return (bool(values['done'] and values['performance_value'] is not None),
+                values['performance_type'],
+                values['performance_value'])
+
 class Exercise(models.Model):
     """
     This class represents the exercises created
@@ -85,9 +124,30 @@ class Exercise(models.Model):
                                       through='MovementsPerExercise', 
                                       related_name='exercises',
                                       verbose_name="list of movements per exercise")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # French full-text vector of the description, maintained by a trigger on each write
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Bitset of the equipments (Equipment.bit) needed by the movements, maintained on each write
+    required_equipment = models.BigIntegerField(default=0, editable=False)
+    # Totals of the movement settings (for all the rounds when the goal is a number of rounds)
+    # and estimated duration in seconds, maintained by the writes of ExerciseSerializer
+    estimated_duration = models.PositiveIntegerField(default=0, editable=False)
+    total_repetitions = models.PositiveIntegerField(default=0, editable=False)
+    total_distance = models.PositiveIntegerField(default=0, editable=False)
+    total_load = models.PositiveIntegerField(default=0, editable=False)
+    # Trainings on the exercise and date of the last done one, maintained on each training write
+    # and repaired by the repaircounters command
+    training_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+    done_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+    last_trained_at = models.DateTimeField(null=True, editable=False)
+    # Incremented by each update of the API, compared with the If-Match header
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
         verbose_name = 'exercice'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='api_exercise_search_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -111,6 +171,7 @@ class MovementsPerExercise(models.Model):
                                                 through='MovementSettingsPerMovementsPerExercise',
                                                 related_name="exercise_movements",
                                                 verbose_name="settings value per movement for one exercise")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return "{} - {} - {}".format(self.exercise.name, self.movement.name, self.movement_number)
@@ -131,6 +192,7 @@ class MovementSettingsPerMovementsPerExercise(models.Model):
                                 verbose_name="the setting linked to the movement associated to the exercise",
                                 related_name="settings_per_movement_linked_to_exercise")  
     setting_value = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return "{} : {} -> {} : {}".format(self.exercise_movement.exercise.name,
@@ -199,15 +261,145 @@ class MovementSettings(models.Model):
         return self.name
 
 class Equipment(models.Model):
+    # The equipment of the movements done without equipment, which every user has
+    NONE = "aucun"
+
     name = models.CharField(max_length=20,
                             unique=True)
 
     founder = models.ForeignKey(User,
                                 on_delete=models.CASCADE,
                                 related_name="equipments")
+    # Position of the equipment in the bitsets of the exercises, given on creation
+    bit = models.PositiveSmallIntegerField(null=True,
+                                           unique=True,
+                                           editable=False)
 
     class Meta:
         verbose_name = 'equipement'
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class TrainingRollup(models.Model):
+    """
+    This class represents the done trainings of a user aggregated per week or month
+    and per exercise type. It is maintained on each training write and can be
+    rebuilt with the rebuildrollups command.
+    """
+    WEEK = 'week'
+    MONTH = 'month'
+    PERIOD = (
+        (WEEK, 'week'),
+        (MONTH, 'month')
+    )
+
+    founder = models.ForeignKey(User,
+                                on_delete=models.CASCADE,
+                                related_name="training_rollups")
+    period = models.CharField(max_length=10,
+                              choices=PERIOD)
+    period_start = models.DateField()
+    exercise_type = models.CharField(max_length=20,
+                                     choices=Exercise.EXERCISE_TYPE)
+    done_count = models.IntegerField(default=0)
+    performance_sum = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('founder', 'period', 'period_start', 'exercise_type')
+
+    def __str__(self):
+        return "{} - {} {} - {}".format(self.founder, self.period, self.period_start, self.exercise_type)
+
+class UserStats(models.Model):
+    """
+    This class represents the trainings of a user and the date of its last done one.
+    It is maintained on each training write and can be repaired with the repaircounters command.
+    """
+    user = models.OneToOneField(User,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name="training_stats")
+    training_count = models.PositiveIntegerField(default=0)
+    done_count = models.PositiveIntegerField(default=0)
+    last_trained_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return "{} - {} trainings".format(self.user, self.training_count)
+
+class LeaderboardEntry(models.Model):
+    """
+    This class represents the best done training of a user on an exercise for one
+    performance type. It is maintained on each training write, the leaderboards read
+    their top on its index.
+    """
+    exercise = models.ForeignKey(Exercise,
+                                 on_delete=models.CASCADE,
+                                 related_name="leaderboard_entries")
+    performance_type = models.CharField(max_length=20,
+                                        choices=Training.PERFORMANCE_TYPE)
+    founder = models.ForeignKey(User,
+                                on_delete=models.CASCADE,
+                                related_name="leaderboard_entries")
+    best = models.IntegerField()
+
+    class Meta:
+        unique_together = ('exercise', 'performance_type', 'founder')
+        indexes = [
+            models.Index(fields=['exercise', 'performance_type', 'best'], name='api_leaderboard_best_idx'),
+        ]
+
+    def __str__(self):
+        return "{} - {} {} - {}".format(self.founder, self.exercise_id, self.performance_type, self.best)
+
+class Tombstone(models.Model):
+    """
+    This class represents a deleted training or exercise row, kept so that the
+    offline clients can remove it on their next sync.
+    The owner is a plain id: the tombstones are also written while a user is deleted.
+    """
+    EXERCISE = 'exercise'
+    EXERCISE_MOVEMENT = 'exercise_movement'
+    EXERCISE_MOVEMENT_SETTING = 'exercise_movement_setting'
+    TRAINING = 'training'
+    OBJECT_TYPE = (
+        (EXERCISE, 'exercise'),
+        (EXERCISE_MOVEMENT, 'exercise_movement'),
+        (EXERCISE_MOVEMENT_SETTING, 'exercise_movement_setting'),
+        (TRAINING, 'training')
+    )
+
+    object_type = models.CharField(max_length=30,
+                                   choices=OBJECT_TYPE)
+    object_id = models.IntegerField()
+    owner_id = models.IntegerField(null=True)
+    is_default = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return "{} {} - {}".format(self.object_type, self.object_id, self.deleted_at)
+
+class IdempotencyKey(models.Model):
+    """
+    This class represents an Idempotency-Key sent by a user on a create path: the lock
+    of the request running with it, then its response replayed to the retries.
+    The table is shared by all the processes, its unique key serializes the duplicates.
+    """
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name="idempotency_keys")
+    path = models.CharField(max_length=200)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    # The request holding the lock, until locked_until
+    token = models.UUIDField()
+    locked_until = models.DateTimeField()
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'path', 'key')
+
+    def __str__(self):
+        return "{} - {} {}".format(self.user, self.path, self.key)
@@ -0,0 +1,106 @@
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from rest_framework import exceptions
+
+from .models import Exercise, MovementsPerExercise, Training
+from .requirements import equipment_mask
+from .counters import apply_trainings
+
+class ProgramGenerator:
+    """
+    This class plans a program of trainings for a user: some sessions a week during
+    some weeks, the types of exercises taking turns, with the exercises the user can
+    see and do with its equipments, without a movement done the day before.
+    The candidates are loaded with two queries, their movements kept as bitsets
+    (one bit per movement), then each session takes the valid exercise of its type
+    used the longest time ago (the ties are broken by a shuffle, seeded to replay a program).
+    The trainings are not done, so they count in no leaderboard, percentile or rollup
+    and are created with one statement, then counted by exercise.
+    """
+
+    def __init__(self, user, exercise_types, equipment_ids, weeks, sessions_per_week, start, seed=None):
+        self.user = user
+        self.exercise_types = list(dict.fromkeys(exercise_types))
+        self.equipment_ids = equipment_ids
+        self.weeks = weeks
+        self.sessions_per_week = sessions_per_week
+        self.start = start
+        self.random = random.Random(seed)
+
+    def load(self):
+        """
+        Return the candidates of each type as lists of (exercise id, goal type, movements bitset)
+        """
+        exercises = Exercise.objects.filter(exercise_type__in=self.exercise_types)
+        if not self.user.is_staff:
+            exercises = exercises.filter(Q(is_default=True) | Q(founder=self.user))
+        exercises = (exercises.annotate(missing_equipment=F('required_equipment').bitand(~equipment_mask(self.equipment_ids)))
+                     .filter(missing_equipment=0))
+        rows = list(exercises.values_list('id', 'exercise_type', 'goal_type'))
+
+        bits, movements = {}, {}
+        exercise_movements = MovementsPerExercise.objects.filter(exercise__in=exercises.values('id'))
+        for exercise_id, movement_id in exercise_movements.values_list('exercise_id', 'movement_id'):
+            bit = bits.setdefault(movement_id, len(bits))
+            movements[exercise_id] = movements.get(exercise_id, 0) | 1 << bit
+
+        self.random.shuffle(rows)
+        candidates = {exercise_type: [] for exercise_type in self.exercise_types}
+        for exercise_id, exercise_type, goal_type in rows:
+            candidates[exercise_type].append((exercise_id, goal_type, movements.get(exercise_id, 0)))
+        return candidates
+
+    def session_days(self):
+        """
+        Return the days of the sessions from the start, spread over each week
+        """
+        days = sorted({round(session * 7 / self.sessions_per_week) % 7 for session in range(self.sessions_per_week)})
+        return [week * 7 + day for week in range(self.weeks) for day in days]
+
+    def schedule(self):
+        """
+        Return the sessions as (day, exercise id, goal type), raise a 400 error
+        when an exercise type has no candidate or when a session cannot be planned
+        """
+        candidates = self.load()
+        missing = [exercise_type for exercise_type, exercises in candidates.items() if not exercises]
+        if missing:
+            raise exceptions.ValidationError({'exercise_types': 'No exercise can be done for {}.'.format(', '.join(missing))})
+
+        last_used, movements_of_day, sessions = {}, {}, []
+        for number, day in enumerate(self.session_days()):
+            # The type of the session first, the other ones when none of its exercises fits
+            offset = number % len(self.exercise_types)
+            types = self.exercise_types[offset:] + self.exercise_types[:offset]
+            forbidden = movements_of_day.get(day - 1, 0)
+            chosen = None
+            for exercise_type in types:
+                valid = [candidate for candidate in candidates[exercise_type] if not candidate[2] & forbidden]
+                if valid:
+                    chosen = min(valid, key=lambda candidate: last_used.get(candidate[0], -1))
+                    break
+            if chosen is None:
+                raise exceptions.ValidationError('No exercise can be planned on day {} without repeating the movements of the day before.'.format(day + 1))
+            exercise_id, goal_type, movements = chosen
+            last_used[exercise_id] = number
+            movements_of_day[day] = movements
+            sessions.append((day, exercise_id, goal_type))
+        return sessions
+
+    @transaction.atomic
+    def create(self):
+        """
+        Plan the program and create its trainings with one statement, in the transaction
+        of their counters
+        """
+        trainings = [Training(founder=self.user, exercise_id=exercise_id, date=self.start + timedelta(days=day),
+                              done=False, performance_type=goal_type)
+                     for day, exercise_id, goal_type in self.schedule()]
+        trainings = Training.objects.bulk_create(trainings)
+        counts = Counter(training.exercise_id for training in trainings)
+        apply_trainings(self.user.pk, {exercise_id: (count, 0, None) for exercise_id, count in counts.items()}, 1)
+        return trainings
@@ -0,0 +1,100 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+class Echo:
+    """
+    File-like object which returns the written line instead of storing it,
+    so csv.writer can be used to produce a stream
+    """
+
+    def write(self, value):
+        return value
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer using orjson when it is installed. The datetimes and the types
+    orjson does not know (Decimal, lazy strings, ...) go through the DRF encoder,
+    so the output is the same as the stdlib one.
+    Pretty printed or non strict JSON is left to the stdlib renderer.
+    """
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact or not self.strict
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        # Same escaping as JSONRenderer so the output stays a strict javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+    JSON renderer selected with ?format=columnar, the views using it return
+    one array per field instead of one object per row
+    """
+    media_type = 'application/vnd.fitperf.columnar+json'
+    format = 'columnar'
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Render the data as MessagePack, the types MessagePack does not know
+    (datetimes, Decimal, lazy strings, ...) are converted as in JSON by the DRF encoder
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder_class = renderers.JSONRenderer.encoder_class
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self.encoder_class().default, use_bin_type=True)
+
+class CSVRenderer(renderers.BaseRenderer):
+    """
+    Render a dict or a list of dicts as CSV, the streamed exports write their rows
+    themselves and only use this renderer for the content negotiation and the errors
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        header = list(rows[0].keys()) if rows else []
+        writer = csv.writer(Echo())
+        lines = [writer.writerow(header)] + [writer.writerow([row.get(key) for key in header]) for row in rows]
+        return ''.join(lines).encode(self.charset)
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """
+    Render a dict or a list of dicts as newline-delimited JSON, one object per line
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows).encode(self.charset)
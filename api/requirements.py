@@ -0,0 +1,53 @@
+from django.db import connection
+from django.db.models import Q
+
+from .models import Equipment
+
+# Each equipment owns one bit of a bigint (Equipment.bit, 0 to 62). The equipments
+# without bit set the sign bit, which no user mask has, so their exercises are
+# never proposed by mistake.
+EQUIPMENT_BITS = 63
+
+UPDATE_SQL = """
+    UPDATE api_exercise exercise
+    SET required_equipment = COALESCE((
+        SELECT bit_or(1::bigint << COALESCE(equipment.bit, 63))
+        FROM api_movementsperexercise exercise_movement
+        INNER JOIN api_movement movement ON movement.id = exercise_movement.movement_id
+        INNER JOIN api_equipment equipment ON equipment.id = movement.equipment_id
+        WHERE exercise_movement.exercise_id = exercise.id
+    ), 0)
+    WHERE {exercise_filter}
+"""
+
+def free_equipment_bit():
+    """
+    Return the first bit no equipment owns, None if all of them are taken
+    """
+    taken = set(Equipment.objects.exclude(bit=None).values_list('bit', flat=True))
+    return next((bit for bit in range(EQUIPMENT_BITS) if bit not in taken), None)
+
+def equipment_mask(equipment_ids):
+    """
+    Return the bitset of a set of equipments, the no equipment one is always owned
+    """
+    mask = 0
+    equipments = Equipment.objects.filter(Q(pk__in=equipment_ids) | Q(name=Equipment.NONE)).exclude(bit=None)
+    for bit in equipments.values_list('bit', flat=True):
+        mask |= 1 << bit
+    return mask
+
+def update_required_equipment(exercise_ids=None, movement_id=None):
+    """
+    Recompute the equipments required by some exercises, or by the exercises
+    containing a movement, or by all the exercises, with one statement
+    """
+    if exercise_ids is not None:
+        exercise_filter, params = "exercise.id = ANY(%s)", [list(exercise_ids)]
+    elif movement_id is not None:
+        exercise_filter = "exercise.id IN (SELECT exercise_id FROM api_movementsperexercise WHERE movement_id = %s)"
+        params = [movement_id]
+    else:
+        exercise_filter, params = "TRUE", []
+    with connection.cursor() as cursor:
+        cursor.execute(UPDATE_SQL.format(exercise_filter=exercise_filter), params)
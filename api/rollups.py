@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Exercise, TrainingRollup
+
+UPSERT_SQL = """
+    INSERT INTO api_trainingrollup (founder_id, period, period_start, exercise_type, done_count, performance_sum)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (founder_id, period, period_start, exercise_type)
+    DO UPDATE SET done_count = api_trainingrollup.done_count + EXCLUDED.done_count,
+                  performance_sum = api_trainingrollup.performance_sum + EXCLUDED.performance_sum
+"""
+
+# A removal never inserts, the rollup may have been deleted with its founder
+REMOVE_SQL = """
+    UPDATE api_trainingrollup
+    SET done_count = done_count - 1, performance_sum = performance_sum - %s
+    WHERE founder_id = %s AND period = %s AND period_start = %s AND exercise_type = %s
+"""
+
+REBUILD_SQL = """
+    INSERT INTO api_trainingrollup (founder_id, period, period_start, exercise_type, done_count, performance_sum)
+    SELECT training.founder_id, %(period)s,
+           date_trunc(%(period)s, training.date AT TIME ZONE %(time_zone)s)::date,
+           exercise.exercise_type, COUNT(*), COALESCE(SUM(training.performance_value), 0)
+    FROM api_training training
+    INNER JOIN api_exercise exercise ON exercise.id = training.exercise_id
+    WHERE training.done {founder_filter}
+    GROUP BY 1, 2, 3, 4
+"""
+
+def period_starts(date):
+    """
+    Return the first day of the week (monday) and of the month of a training date
+    """
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    day = timezone.localdate(date)
+    return {
+        TrainingRollup.WEEK: day - timedelta(days=day.weekday()),
+        TrainingRollup.MONTH: day.replace(day=1),
+    }
+
+def apply_training(values, sign):
+    """
+    Add (sign=1) or remove (sign=-1) the contribution of a done training to its rollups
+    """
+    if not values['done']:
+        return
+    exercise_type = Exercise.objects.filter(pk=values['exercise_id']).values_list('exercise_type', flat=True).first()
+    if exercise_type is None:
+        return
+    performance_value = values['performance_value'] or 0
+    with connection.cursor() as cursor:
+        for period, period_start in period_starts(values['date']).items():
+            if sign > 0:
+                cursor.execute(UPSERT_SQL, [values['founder_id'], period, period_start, exercise_type,
+                                            1, performance_value])
+            else:
+                cursor.execute(REMOVE_SQL, [performance_value, values['founder_id'], period, period_start,
+                                            exercise_type])
+
+def update_rollups(training, previous, current):
+    """
+    Move the contribution of a training from its previous values to its current ones,
+    the rollups of the founder are rebuilt when one of them is unknown
+    """
+    if previous is None or current is None:
+        rebuild_rollups(founder_ids=[training.founder_id])
+        return
+    if previous == current:
+        return
+    apply_training(previous, -1)
+    apply_training(current, 1)
+
+@transaction.atomic
+def rebuild_rollups(founder_ids=None):
+    """
+    Recompute the rollups of some users (all by default) from the trainings
+    with one statement per period
+    """
+    rollups = TrainingRollup.objects.all()
+    founder_filter = ""
+    params = {'time_zone': settings.TIME_ZONE}
+    if founder_ids is not None:
+        rollups = rollups.filter(founder_id__in=founder_ids)
+        founder_filter = "AND training.founder_id = ANY(%(founder_ids)s)"
+        params['founder_ids'] = list(founder_ids)
+    rollups.delete()
+    with connection.cursor() as cursor:
+        for period, _ in TrainingRollup.PERIOD:
+            cursor.execute(REBUILD_SQL.format(founder_filter=founder_filter), dict(params, period=period))
+
+def rebuild_exercise_rollups(exercise):
+    """
+    Recompute the rollups of the users who trained on an exercise whose type has changed
+    """
+    founder_ids = exercise.training_set.filter(done=True).values_list('founder_id', flat=True).distinct()
+    rebuild_rollups(founder_ids=list(founder_ids))
@@ -0,0 +1,15 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+def search_exercises(exercises, text):
+    """
+    Filter exercises on a text, ranked from the best match:
+        -> fuzzy match on the name, with the trigram index of the name
+        -> full-text match on the description (in French), with the index of the search vector
+    The rank of an exercise is the best of its two scores.
+    """
+    query = SearchQuery(text, config='french')
+    return (exercises.filter(Q(name__trigram_similar=text) | Q(search_vector=query))
+            .annotate(rank=Greatest(TrigramSimilarity('name', text), SearchRank(F('search_vector'), query)))
+            .order_by('-rank', 'id'))
@@ -1,22 +1,76 @@
+from itertools import chain
 from django.db.models import Q
-from rest_framework import serializers, exceptions
+from rest_framework import serializers, exceptions, permissions
 from django.db import transaction
 from django.contrib.auth.models import User
-from .models import Equipment, Movement, MovementSettings, Exercise, MovementsPerExercise, MovementSettingsPerMovementsPerExercise, Training
+from .models import Equipment, Movement, MovementSettings, Exercise, MovementsPerExercise, MovementSettingsPerMovementsPerExercise, Training, TrainingRollup, UserStats
+from .sketches import percentiles
+from .rollups import rebuild_exercise_rollups
+from .totals import TOTAL_FIELDS, update_exercise_totals
+from .counters import COUNTER_FIELDS
+from .versions import claim_version
 
-class EquipmentSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Serializer mixin rendering only the fields listed in ?fields=id,name on reads.
+    setup_queryset() prepares the queryset of a view for these fields: only the
+    needed columns are loaded and the relations are only joined or prefetched
+    when their field is rendered.
+    """
+
+    # field -> (select_related lookups, prefetch_related lookups) needed to render it
+    related_fields = {}
+    # field -> model fields needed to render it, besides the field itself
+    required_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.requested_fields(self.context.get('request'))
+        if fields is not None:
+            unknown = fields - set(self.fields)
+            if unknown:
+                raise exceptions.ValidationError({'fields': 'Unknown fields: {}'.format(', '.join(sorted(unknown)))})
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+    @staticmethod
+    def requested_fields(request):
+        """
+        Return the set of fields asked, None if all the fields are rendered
+        """
+        if request is None or request.method not in permissions.SAFE_METHODS or 'fields' not in request.query_params:
+            return None
+        return {name.strip() for name in request.query_params['fields'].split(',') if name.strip()}
+
+    @classmethod
+    def setup_queryset(cls, queryset, request):
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return queryset
+        fields = cls.requested_fields(request)
+        names = set(cls.Meta.fields) if fields is None else fields
+        for name in names & set(cls.related_fields):
+            select, prefetch = cls.related_fields[name]
+            queryset = queryset.select_related(*select).prefetch_related(*prefetch)
+        if fields is not None:
+            concrete = {field.name for field in queryset.model._meta.concrete_fields}
+            required = chain.from_iterable(cls.required_fields.get(name, ()) for name in names)
+            queryset = queryset.only('id', *((names & concrete) | set(required)))
+        return queryset
+
+class EquipmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Equipment
         fields = ('id', 'name', 'founder')
 
-class MovementSettingsSerializer(serializers.ModelSerializer):
+class MovementSettingsSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     class Meta:
         model = MovementSettings
         fields = ('id', 'name', 'founder')
 
-class MovementSerializer(serializers.ModelSerializer):
+class MovementSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    related_fields = {'settings': ((), ('settings',))}
 
     class Meta:
         model = Movement
@@ -42,12 +96,15 @@ class MovementsPerExerciseSerializer(serializers.ModelSerializer):
         model = MovementsPerExercise
         fields = ('id', 'movement', 'movement_number', 'movement_settings')
 
-class ExerciseSerializer(serializers.ModelSerializer):
+class ExerciseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     movements = MovementsPerExerciseSerializer(source='exercise_with_movements', many=True, required=False)
+    related_fields = {'movements': ((), ('exercise_with_movements__movement_linked_to_exercise',))}
 
     class Meta:
         model = Exercise
-        fields = ('id', 'name', 'description', 'exercise_type', 'goal_type', 'goal_value', 'founder', 'is_default', 'movements')
+        fields = ('id', 'name', 'description', 'exercise_type', 'goal_type', 'goal_value', 'founder', 'is_default', 'movements', 'version') + TOTAL_FIELDS + COUNTER_FIELDS
+
+    UPDATED_FIELDS = ('name', 'description', 'exercise_type', 'goal_type', 'goal_value', 'founder', 'is_default')
 
     @transaction.atomic
     def create(self, validated_data):    
@@ -71,10 +128,14 @@ class ExerciseSerializer(serializers.ModelSerializer):
                 setting_associated = MovementSettingsPerMovementsPerExercise.objects.create(exercise_movement=mvt_associated,
                                                                                             setting=setting_obj,
                                                                                             setting_value=setting['setting_value'])
+        update_exercise_totals([exercise.pk])
+        exercise.refresh_from_db(fields=TOTAL_FIELDS)
         return exercise
 
     @transaction.atomic
     def update(self, instance, validated_data):
+        claim_version(instance, self.context.get('expected_version'))
+        exercise_type = instance.exercise_type
 
         instance.name = validated_data.get('name', instance.name)
         instance.description = validated_data.get('description', instance.description)
@@ -83,7 +144,12 @@ class ExerciseSerializer(serializers.ModelSerializer):
         instance.goal_value = validated_data.get('goal_value', instance.goal_value)
         instance.founder = validated_data.get('founder', instance.founder)
         instance.is_default = validated_data.get('is_default', instance.is_default)
-        instance.save()
+        # The counters and the required equipment are written by other statements since
+        # the instance was loaded, only the fields given are saved
+        fields = [field for field in self.UPDATED_FIELDS if field in validated_data]
+        instance.save(update_fields=fields + ['updated_at', 'version'])
+        if instance.exercise_type != exercise_type:
+            rebuild_exercise_rollups(instance)
         
         if "exercise_with_movements" in validated_data:
             movements_data = validated_data.pop("exercise_with_movements")
@@ -106,14 +172,35 @@ class ExerciseSerializer(serializers.ModelSerializer):
                         setting.setting = setting_data.get('setting', setting.setting)
                         setting.setting_value = setting_data.get('setting_value', setting.setting_value)
                         setting.save()
+        update_exercise_totals([instance.pk])
+        instance.refresh_from_db(fields=TOTAL_FIELDS)
         return instance
 
-class TrainingSerializer(serializers.ModelSerializer):
+class TrainingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     exercise = ExerciseSerializer()
+    percentile = serializers.SerializerMethodField()
+    related_fields = {'exercise': (('exercise',), ('exercise__exercise_with_movements__movement_linked_to_exercise',))}
+    required_fields = {'percentile': ('exercise', 'done', 'performance_type', 'performance_value')}
 
     class Meta:
         model = Training
-        fields = ('id', 'founder', 'date', 'performance_type', 'performance_value', 'done', 'exercise')
+        fields = ('id', 'founder', 'date', 'performance_type', 'performance_value', 'done', 'exercise', 'version', 'percentile')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The percentile is only rendered when it is asked with ?percentile=true
+        request = self.context.get('request')
+        if request is None or request.query_params.get('percentile') not in ('1', 'true'):
+            self.fields.pop('percentile', None)
+
+    def get_percentile(self, obj):
+        """
+        Return the share of the done trainings (in percent) on the same exercise
+        reaching at least this performance, e.g. 12 for "top 12%"
+        """
+        if not obj.done or obj.performance_value is None:
+            return None
+        return percentiles.top_percent(obj.exercise_id, obj.performance_type, obj.performance_value)
 
     def create(self, validated_data):
 
@@ -141,6 +228,7 @@ class TrainingSerializer(serializers.ModelSerializer):
         """
         The update is only possible on trainings fields and not on nested elements
         """
+        claim_version(instance, self.context.get('expected_version'))
         instance.date = validated_data.get('date', instance.date)
         instance.founder = validated_data.get('founder', instance.founder)
         instance.performance_type = validated_data.get('performance_type', instance.performance_type)
@@ -148,4 +236,81 @@ class TrainingSerializer(serializers.ModelSerializer):
         instance.done = validated_data.get('done', instance.done)
         instance.save()
 
-        return instance
\ No newline at end of file
+        return instance
+
+class TrainingRollupSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = TrainingRollup
+        fields = ('period', 'period_start', 'exercise_type', 'done_count', 'performance_sum')
+
+class UserStatsSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = UserStats
+        fields = COUNTER_FIELDS
+
+class BatchRequestSerializer(serializers.Serializer):
+    """
+    Used as a nested serializer by Batch Serializer
+    """
+    METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+    method = serializers.ChoiceField(choices=METHODS)
+    path = serializers.CharField(max_length=200)
+    body = serializers.JSONField(required=False)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict) and isinstance(data.get('method'), str):
+            data = dict(data, method=data['method'].upper())
+        return super().to_internal_value(data)
+
+class BatchSerializer(serializers.Serializer):
+    MAX_REQUESTS = 20
+
+    requests = BatchRequestSerializer(many=True)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        if not value:
+            raise exceptions.ValidationError('At least one request is required.')
+        if len(value) > self.MAX_REQUESTS:
+            raise exceptions.ValidationError('Ensure there are no more than {} requests.'.format(self.MAX_REQUESTS))
+        return value
+
+class ProgramSerializer(serializers.Serializer):
+    DEFAULT_EXERCISE_TYPES = (Exercise.STRENGTH, Exercise.AMRAP, Exercise.EMOM, Exercise.RUNNING)
+
+    weeks = serializers.IntegerField(min_value=1, max_value=52)
+    sessions_per_week = serializers.IntegerField(min_value=1, max_value=7)
+    exercise_types = serializers.ListField(child=serializers.ChoiceField(choices=Exercise.EXERCISE_TYPE),
+                                           default=DEFAULT_EXERCISE_TYPES)
+    equipment = serializers.ListField(child=serializers.IntegerField(), default=list)
+    start = serializers.DateTimeField(required=False)
+    seed = serializers.IntegerField(required=False)
+
+    def validate_exercise_types(self, value):
+        if not value:
+            raise exceptions.ValidationError('At least one exercise type is required.')
+        return value
+
+class TrainingBulkDeleteSerializer(serializers.Serializer):
+    MAX_IDS = 10000
+
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate_ids(self, value):
+        if len(value) > self.MAX_IDS:
+            raise exceptions.ValidationError('Ensure there are no more than {} ids.'.format(self.MAX_IDS))
+        return value
+
+    def validate(self, data):
+        # Without any criteria, all the trainings of the user would be deleted
+        if not data:
+            raise exceptions.ValidationError('The ids or a date range are required.')
+        if 'start' in data and 'end' in data and data['start'] > data['end']:
+            raise exceptions.ValidationError({'end': 'The end must not be before the start.'})
+        return data
@@ -0,0 +1,80 @@
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Equipment, Movement, MovementSettings, Exercise, MovementsPerExercise, MovementSettingsPerMovementsPerExercise, Training
+from .leaderboards import update_leaderboard
+from .sketches import record_percentile
+from .rollups import update_rollups
+from .sync import record_tombstone
+from .bootstrap import invalidate_catalog
+from .requirements import update_required_equipment, free_equipment_bit
+from .similarity import similarities
+from .counters import add_to_counters, update_counters, remove_from_counters
+
+@receiver(post_save, sender=Training)
+def training_saved(sender, instance, created, **kwargs):
+    current = instance.tracked_values()
+    if created:
+        # A new training did not count anywhere, like a training which is not done
+        previous = dict(current, done=False) if current is not None else None
+    else:
+        previous = getattr(instance, 'loaded_values', None)
+    update_leaderboard(instance, previous, current)
+    record_percentile(instance, previous, current)
+    update_rollups(instance, previous, current)
+    if created:
+        add_to_counters(instance, current)
+    else:
+        update_counters(instance, previous, current)
+    instance.loaded_values = current
+
+@receiver(post_delete, sender=Training)
+def training_deleted(sender, instance, **kwargs):
+    previous = getattr(instance, 'loaded_values', None) or instance.tracked_values()
+    current = dict(previous, done=False) if previous is not None else None
+    update_leaderboard(instance, previous, current)
+    record_percentile(instance, previous, current)
+    update_rollups(instance, previous, current)
+    remove_from_counters(instance, previous)
+
+@receiver(post_delete, sender=Training)
+@receiver(post_delete, sender=Exercise)
+@receiver(post_delete, sender=MovementsPerExercise)
+@receiver(post_delete, sender=MovementSettingsPerMovementsPerExercise)
+def synced_row_deleted(sender, instance, **kwargs):
+    record_tombstone(instance)
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_save, sender=Movement)
+@receiver(post_save, sender=MovementSettings)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_delete, sender=Movement)
+@receiver(post_delete, sender=MovementSettings)
+@receiver(m2m_changed, sender=Movement.settings.through)
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog()
+
+@receiver(pre_save, sender=Equipment)
+def equipment_saving(sender, instance, **kwargs):
+    if instance.bit is None:
+        instance.bit = free_equipment_bit()
+
+@receiver(post_save, sender=MovementsPerExercise)
+@receiver(post_delete, sender=MovementsPerExercise)
+def exercise_movement_changed(sender, instance, **kwargs):
+    update_required_equipment(exercise_ids=[instance.exercise_id])
+
+@receiver(post_save, sender=Movement)
+def movement_saved(sender, instance, created, **kwargs):
+    # The equipment of the movement may have changed
+    if not created:
+        update_required_equipment(movement_id=instance.pk)
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+@receiver(post_save, sender=MovementsPerExercise)
+@receiver(post_delete, sender=MovementsPerExercise)
+@receiver(post_save, sender=MovementSettingsPerMovementsPerExercise)
+@receiver(post_delete, sender=MovementSettingsPerMovementsPerExercise)
+def exercise_vector_changed(sender, instance, **kwargs):
+    similarities.invalidate_row(instance)
@@ -0,0 +1,207 @@
+import threading
+import time
+
+import numpy as np
+
+from .models import Exercise, MovementsPerExercise, MovementSettingsPerMovementsPerExercise
+
+class SimilarityIndex:
+    """
+    This class finds the exercises most similar to another one with NumPy.
+    Each exercise is a sparse vector over the movements: the weight of a movement is
+    1 + the sum of log(1 + value) of its settings (repetitions, distance, weight, ...),
+    so the repetitions, the meters and the kilos stay comparable, and the vector is
+    normalized so that a dot product is the cosine similarity.
+    The vectors are kept by movement (an inverted index), a query only reads the
+    columns of the movements of the exercise.
+    The changed exercises are reloaded on the next query and kept aside until
+    MAX_PENDING of them have to be merged in the index, which is rebuilt from
+    the database when it is older than MAX_AGE seconds (the other processes
+    do not see the changes of this one).
+    """
+
+    MAX_AGE = 3600
+    MAX_PENDING = 64
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.built_at = None
+        self.stale = set()
+        self.pending = {}
+        self.set_rows([], [], [], [], [])
+
+    @staticmethod
+    def load(exercise_ids=None):
+        """
+        Read the exercises (with two queries) as {id: (founder, is_default, movements, weights)},
+        the exercises without movement are left out
+        """
+        exercises = Exercise.objects.all()
+        exercise_movements = MovementsPerExercise.objects.all()
+        if exercise_ids is not None:
+            exercises = exercises.filter(pk__in=exercise_ids)
+            exercise_movements = exercise_movements.filter(exercise__in=exercise_ids)
+        meta = {pk: (founder, is_default) for pk, founder, is_default
+                in exercises.values_list('id', 'founder_id', 'is_default')}
+        rows = list(exercise_movements.values_list('id', 'exercise_id', 'movement_id',
+                                                   'movement_linked_to_exercise__setting_value'))
+        if not rows:
+            return {}
+
+        rows = np.array([row[:3] + (row[3] or 0,) for row in rows], dtype=np.int64)
+        # One weight per exercise and movement: 1 per exercise movement plus the settings
+        pairs, pair_index = np.unique(rows[:, 1:3], axis=0, return_inverse=True)
+        pair_index = pair_index.reshape(-1)
+        weights = np.bincount(pair_index, weights=np.log1p(np.maximum(rows[:, 3], 0)), minlength=len(pairs))
+        _, first = np.unique(rows[:, 0], return_index=True)
+        weights += np.bincount(pair_index[first], minlength=len(pairs))
+
+        vectors = {}
+        bounds = np.flatnonzero(np.diff(pairs[:, 0])) + 1
+        for movements, vector in zip(np.split(pairs, bounds), np.split(weights, bounds)):
+            exercise_id = int(movements[0, 0])
+            if exercise_id in meta:
+                vectors[exercise_id] = meta[exercise_id] + (movements[:, 1], vector / np.linalg.norm(vector))
+        return vectors
+
+    def set_rows(self, ids, founders, defaults, movements, weights):
+        """
+        Build the index from the rows of the exercises, rows by exercise and columns by movement
+        """
+        self.ids = np.array(ids, dtype=np.int64)
+        self.founders = np.array(founders, dtype=np.int64)
+        self.defaults = np.array(defaults, dtype=bool)
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.positions = {exercise_id: row for row, exercise_id in enumerate(ids)}
+        lengths = np.array([len(row) for row in movements], dtype=np.int64)
+        self.row_ptr = np.concatenate(([0], np.cumsum(lengths)))
+        self.row_movements = np.concatenate(movements) if movements else np.zeros(0, dtype=np.int64)
+        self.row_weights = np.concatenate(weights) if weights else np.zeros(0)
+
+        order = np.argsort(self.row_movements, kind='stable')
+        self.column_rows = np.repeat(np.arange(len(ids)), lengths)[order]
+        self.column_weights = self.row_weights[order]
+        self.column_movements, self.column_ptr = np.unique(self.row_movements[order], return_index=True)
+        self.column_ptr = np.append(self.column_ptr, len(order))
+
+    def build(self):
+        vectors = self.load()
+        self.set_rows(list(vectors), *zip(*vectors.values()) if vectors else ([], [], [], []))
+        self.built_at = time.monotonic()
+        self.stale.clear()
+        self.pending.clear()
+
+    def compact(self):
+        """
+        Merge the pending exercises in the index without reading the database
+        """
+        rows = np.flatnonzero(self.alive)
+        vectors = {int(self.ids[row]): (int(self.founders[row]), bool(self.defaults[row]),
+                                        self.row_movements[self.row_ptr[row]:self.row_ptr[row + 1]],
+                                        self.row_weights[self.row_ptr[row]:self.row_ptr[row + 1]])
+                   for row in rows}
+        vectors.update((exercise_id, vector) for exercise_id, vector in self.pending.items() if vector is not None)
+        self.set_rows(list(vectors), *zip(*vectors.values()) if vectors else ([], [], [], []))
+        self.pending.clear()
+
+    def invalidate(self, exercise_id):
+        """
+        Reload a changed or deleted exercise on the next query, nothing to do before the first one
+        """
+        if self.built_at is None:
+            return
+        with self.lock:
+            self.stale.add(exercise_id)
+
+    def invalidate_row(self, instance):
+        """
+        Reload the exercise of a changed or deleted exercise, exercise movement or exercise movement setting
+        """
+        if self.built_at is None:
+            return
+        if isinstance(instance, Exercise):
+            self.invalidate(instance.pk)
+        elif isinstance(instance, MovementsPerExercise):
+            self.invalidate(instance.exercise_id)
+        elif isinstance(instance, MovementSettingsPerMovementsPerExercise):
+            self.invalidate(instance.exercise_movement.exercise_id)
+
+    def refresh(self):
+        with self.lock:
+            if self.built_at is None or time.monotonic() - self.built_at > self.MAX_AGE:
+                self.build()
+                return
+            if not self.stale:
+                return
+            stale, self.stale = self.stale, set()
+            vectors = self.load(stale)
+            for exercise_id in stale:
+                row = self.positions.get(exercise_id)
+                if row is not None:
+                    self.alive[row] = False
+                self.pending[exercise_id] = vectors.get(exercise_id)
+            if len(self.pending) > self.MAX_PENDING:
+                self.compact()
+
+    def vector(self, exercise_id):
+        if exercise_id in self.pending:
+            vector = self.pending[exercise_id]
+            return None if vector is None else vector[2:]
+        row = self.positions.get(exercise_id)
+        if row is None or not self.alive[row]:
+            return None
+        return (self.row_movements[self.row_ptr[row]:self.row_ptr[row + 1]],
+                self.row_weights[self.row_ptr[row]:self.row_ptr[row + 1]])
+
+    def similar(self, exercise_id, user, k=10):
+        """
+        Return the k (exercise id, cosine similarity) the most similar to an exercise
+        among the exercises the user can see, the most similar first
+        """
+        self.refresh()
+        with self.lock:
+            vector = self.vector(exercise_id)
+            if vector is None:
+                return []
+            movements, weights = vector
+
+            # Dot products with the indexed exercises, column by column
+            columns = np.searchsorted(self.column_movements, movements)
+            found = (columns < len(self.column_movements)) & (self.column_movements[np.minimum(columns, len(self.column_movements) - 1)] == movements)
+            starts, ends = self.column_ptr[columns[found]], self.column_ptr[columns[found] + 1]
+            entries = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)] or [np.zeros(0, dtype=np.int64)])
+            factors = np.repeat(weights[found], ends - starts)
+            scores = np.bincount(self.column_rows[entries], weights=self.column_weights[entries] * factors,
+                                 minlength=len(self.ids))
+            visible = self.alive & (self.ids != exercise_id)
+            if not user.is_staff:
+                visible &= self.defaults | (self.founders == user.pk)
+            scores = np.where(visible, scores, 0)
+
+            candidates = []
+            if k < len(scores):
+                top = np.argpartition(-scores, k)[:k]
+            else:
+                top = np.arange(len(scores))
+            candidates.extend((int(self.ids[row]), float(scores[row])) for row in top if scores[row] > 0)
+
+            # The exercises changed since the last merge
+            for pending_id, pending in self.pending.items():
+                if pending is None or pending_id == exercise_id:
+                    continue
+                founder, is_default, pending_movements, pending_weights = pending
+                if not (user.is_staff or is_default or founder == user.pk):
+                    continue
+                _, mine, theirs = np.intersect1d(movements, pending_movements, return_indices=True)
+                score = float(np.dot(weights[mine], pending_weights[theirs]))
+                if score > 0:
+                    candidates.append((pending_id, score))
+
+        candidates.sort(key=lambda candidate: (-candidate[1], candidate[0]))
+        return [(candidate_id, round(score, 4)) for candidate_id, score in candidates[:k]]
+
+
+similarities = SimilarityIndex()
@@ -0,0 +1,268 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from django.db import connection, transaction
+
+from .models import Training
+
+class TDigest:
+    """
+    This class represents a merging t-digest, a mergeable sketch which estimates
+    the distribution of a stream of values with a bounded number of centroids.
+    New values are buffered and merged into the centroids by compress(), the
+    centroids are replaced at once so they can be read while values are added.
+    """
+
+    def __init__(self, compression=100, buffer_size=500):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.buffer = []
+        # (means, weights, centers, count, min, max)
+        self.centroids = ([], [], [], 0, float('inf'), float('-inf'))
+
+    def add(self, value, weight=1):
+        self.buffer.append((value, weight))
+        if len(self.buffer) >= self.buffer_size:
+            self.compress()
+
+    def merge(self, other):
+        self.buffer.extend(zip(other.centroids[0], other.centroids[1]))
+        self.buffer.extend(other.buffer)
+        self.compress()
+
+    def compress(self):
+        """
+        Merge the buffer into the centroids, a centroid can only grow up to a size
+        which is small near the tails of the distribution so the extremes stay accurate
+        """
+        means, weights, _, count, minimum, maximum = self.centroids
+        points = sorted(list(zip(means, weights)) + self.buffer)
+        self.buffer = []
+        if not points:
+            return
+        count = sum(weight for _, weight in points)
+        minimum = min(minimum, points[0][0])
+        maximum = max(maximum, points[-1][0])
+
+        means, weights, centers = [], [], []
+        cumulative = 0
+        mean, weight = points[0]
+        for next_mean, next_weight in points[1:]:
+            q = (cumulative + (weight + next_weight) / 2) / count
+            limit = 4 * count * q * (1 - q) / self.compression
+            if weight + next_weight <= max(limit, 1):
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                centers.append(cumulative + weight / 2)
+                cumulative += weight
+                mean, weight = next_mean, next_weight
+        means.append(mean)
+        weights.append(weight)
+        centers.append(cumulative + weight / 2)
+        self.centroids = (means, weights, centers, count, minimum, maximum)
+
+    @property
+    def count(self):
+        return self.centroids[3]
+
+    def cdf(self, value):
+        """
+        Return the estimated fraction of the values lower than the given value,
+        the values equal to it being counted for half.
+        The values still in the buffer are not counted.
+        """
+        means, weights, centers, count, minimum, maximum = self.centroids
+        if not count or value < minimum:
+            return 0.0
+        if value > maximum:
+            return 1.0
+
+        # The values are integers so ties are common, the centroids sharing the mean
+        # of the value are all counted for half
+        first, i = bisect_left(means, value), bisect_right(means, value)
+        if first < i:
+            below = centers[first] - weights[first] / 2
+            return (below + sum(weights[first:i]) / 2) / count
+        if i == 0:
+            left_mean, left_center = minimum, 0
+        else:
+            left_mean, left_center = means[i - 1], centers[i - 1]
+        if i == len(means):
+            right_mean, right_center = maximum, count
+        else:
+            right_mean, right_center = means[i], centers[i]
+
+        if right_mean == left_mean:
+            return left_center / count
+        ratio = (value - left_mean) / (right_mean - left_mean)
+        return (left_center + ratio * (right_center - left_center)) / count
+
+
+class PercentileService:
+    """
+    This class keeps in memory one t-digest per exercise and performance type,
+    built from the done trainings, so a percentile is read without any query.
+    A sketch can not forget a value: an updated training only adds its new value
+    and a deleted one stays counted until the sketch is rebuilt, which compacts it,
+    once it is older than MAX_AGE seconds. The builds run in a background thread,
+    a read never waits for one: without sketch yet, it has no percentile.
+    The trainings which become done are buffered, the buffer is merged into the
+    centroids when it is full or, on a read, when it has waited FLUSH_INTERVAL seconds.
+    """
+
+    MAX_AGE = 3600
+    FLUSH_INTERVAL = 10
+
+    def __init__(self, background=True):
+        # The test transactions are not visible from another thread, they build inline
+        self.background = background
+        self.sketches = {}
+        # The time of the first value waiting in the buffer of each sketch
+        self.pending = {}
+        # The values added to each sketch being rebuilt, added again to the new one
+        self.rebuilding = {}
+        self.lock = threading.Lock()
+
+    def build(self, exercise_id, performance_type):
+        digest = TDigest()
+        values = (Training.objects.filter(exercise_id=exercise_id,
+                                          performance_type=performance_type,
+                                          done=True,
+                                          performance_value__isnull=False)
+                  .values_list('performance_value', flat=True))
+        for value in values.iterator():
+            digest.add(value)
+        digest.compress()
+        return digest
+
+    def rebuild(self, exercise_id, performance_type):
+        """
+        Replace a sketch by a new one built from the database, the values added
+        while it was built are kept
+        """
+        key = (exercise_id, performance_type)
+        with self.lock:
+            self.rebuilding.setdefault(key, [])
+        try:
+            digest = self.build(exercise_id, performance_type)
+        finally:
+            with self.lock:
+                added = self.rebuilding.pop(key, [])
+        for value in added:
+            digest.add(value)
+        digest.compress()
+        with self.lock:
+            self.sketches[key] = (digest, time.monotonic())
+            self.pending.pop(key, None)
+
+    def schedule(self, key):
+        """
+        Rebuild a sketch in a background thread, unless it is already being rebuilt
+        """
+        if not self.background:
+            self.rebuild(*key)
+            return
+        with self.lock:
+            if key in self.rebuilding:
+                return
+            self.rebuilding[key] = []
+        threading.Thread(target=self.run_rebuild, args=key, daemon=True).start()
+
+    def run_rebuild(self, exercise_id, performance_type):
+        try:
+            self.rebuild(exercise_id, performance_type)
+        finally:
+            # The thread has its own connection
+            connection.close()
+
+    def get(self, exercise_id, performance_type):
+        """
+        Return the sketch in memory, None if it is not built yet. A missing or
+        old sketch is rebuilt, the old one being served meanwhile.
+        """
+        key = (exercise_id, performance_type)
+        sketch = self.sketches.get(key)
+        now = time.monotonic()
+        if sketch is None or now - sketch[1] > self.MAX_AGE:
+            self.schedule(key)
+            sketch = self.sketches.get(key, sketch)
+            if sketch is None:
+                return None
+        if now - self.pending.get(key, now) >= self.FLUSH_INTERVAL:
+            self.flush(key)
+        return sketch[0]
+
+    def add(self, exercise_id, performance_type, value):
+        """
+        Buffer a value if the sketch is already in memory, otherwise the value
+        will be read when the sketch is built
+        """
+        key = (exercise_id, performance_type)
+        with self.lock:
+            if key in self.rebuilding:
+                self.rebuilding[key].append(value)
+            sketch = self.sketches.get(key)
+            if sketch is not None:
+                sketch[0].add(value)
+                if sketch[0].buffer:
+                    self.pending.setdefault(key, time.monotonic())
+                else:
+                    self.pending.pop(key, None)
+
+    def flush(self, *keys):
+        """
+        Merge the buffers of some sketches (all by default) into their centroids
+        """
+        with self.lock:
+            for key in keys or list(self.pending):
+                sketch = self.sketches.get(key)
+                if sketch is not None:
+                    sketch[0].compress()
+                self.pending.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.sketches.clear()
+            self.pending.clear()
+
+    def top_percent(self, exercise_id, performance_type, value):
+        """
+        Return the share of the population (in percent) reaching at least this performance,
+        a time is better when it is lower, every other performance is better when higher.
+        Return None while the sketch is not built.
+        """
+        digest = self.get(exercise_id, performance_type)
+        if digest is None:
+            return None
+        cdf = digest.cdf(value)
+        fraction = cdf if performance_type == Training.TIME else 1 - cdf
+        return round(100 * fraction, 1)
+
+
+percentiles = PercentileService()
+
+def record_percentile(training, previous, current):
+    """
+    Apply a training write to the sketches once its transaction is committed
+    """
+    transaction.on_commit(lambda: apply_percentile(previous, current))
+
+def apply_percentile(previous, current):
+    """
+    Add the value of a training to its sketch when it becomes done with a value or
+    when its ranked value changes. The previous value stays counted until the sketch
+    is rebuilt, so a deletion changes nothing.
+    """
+    if current is None:
+        return
+    is_ranked = Training.performance_state(current)
+    if not is_ranked[0]:
+        return
+    if previous is not None and Training.performance_state(previous) == is_ranked \
+            and previous['exercise_id'] == current['exercise_id']:
+        return
+    percentiles.add(current['exercise_id'], *is_ranked[1:])
@@ -0,0 +1,124 @@
+import base64
+import binascii
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import exceptions
+
+from .models import Exercise, MovementsPerExercise, MovementSettingsPerMovementsPerExercise, Training, Tombstone
+
+# The rows are stamped when they are saved but only visible once their transaction
+# is committed, the feed goes back a little before the token to not miss them
+OVERLAP = timedelta(seconds=60)
+# Older tokens get a full sync, the tombstones are pruned after this delay
+RETENTION = timedelta(days=90)
+
+# key -> (model, fields, lookup of the exercise, object type of the tombstones)
+FEEDS = (
+    ('exercises', Exercise,
+     ('id', 'name', 'description', 'exercise_type', 'goal_type', 'goal_value', 'founder', 'is_default', 'version',
+      'updated_at'),
+     '', Tombstone.EXERCISE),
+    ('exercise_movements', MovementsPerExercise,
+     ('id', 'exercise', 'movement', 'movement_number', 'updated_at'),
+     'exercise__', Tombstone.EXERCISE_MOVEMENT),
+    ('exercise_movement_settings', MovementSettingsPerMovementsPerExercise,
+     ('id', 'exercise_movement', 'setting', 'setting_value', 'updated_at'),
+     'exercise_movement__exercise__', Tombstone.EXERCISE_MOVEMENT_SETTING),
+    ('trainings', Training,
+     ('id', 'founder', 'exercise', 'date', 'performance_type', 'performance_value', 'done', 'version', 'updated_at'),
+     None, Tombstone.TRAINING),
+)
+
+def encode_token(moment):
+    """
+    Return the opaque token of a moment: the microseconds since epoch in base64
+    """
+    microseconds = (moment - datetime(1970, 1, 1, tzinfo=timezone.utc)) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(str(microseconds).encode()).decode().rstrip('=')
+
+def decode_token(token):
+    """
+    Return the moment of a token, raise a 400 error if it is not a token
+    """
+    try:
+        microseconds = int(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode())
+        return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=microseconds)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError):
+        raise exceptions.ValidationError({'since': 'A valid sync token is required.'})
+
+class ChangesFeed:
+    """
+    This class returns the exercises (with their movements and settings) and the
+    trainings a user can see which have changed since a token, with the ids of
+    the ones deleted since then. Each model is read with one query on its
+    updated_at index, the tombstones with one query on their deleted_at index.
+    """
+
+    def __init__(self, user, since=None):
+        self.user = user
+        self.since = since
+
+    def exercises_filter(self, lookup):
+        if self.user.is_staff:
+            return Q()
+        return Q(**{lookup + 'is_default': True}) | Q(**{lookup + 'founder': self.user})
+
+    def changed(self, model, fields, lookup, cutoff):
+        rows = model.objects.all()
+        if lookup is not None:
+            rows = rows.filter(self.exercises_filter(lookup))
+        elif not self.user.is_staff:
+            rows = rows.filter(founder=self.user)
+        if cutoff is not None:
+            rows = rows.filter(updated_at__gte=cutoff)
+        return [dict(zip(fields, row)) for row in rows.order_by('id').values_list(*fields)]
+
+    def deleted(self, cutoff):
+        deleted = {key: [] for key, _, _, _, _ in FEEDS}
+        if cutoff is None:
+            return deleted
+        tombstones = Tombstone.objects.filter(deleted_at__gte=cutoff)
+        if not self.user.is_staff:
+            tombstones = tombstones.filter(Q(owner_id=self.user.pk) | Q(is_default=True))
+        keys = {object_type: key for key, _, _, _, object_type in FEEDS}
+        for object_type, object_id in tombstones.order_by('id').values_list('object_type', 'object_id'):
+            deleted[keys[object_type]].append(object_id)
+        return deleted
+
+    def compute(self):
+        now = timezone.now()
+        full = self.since is None or self.since < now - RETENTION
+        cutoff = None if full else self.since - OVERLAP
+        changes = {key: self.changed(model, fields, lookup, cutoff) for key, model, fields, lookup, _ in FEEDS}
+        return dict(changes, token=encode_token(now), full=full, deleted=self.deleted(cutoff))
+
+def record_tombstone(instance):
+    """
+    Keep the id of a deleted exercise, exercise movement, exercise movement setting or training
+    """
+    if isinstance(instance, Training):
+        Tombstone.objects.create(object_type=Tombstone.TRAINING, object_id=instance.pk,
+                                 owner_id=instance.founder_id)
+        return
+    if isinstance(instance, Exercise):
+        object_type, exercise = Tombstone.EXERCISE, {'founder_id': instance.founder_id,
+                                                     'is_default': instance.is_default}
+    else:
+        # The exercise is still there, the cascades delete the nested rows first
+        if isinstance(instance, MovementsPerExercise):
+            object_type, exercises = Tombstone.EXERCISE_MOVEMENT, Exercise.objects.filter(pk=instance.exercise_id)
+        else:
+            object_type = Tombstone.EXERCISE_MOVEMENT_SETTING
+            exercises = Exercise.objects.filter(exercise_with_movements=instance.exercise_movement_id)
+        exercise = exercises.values('founder_id', 'is_default').first() or {'founder_id': None, 'is_default': False}
+    Tombstone.objects.create(object_type=object_type, object_id=instance.pk,
+                             owner_id=exercise['founder_id'], is_default=exercise['is_default'])
+
+def prune_tombstones():
+    """
+    Delete the tombstones older than the retention, return how many were deleted
+    """
+    count, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - RETENTION).delete()
+    return count
@@ -0,0 +1,20 @@
+#! /usr/bin/env python3
+# coding: utf-8
+from contextlib import contextmanager
+from django.db import connection
+
+@contextmanager
+def run_on_commit():
+    """
+    The transaction of a test is never committed, so the on_commit callbacks registered
+    in this block are run at its end, as if its writes had been committed.
+    The callbacks of a rolled back savepoint have already been dropped by Django.
+    """
+    start = len(connection.run_on_commit)
+    try:
+        yield
+    finally:
+        callbacks = connection.run_on_commit[start:]
+        del connection.run_on_commit[start:]
+        for _, callback in callbacks:
+            callback()
@@ -0,0 +1,129 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise, Training
+from .helper_dbtestdata import TestDatabase
+
+class BatchTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    BatchView. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Run a batch
+        -> With non admin account:
+            SUCCESS:
+                -> Run reads and writes as the request user
+                -> Keep the writes before a failure without atomic
+                -> Roll back all the writes of an atomic batch which fails
+            FAIL:
+                -> Run a batch with a path out of the API or a streamed response
+                -> Run a batch with too many requests
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.url = reverse('batch')
+        self.exercise = {
+            'name': "fran",
+            'description': "hard workout based on 21-15-9 sequence",
+            'exercise_type': "FORTIME",
+            'goal_type': "round",
+            'goal_value': 3,
+            'founder': User.objects.get(username='new_user').pk,
+            'movements': []
+        }
+
+    def test_not_connected_run_batch(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        response = self.client.post(self.url, {'requests': [{'method': 'GET', 'path': 'exercises/'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_run_batch(self):
+        """
+        Test if the requests are run in order as the request user, the paths
+        being relative to the API root or absolute
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        o_chelsea = Exercise.objects.get(name="chelsea", founder__username='ordinary_user')
+        data = {'requests': [
+            {'method': 'get', 'path': 'exercises/{}/?fields=id,name'.format(connie.pk)},
+            {'method': 'GET', 'path': '/api/v1/exercises/{}/'.format(o_chelsea.pk)},
+            {'method': 'POST', 'path': 'exercises/', 'body': self.exercise},
+            {'method': 'PATCH', 'path': 'exercises/{}/'.format(connie.pk), 'body': {'goal_value': 6}},
+            {'method': 'GET', 'path': 'trainings/'},
+        ]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([sub_response['status'] for sub_response in response.data], [200, 403, 201, 200, 200])
+        self.assertEqual(response.data[0]['body'], {'id': connie.pk, 'name': 'connie'})
+        self.assertTrue(Exercise.objects.filter(pk=response.data[2]['body']['id'], founder__username='new_user').exists())
+        self.assertEqual(Exercise.objects.get(pk=connie.pk).goal_value, 6)
+        self.assertEqual(len(response.data[4]['body']), Training.objects.filter(founder__username='new_user').count())
+
+    def test_non_admin_run_batch_with_failure(self):
+        """
+        Test if, without atomic, the writes before and after a failed request are kept
+        """
+        self.client.login(username='new_user', password='new_password')
+        initial_exercises = Exercise.objects.count()
+        data = {'requests': [
+            {'method': 'POST', 'path': 'exercises/', 'body': self.exercise},
+            {'method': 'POST', 'path': 'exercises/', 'body': dict(self.exercise, exercise_type='YOGA')},
+            {'method': 'POST', 'path': 'exercises/', 'body': self.exercise},
+        ]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([sub_response['status'] for sub_response in response.data], [201, 400, 201])
+        self.assertEqual(Exercise.objects.count(), initial_exercises + 2)
+
+    def test_non_admin_run_atomic_batch_with_failure(self):
+        """
+        Test if an atomic batch is rolled back and stopped at the first failed request
+        """
+        self.client.login(username='new_user', password='new_password')
+        initial_exercises = Exercise.objects.count()
+        data = {'atomic': True, 'requests': [
+            {'method': 'POST', 'path': 'exercises/', 'body': self.exercise},
+            {'method': 'POST', 'path': 'exercises/', 'body': dict(self.exercise, exercise_type='YOGA')},
+            {'method': 'POST', 'path': 'exercises/', 'body': self.exercise},
+        ]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([sub_response['status'] for sub_response in response.data], [201, 400])
+        self.assertEqual(Exercise.objects.count(), initial_exercises)
+
+    def test_non_admin_run_batch_out_of_api(self):
+        """
+        Test if the API returns a 400 status, without running anything, for a path
+        which is not a route of the API, a batch in the batch or a streamed export
+        """
+        self.client.login(username='new_user', password='new_password')
+        initial_exercises = Exercise.objects.count()
+        for path in ('admin/', '../../admin/', 'unknown/', 'batch/', 'rest-auth/user/', 'trainings/export/?format=csv'):
+            data = {'requests': [
+                {'method': 'POST', 'path': 'exercises/', 'body': self.exercise},
+                {'method': 'GET', 'path': path},
+            ]}
+            response = self.client.post(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Exercise.objects.count(), initial_exercises)
+
+    def test_non_admin_run_too_many_requests(self):
+        """
+        Test if the API returns a 400 status for more than 20 requests
+        """
+        self.client.login(username='new_user', password='new_password')
+        data = {'requests': [{'method': 'GET', 'path': 'exercises/'}] * 21}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,126 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+from django.contrib.auth.models import User
+from ..models import Equipment, Movement, Exercise, Training
+from .helper_dbtestdata import TestDatabase
+from .helper_oncommit import run_on_commit
+
+class BootstrapTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    BootstrapView. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Get the bootstrap
+        -> With non admin account:
+            SUCCESS:
+                -> Get the catalog, the visible exercises and the last trainings
+                -> Get the catalog from the cache until a change is committed
+                -> Limit the number of trainings
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        # The catalog is kept in the cache and must not leak between tests
+        cache.clear()
+
+    def test_not_connected_get_bootstrap(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        response = self.client.get(reverse('bootstrap'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_get_bootstrap(self):
+        """
+        Test if the API returns the whole catalog, the default and own exercises
+        and the trainings of the request user, the last one first
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(reverse('bootstrap'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        catalog = response.data['catalog']
+        self.assertEqual(len(catalog['equipments']), Equipment.objects.count())
+        self.assertEqual([movement['name'] for movement in catalog['movements']],
+                         list(Movement.objects.order_by('id').values_list('name', flat=True)))
+        self.assertEqual(len(catalog['movement_settings']), 4)
+        self.assertEqual(sorted((exercise['name'], exercise['is_default']) for exercise in response.data['exercises']),
+                         [('chelsea', True), ('connie', False)])
+        trainings = Training.objects.filter(founder__username='new_user').order_by('-date')
+        self.assertEqual([training['id'] for training in response.data['trainings']],
+                         [training.pk for training in trainings])
+
+    def test_non_admin_get_cached_catalog(self):
+        """
+        Test if the catalog is not queried again until the creation of a movement is committed
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.client.get(reverse('bootstrap'), format='json')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('bootstrap'), format='json')
+        self.assertFalse([query for query in queries if 'api_equipment' in query['sql']])
+
+        with run_on_commit():
+            Movement.objects.create(name="burpee", founder=User.objects.get(username='admin_user'),
+                                    equipment=Equipment.objects.get(name="aucun"))
+            response = self.client.get(reverse('bootstrap'), format='json')
+            self.assertNotIn('burpee', [movement['name'] for movement in response.data['catalog']['movements']])
+        response = self.client.get(reverse('bootstrap'), format='json')
+        self.assertIn('burpee', [movement['name'] for movement in response.data['catalog']['movements']])
+
+    def test_non_admin_get_limited_trainings(self):
+        """
+        Test if the number of trainings can be limited
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(reverse('bootstrap'), {'trainings': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['trainings']), 1)
+        self.assertEqual(response.data['trainings'][0]['date'], '2018-05-02T00:00:00Z')
+
+class BootstrapConcurrentTest(APITransactionTestCase):
+    """
+    This class will test BootstrapView outside of a transaction, where the parts
+    are queried concurrently by worker threads. What will be tested:
+        -> With non admin account:
+            SUCCESS:
+                -> Get the same bootstrap as with the parts queried in the request thread
+                -> Query only the exercises in the request thread
+    """
+
+    def setUp(self):
+        TestDatabase.create()
+        cache.clear()
+
+    def test_non_admin_get_bootstrap_concurrently(self):
+        """
+        Test if the parts queried by the worker threads see the committed data
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(reverse('bootstrap'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['catalog']['movements']), Movement.objects.count())
+        self.assertEqual(len(response.data['exercises']), 2)
+        self.assertEqual(len(response.data['trainings']), 3)
+
+    def test_non_admin_get_bootstrap_parts_in_workers(self):
+        """
+        Test if the trainings and the catalog are not queried on the connection of the request
+        """
+        self.client.login(username='new_user', password='new_password')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('bootstrap'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue([query for query in queries if 'api_exercise' in query['sql']])
+        self.assertFalse([query for query in queries if 'FROM "api_training"' in query['sql']
+                          or 'api_equipment' in query['sql']])
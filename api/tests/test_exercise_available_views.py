@@ -0,0 +1,118 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Equipment, Exercise, Movement, MovementsPerExercise
+from .helper_dbtestdata import TestDatabase
+
+class ExerciseAvailableTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    ExerciseAvailable view. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Get the available exercises
+        -> With non admin account:
+            SUCCESS:
+                -> Get the visible exercises whose equipments are all owned
+                -> The movements without equipment need no equipment
+                -> The equipments required follow the movements of the exercises
+                -> The equipments required follow the equipment of the movements
+            FAIL:
+                -> Get the available exercises with invalid equipments
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.equipments = {equipment.name: equipment.pk for equipment in Equipment.objects.all()}
+
+    def available(self, *names):
+        equipments = ','.join(str(self.equipments[name]) for name in names)
+        response = self.client.get(reverse('exercises_available'), {'equipment': equipments}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(exercise['name'] for exercise in response.data)
+
+    def test_not_connected_get_available_exercises(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        response = self.client.get(reverse('exercises_available'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_get_available_exercises(self):
+        """
+        Test if only the exercises whose movements are all done with the equipments
+        of the user are returned
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.assertEqual(self.available(), [])
+        self.assertEqual(self.available('barre de traction', 'balle'), ['connie'])
+        self.assertEqual(self.available('barre de traction', 'kettlebell'), ['chelsea'])
+        self.assertEqual(self.available('barre de traction', 'aucun', 'kettlebell'), ['chelsea'])
+        self.assertEqual(self.available(*self.equipments), ['chelsea', 'connie'])
+
+    def test_non_admin_get_available_exercises_without_equipment(self):
+        """
+        Test if an exercise whose movements are done without equipment is available
+        to a user who lists no equipment
+        """
+        self.client.login(username='new_user', password='new_password')
+        new_user = User.objects.get(username='new_user')
+        pushups = Exercise.objects.create(name="pushups",
+                                          exercise_type=Exercise.AMRAP,
+                                          goal_type=Exercise.ROUND,
+                                          goal_value=5,
+                                          founder=new_user)
+        MovementsPerExercise.objects.create(exercise=pushups,
+                                            movement=Movement.objects.get(name="pushup"),
+                                            movement_number=1)
+        self.assertEqual(self.available(), ['pushups'])
+        self.assertEqual(self.available('barre de traction', 'kettlebell'), ['chelsea', 'pushups'])
+
+    def test_non_admin_required_equipments_follow_movements(self):
+        """
+        Test if the equipments required are updated when a movement is added or removed
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        squat = MovementsPerExercise.objects.create(exercise=connie,
+                                                    movement=Movement.objects.get(name="squat"),
+                                                    movement_number=3)
+        self.assertEqual(self.available('barre de traction', 'balle'), [])
+        self.assertEqual(self.available('barre de traction', 'balle', 'kettlebell'), ['chelsea', 'connie'])
+        squat.delete()
+        self.assertEqual(self.available('barre de traction', 'balle'), ['connie'])
+
+        url = reverse('exercise_clone', kwargs={'pk': connie.pk})
+        self.client.post(url, {'name': 'connie copy'}, format='json')
+        self.assertEqual(self.available('barre de traction', 'balle'), ['connie', 'connie copy'])
+
+    def test_non_admin_required_equipments_follow_movement_equipment(self):
+        """
+        Test if the equipments required are updated when the equipment of a movement changes
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.assertEqual(self.available('barre de traction'), [])
+
+        self.client.login(username='admin_user', password='admin_password')
+        wallball = Movement.objects.get(name="wallball")
+        url = reverse('movement_detail', kwargs={'pk': wallball.pk})
+        response = self.client.patch(url, {'equipment': self.equipments['aucun']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.login(username='new_user', password='new_password')
+        self.assertEqual(self.available('barre de traction'), ['connie'])
+
+    def test_non_admin_get_available_exercises_with_invalid_equipments(self):
+        """
+        Test if the API returns a 400 status for equipments which are not ids
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(reverse('exercises_available'), {'equipment': '1,balle'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
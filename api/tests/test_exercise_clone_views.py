@@ -0,0 +1,140 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Exercise
+from .helper_dbtestdata import TestDatabase
+
+class ExerciseCloneTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    ExerciseClone view. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Clone an exercise
+        -> With non admin account:
+            SUCCESS:
+                -> Clone a default exercise with its movements and settings
+                -> Clone its own exercise with another name
+                -> Clone its own exercise twice without name, the copies are numbered
+                -> Clone an exercise whose settings are not in the order of the movements
+            FAIL:
+                -> Clone the exercise of another user
+                -> Clone an exercise with the name of another exercise of the user
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    @staticmethod
+    def tree(exercise):
+        return [(movement.movement_id, movement.movement_number,
+                 [(setting.setting_id, setting.setting_value)
+                  for setting in movement.movement_linked_to_exercise.order_by('id')])
+                for movement in exercise.exercise_with_movements.order_by('id')]
+
+    def test_not_connected_clone_exercise(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        url = reverse('exercise_clone', kwargs={'pk': a_chelsea.pk})
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_clone_default_exercise(self):
+        """
+        Test if the copy of a default exercise belongs to the request user, is not default
+        and has the same movements and settings, with one query for the exercise
+        and one for its movements and settings
+        """
+        self.client.login(username='new_user', password='new_password')
+        a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        url = reverse('exercise_clone', kwargs={'pk': a_chelsea.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len([query for query in queries if 'INSERT INTO' in query['sql']]), 2)
+
+        clone = Exercise.objects.get(pk=response.data['id'])
+        self.assertEqual(clone.founder.username, 'new_user')
+        self.assertFalse(clone.is_default)
+        self.assertEqual((clone.name, clone.exercise_type, clone.goal_type, clone.goal_value),
+                         (a_chelsea.name, a_chelsea.exercise_type, a_chelsea.goal_type, a_chelsea.goal_value))
+        self.assertEqual(self.tree(clone), self.tree(a_chelsea))
+        self.assertEqual(len(self.tree(clone)), 3)
+
+    def test_non_admin_clone_own_exercise_with_name(self):
+        """
+        Test if the copy takes the name given
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        url = reverse('exercise_clone', kwargs={'pk': connie.pk})
+        response = self.client.post(url, {'name': 'connie heavy'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        clone = Exercise.objects.get(pk=response.data['id'])
+        self.assertEqual(clone.name, 'connie heavy')
+        self.assertEqual(self.tree(clone), self.tree(connie))
+
+    def test_non_admin_clone_own_exercise_without_name(self):
+        """
+        Test if the copies of its own exercise get numbered names, so a training still
+        finds one exercise by its name and founder
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        url = reverse('exercise_clone', kwargs={'pk': connie.pk})
+        names = [Exercise.objects.get(pk=self.client.post(url, format='json').data['id']).name for _ in range(2)]
+        self.assertEqual(names, ['connie (2)', 'connie (3)'])
+
+        a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        response = self.client.post(reverse('exercise_clone', kwargs={'pk': a_chelsea.pk}), format='json')
+        self.assertEqual(Exercise.objects.get(pk=response.data['id']).name, 'chelsea')
+
+    def test_non_admin_clone_exercise_with_shuffled_settings(self):
+        """
+        Test if each setting is copied on the copy of its own movement when the settings
+        were not created in the order of the movements
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        movements = list(connie.exercise_with_movements.order_by('-id'))
+        for number, movement in enumerate(movements):
+            for setting in list(movement.movement_linked_to_exercise.all()):
+                setting.delete()
+                setting.pk = None
+                setting.setting_value = 100 * movement.movement_number + number
+                setting.save()
+        url = reverse('exercise_clone', kwargs={'pk': connie.pk})
+        response = self.client.post(url, {'name': 'connie shuffled'}, format='json')
+        self.assertEqual(self.tree(Exercise.objects.get(pk=response.data['id'])), self.tree(connie))
+
+    def test_non_admin_clone_exercise_with_existing_name(self):
+        """
+        Test if the API returns a 400 status when the name given is the name of another exercise of the user
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        url = reverse('exercise_clone', kwargs={'pk': connie.pk})
+        initial_exercises = Exercise.objects.count()
+        response = self.client.post(url, {'name': 'connie'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Exercise.objects.count(), initial_exercises)
+
+    def test_non_admin_clone_exercise_of_other_user(self):
+        """
+        Test if the API returns a 404 status for an exercise the user cannot see
+        """
+        self.client.login(username='new_user', password='new_password')
+        o_chelsea = Exercise.objects.get(name="chelsea", founder__username='ordinary_user')
+        url = reverse('exercise_clone', kwargs={'pk': o_chelsea.pk})
+        initial_exercises = Exercise.objects.count()
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Exercise.objects.count(), initial_exercises)
@@ -0,0 +1,96 @@
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIRequestFactory
+from rest_framework.request import Request
+from django.contrib.auth.models import User
+from ..models import Equipment, Exercise, Movement, MovementsPerExercise
+from ..filters import ExerciseFilterBackend
+from .helper_dbtestdata import TestDatabase
+
+class ExerciseFiltersTest(APITestCase):
+    """
+    This class will test the filters of ExerciseList. What will be tested:
+        -> With non admin account:
+            SUCCESS:
+                -> Filter the visible exercises by exercise type, goal type and default
+                -> Filter the exercises containing one or several movements
+                -> Filter the exercises by equipment without duplicates
+                -> Filter the movements and equipments with semi-joins
+            FAIL:
+                -> Filter with invalid values
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper, the default chelsea
+        gets a second movement with a kettlebell
+        """
+        TestDatabase.create()
+        swing = Movement.objects.create(name="swing",
+                                        founder=User.objects.get(username='admin_user'),
+                                        equipment=Equipment.objects.get(name="kettlebell"))
+        MovementsPerExercise.objects.create(exercise=Exercise.objects.get(name="chelsea", is_default=True),
+                                            movement=swing,
+                                            movement_number=4)
+
+    def filter_exercises(self, **params):
+        response = self.client.get(reverse('exercises_list'), params, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted((exercise['name'], exercise['is_default']) for exercise in response.data)
+
+    def test_non_admin_filter_exercises_by_fields(self):
+        """
+        Test if the exercise type, goal type and is_default filters keep the visibility rules
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.assertEqual(self.filter_exercises(exercise_type=Exercise.EMOM), [('chelsea', True)])
+        self.assertEqual(self.filter_exercises(goal_type=Exercise.ROUND), [('connie', False)])
+        self.assertEqual(self.filter_exercises(is_default='false'), [('connie', False)])
+        self.assertEqual(self.filter_exercises(exercise_type=Exercise.EMOM, is_default='false'), [])
+
+    def test_non_admin_filter_exercises_by_movements(self):
+        """
+        Test if the exercises returned contain all the movements asked
+        """
+        self.client.login(username='new_user', password='new_password')
+        pullup = Movement.objects.get(name="pullup")
+        wallball = Movement.objects.get(name="wallball")
+        self.assertEqual(self.filter_exercises(movement=pullup.pk), [('chelsea', True), ('connie', False)])
+        self.assertEqual(self.filter_exercises(movement=[pullup.pk, wallball.pk]), [('connie', False)])
+
+    def test_non_admin_filter_exercises_by_equipment(self):
+        """
+        Test if an exercise with two movements on the equipment asked is returned once
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        kettlebell = Equipment.objects.get(name="kettlebell")
+        ball = Equipment.objects.get(name="balle")
+        self.assertEqual(self.filter_exercises(equipment=kettlebell.pk), [('chelsea', False), ('chelsea', True)])
+        self.assertEqual(self.filter_exercises(equipment=ball.pk), [])
+
+    def test_non_admin_filter_exercises_with_semi_joins(self):
+        """
+        Test if the movement and equipment filters are planned as semi-joins
+        and not as joins or subplans run for each exercise
+        """
+        request = Request(APIRequestFactory().get('/', {'movement': 1, 'equipment': 1}))
+        exercises = ExerciseFilterBackend().filter_queryset(request, Exercise.objects.all(), None)
+        sql, params = exercises.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + sql, params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertEqual(plan.count('Semi Join'), 2)
+        self.assertNotIn('SubPlan', plan)
+
+    def test_non_admin_filter_exercises_with_invalid_values(self):
+        """
+        Test if the API returns a 400 status for invalid filter values
+        """
+        self.client.login(username='new_user', password='new_password')
+        url = reverse('exercises_list')
+        for params in ({'exercise_type': 'YOGA'}, {'goal_type': 'weight'}, {'is_default': 'maybe'},
+                       {'movement': 'pullup'}, {'equipment': '1.5'}):
+            response = self.client.get(url, params, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+import numpy as np
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..analytics import downsample_lttb
+from ..models import Exercise, Training
+from .helper_dbtestdata import TestDatabase
+
+class ExerciseProgressionTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    ExerciseProgression view. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Get the progression on an exercise
+        -> LTTB:
+            SUCCESS:
+                -> Keep the first and last points and the peaks
+        -> With non admin account:
+            SUCCESS:
+                -> Get all the points when there are less than asked
+                -> Get the number of points asked when there are more
+            FAIL:
+                -> Get the progression on an exercise which is not visible
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.connie = Exercise.objects.get(name='connie')
+        self.url = reverse('exercise_progression', kwargs={'pk': self.connie.pk})
+
+    def test_not_connected_get_progression(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_lttb_keeps_peaks(self):
+        """
+        Test if the downsampling keeps the ends of the series and its peaks
+        """
+        x = np.arange(100, dtype=np.float64)
+        y = np.zeros(100)
+        y[37], y[71] = 50, -50
+        kept = downsample_lttb(x, y, 10)
+        self.assertEqual(len(kept), 10)
+        self.assertEqual(kept[0], 0)
+        self.assertEqual(kept[-1], 99)
+        self.assertIn(37, kept)
+        self.assertIn(71, kept)
+        self.assertTrue(np.all(np.diff(kept) > 0))
+
+    def test_non_admin_get_whole_progression(self):
+        """
+        Test if the API returns every done training when there are less points than asked
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'exercise': self.connie.pk,
+            'performance_type': Training.TIME,
+            'count': 2,
+            'date': ['2018-04-05T00:00:00Z', '2018-05-02T00:00:00Z'],
+            'performance_value': [230, 330],
+        })
+
+    def test_non_admin_get_downsampled_progression(self):
+        """
+        Test if the API returns the number of points asked, in date order
+        """
+        new_user = User.objects.get(username='new_user')
+        start = datetime(2018, 6, 1)
+        Training.objects.bulk_create([
+            Training(exercise=self.connie, founder=new_user, date=start + timedelta(days=day),
+                     performance_type=Training.TIME, performance_value=300 - day, done=True)
+            for day in range(50)
+        ])
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(self.url, {'points': 10}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 52)
+        self.assertEqual(len(response.data['date']), 10)
+        self.assertEqual(response.data['date'][0], '2018-04-05T00:00:00Z')
+        self.assertEqual(response.data['date'][-1], '2018-07-20T00:00:00Z')
+        self.assertEqual(response.data['date'], sorted(response.data['date']))
+
+    def test_non_admin_get_progression_of_non_visible_exercise(self):
+        """
+        Test if the API returns a 404 status for an exercise of another user
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,112 @@
+from django.db import connection
+from django.db.models import F
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise
+from ..search import search_exercises
+from .helper_dbtestdata import TestDatabase
+
+class ExerciseSearchTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    ExerciseSearch view. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Search the exercises
+        -> With non admin account:
+            SUCCESS:
+                -> Search the visible exercises with a misspelled name
+                -> Search the exercises on the words of their description in French
+                -> Keep the search vector up to date on each write
+                -> Compute the search vector only on the writes of the description
+                -> Search with the trigram and full-text indexes
+            FAIL:
+                -> Search without text
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+        new_user = User.objects.get(username='new_user')
+        Exercise.objects.create(name="murph",
+                                exercise_type=Exercise.FORTIME,
+                                description="Course, tractions, pompes et squats avec un gilet lesté",
+                                goal_type=Exercise.TIME,
+                                founder=new_user)
+
+    def search(self, **params):
+        response = self.client.get(reverse('exercises_search'), params, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(exercise['name'], exercise['founder']) for exercise in response.data]
+
+    def test_not_connected_search_exercises(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        response = self.client.get(reverse('exercises_search'), {'q': 'chelsea'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_search_misspelled_name(self):
+        """
+        Test if a misspelled name finds the default exercise but not the one of another user
+        """
+        self.client.login(username='new_user', password='new_password')
+        admin_user = User.objects.get(username='admin_user')
+        self.assertEqual(self.search(q='chelsee'), [('chelsea', admin_user.pk)])
+        self.assertEqual(self.search(q='conie'), [('connie', User.objects.get(username='new_user').pk)])
+
+    def test_non_admin_search_description(self):
+        """
+        Test if the words of the description are found with the French stemming
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.assertEqual([name for name, _ in self.search(q='traction')], ['murph'])
+        self.assertEqual([name for name, _ in self.search(q='pompe lestée')], ['murph'])
+        self.assertEqual(self.search(q='natation'), [])
+
+    def test_non_admin_search_updated_description(self):
+        """
+        Test if the search vector follows the description updated
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        url = reverse('exercise_detail', kwargs={'pk': connie.pk})
+        response = self.client.patch(url, {'description': "Tractions et wallballs"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([name for name, _ in self.search(q='tractions')], ['connie', 'murph'])
+
+    def test_non_admin_search_vector_computed_on_description(self):
+        """
+        Test if the updates which do not set the description leave the search vector as it is
+        """
+        connie = Exercise.objects.filter(name="connie")
+        connie.update(search_vector=None)
+        connie.update(training_count=F('training_count') + 1, version=F('version') + 1)
+        self.assertIsNone(connie.get().search_vector)
+        connie.update(description="Tractions et wallballs")
+        self.assertIsNotNone(connie.get().search_vector)
+
+    def test_non_admin_search_with_indexes(self):
+        """
+        Test if the name and description filters use their indexes
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            sql, params = search_exercises(Exercise.objects.all(), 'chelsea').query.sql_with_params()
+            cursor.execute('EXPLAIN ' + sql, params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('api_exercise_name_trgm_idx', plan)
+        self.assertIn('api_exercise_search_idx', plan)
+
+    def test_non_admin_search_without_text(self):
+        """
+        Test if the API returns a 400 status without text
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(reverse('exercises_search'), {'q': ' '}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,139 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise, Movement, MovementsPerExercise, MovementSettings, MovementSettingsPerMovementsPerExercise
+from ..similarity import similarities
+from .helper_dbtestdata import TestDatabase
+
+class ExerciseSimilarTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    ExerciseSimilar view. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Get the similar exercises
+        -> With non admin account:
+            SUCCESS:
+                -> Get the similar exercises among the visible ones, the most similar first
+                -> The similar exercises follow the changes of the exercises
+                -> The similar exercises follow the clones and the deletions
+                -> The index gives the same results once the changes are merged
+            FAIL:
+                -> Get the similar exercises of a private exercise of another user
+        -> With admin account:
+            SUCCESS:
+                -> Get the similar exercises among all the exercises
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        similarities.clear()
+        self.admin_chelsea = Exercise.objects.get(name="chelsea", founder=User.objects.get(username="admin_user"))
+        self.ordinary_chelsea = Exercise.objects.get(name="chelsea", founder=User.objects.get(username="ordinary_user"))
+        self.connie = Exercise.objects.get(name="connie")
+
+    def similar(self, exercise, **params):
+        url = reverse('exercise_similar', kwargs={'pk': exercise.pk})
+        response = self.client.get(url, params, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(neighbor['id'], neighbor['similarity']) for neighbor in response.data['similar']]
+
+    def test_not_connected_get_similar_exercises(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        url = reverse('exercise_similar', kwargs={'pk': self.admin_chelsea.pk})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_get_similar_exercises(self):
+        """
+        Test if only the visible exercises sharing movements are returned, the most similar first,
+        without the exercise itself
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        neighbors = self.similar(self.ordinary_chelsea)
+        self.assertEqual([pk for pk, _ in neighbors], [self.admin_chelsea.pk])
+        self.assertTrue(0.9 < neighbors[0][1] <= 1)
+
+        self.client.login(username='new_user', password='new_password')
+        neighbors = self.similar(self.connie)
+        self.assertEqual([pk for pk, _ in neighbors], [self.admin_chelsea.pk])
+        self.assertTrue(0 < neighbors[0][1] < 0.9)
+        self.assertEqual(self.similar(self.connie, k=0), neighbors)
+
+    def test_non_admin_similar_exercises_follow_changes(self):
+        """
+        Test if the similarities are updated when the movements or the settings of an exercise change
+        """
+        self.client.login(username='new_user', password='new_password')
+        before = self.similar(self.connie)[0][1]
+
+        squat = MovementsPerExercise.objects.create(exercise=self.connie,
+                                                    movement=Movement.objects.get(name="squat"),
+                                                    movement_number=3)
+        after = self.similar(self.connie)[0][1]
+        self.assertGreater(after, before)
+
+        MovementSettingsPerMovementsPerExercise.objects.create(
+            exercise_movement=squat, setting=MovementSettings.objects.get(name=MovementSettings.REPETITIONS),
+            setting_value=15)
+        self.assertGreater(self.similar(self.connie)[0][1], after)
+
+        squat.delete()
+        self.assertEqual(self.similar(self.connie)[0][1], before)
+
+    def test_non_admin_similar_exercises_follow_clones_and_deletions(self):
+        """
+        Test if a copy is the most similar exercise and if a deleted exercise is not returned anymore
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.similar(self.connie)
+        response = self.client.post(reverse('exercise_clone', kwargs={'pk': self.connie.pk}), format='json')
+        neighbors = self.similar(self.connie)
+        self.assertEqual(neighbors[0], (response.data['id'], 1.0))
+        self.assertEqual(len(neighbors), 2)
+
+        Exercise.objects.get(pk=response.data['id']).delete()
+        self.assertEqual([pk for pk, _ in self.similar(self.connie)], [self.admin_chelsea.pk])
+
+    def test_non_admin_similar_exercises_after_merge(self):
+        """
+        Test if the results are the same once the changed exercises are merged in the index
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.similar(self.connie)
+        self.client.post(reverse('exercise_clone', kwargs={'pk': self.connie.pk}), format='json')
+        self.client.post(reverse('exercise_clone', kwargs={'pk': self.admin_chelsea.pk}), format='json')
+        pending = self.similar(self.connie)
+        self.assertEqual(len(similarities.pending), 2)
+
+        similarities.compact()
+        self.assertEqual(similarities.pending, {})
+        self.assertEqual(self.similar(self.connie), pending)
+        self.assertEqual(self.similar(self.connie, k=1), pending[:1])
+
+    def test_non_admin_get_similar_exercises_of_other_user(self):
+        """
+        Test if the similar exercises of a private exercise of another user are not found
+        """
+        self.client.login(username='new_user', password='new_password')
+        url = reverse('exercise_similar', kwargs={'pk': self.ordinary_chelsea.pk})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_admin_get_similar_exercises(self):
+        """
+        Test if an admin gets the similar exercises among all the exercises
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        neighbors = [pk for pk, _ in self.similar(self.connie)]
+        self.assertEqual(sorted(neighbors), sorted([self.admin_chelsea.pk, self.ordinary_chelsea.pk]))
+        self.assertEqual(len(self.similar(self.connie, k=1)), 1)
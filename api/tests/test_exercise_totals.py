@@ -0,0 +1,146 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise, Movement, MovementSettings
+from ..totals import update_exercise_totals
+from .helper_dbtestdata import TestDatabase
+
+class ExerciseTotalsTest(APITestCase):
+    """
+    This class will test the totals and the estimated duration of the exercises.
+    What will be tested:
+        -> With non admin account:
+            SUCCESS:
+                -> Compute the totals of all the exercises
+                -> Compute the totals of a created exercise
+                -> Compute the totals of an updated exercise
+                -> Copy the totals of a cloned exercise
+                -> Filter and sort the exercises on their totals
+            FAIL:
+                -> Sort the exercises on an invalid field
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper, its exercises are created
+        without the serializer so their totals are computed afterwards
+        """
+        TestDatabase.create()
+        update_exercise_totals()
+
+    def setUp(self):
+        self.admin_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        self.ordinary_chelsea = Exercise.objects.get(name="chelsea", is_default=False)
+        self.connie = Exercise.objects.get(name="connie")
+
+    @staticmethod
+    def totals(exercise):
+        return {field: exercise[field] for field in ('estimated_duration', 'total_repetitions', 'total_distance', 'total_load')}
+
+    def test_non_admin_totals_of_all_exercises(self):
+        """
+        Test if the totals are the sums of the settings, for all the rounds, and if the
+        estimated duration is the time of the goal or the time of the repetitions
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        response = self.client.get(reverse('exercise_detail', kwargs={'pk': self.connie.pk}), format='json')
+        self.assertEqual(self.totals(response.data), {'estimated_duration': 5 * 75 * 3, 'total_repetitions': 5 * 75,
+                                                      'total_distance': 0, 'total_load': 5 * 50 * 20})
+        response = self.client.get(reverse('exercise_detail', kwargs={'pk': self.ordinary_chelsea.pk}), format='json')
+        self.assertEqual(self.totals(response.data), {'estimated_duration': 30 * 60, 'total_repetitions': 60,
+                                                      'total_distance': 0, 'total_load': 30 * 10})
+
+    def test_non_admin_totals_of_created_exercise(self):
+        """
+        Test if the totals of an exercise created with the API are returned and saved
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        data = {
+            'name': "run and squat",
+            'description': "3 rounds",
+            'exercise_type': "FORTIME",
+            'goal_type': "round",
+            'goal_value': 3,
+            'founder': User.objects.get(username='ordinary_user').pk,
+            'movements': [
+                {
+                    'movement': Movement.objects.get(name="squat").pk,
+                    'movement_number': 1,
+                    'movement_settings': [
+                        {'setting': MovementSettings.objects.get(name=MovementSettings.REPETITIONS).pk, 'setting_value': 20},
+                        {'setting': MovementSettings.objects.get(name=MovementSettings.WEIGHT).pk, 'setting_value': 16},
+                    ]
+                },
+                {
+                    'movement': Movement.objects.get(name="pushup").pk,
+                    'movement_number': 2,
+                    'movement_settings': [
+                        {'setting': MovementSettings.objects.get(name=MovementSettings.DISTANCE).pk, 'setting_value': 400},
+                    ]
+                },
+            ]
+        }
+        response = self.client.post(reverse('exercises_list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        totals = {'estimated_duration': 3 * (20 * 3 + 400 * 0.3), 'total_repetitions': 3 * 20,
+                  'total_distance': 3 * 400, 'total_load': 3 * 20 * 16}
+        self.assertEqual(self.totals(response.data), totals)
+        self.assertEqual(self.totals(Exercise.objects.filter(name="run and squat").values().get()), totals)
+
+    def test_non_admin_totals_of_updated_exercise(self):
+        """
+        Test if the totals follow the goal and the settings of an updated exercise
+        """
+        self.client.login(username='new_user', password='new_password')
+        url = reverse('exercise_detail', kwargs={'pk': self.connie.pk})
+        response = self.client.patch(url, {'goal_value': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_repetitions'], 2 * 75)
+
+        movements = response.data['movements']
+        movements[0]['movement_settings'][0]['setting_value'] = 5
+        response = self.client.patch(url, {'movements': movements}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_repetitions'], 2 * 55)
+        self.assertEqual(Exercise.objects.get(pk=self.connie.pk).estimated_duration, 2 * 55 * 3)
+
+    def test_non_admin_totals_of_cloned_exercise(self):
+        """
+        Test if the copy of an exercise has its totals
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.post(reverse('exercise_clone', kwargs={'pk': self.connie.pk}), format='json')
+        clone = Exercise.objects.values().get(pk=response.data['id'])
+        self.assertEqual(self.totals(clone), self.totals(Exercise.objects.values().get(pk=self.connie.pk)))
+
+    def test_non_admin_filter_and_sort_exercises_on_totals(self):
+        """
+        Test if the exercises can be filtered and sorted on their totals
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        url = reverse('exercises_list')
+        response = self.client.get(url, {'ordering': '-total_repetitions'}, format='json')
+        self.assertEqual([exercise['id'] for exercise in response.data],
+                         [self.connie.pk, self.ordinary_chelsea.pk, self.admin_chelsea.pk])
+        response = self.client.get(url, {'ordering': 'estimated_duration,-id'}, format='json')
+        self.assertEqual([exercise['id'] for exercise in response.data],
+                         [self.connie.pk] + sorted([self.admin_chelsea.pk, self.ordinary_chelsea.pk], reverse=True))
+
+        response = self.client.get(url, {'min_total_load': 1, 'max_estimated_duration': 1800, 'ordering': 'name'}, format='json')
+        self.assertEqual([exercise['id'] for exercise in response.data],
+                         [self.ordinary_chelsea.pk, self.connie.pk])
+        response = self.client.get(url, {'max_total_repetitions': 59}, format='json')
+        self.assertEqual([exercise['id'] for exercise in response.data], [self.admin_chelsea.pk])
+
+    def test_non_admin_sort_exercises_on_invalid_field(self):
+        """
+        Test if a 400 error is returned when the exercises are sorted on an invalid field
+        or filtered with an invalid bound
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        response = self.client.get(reverse('exercises_list'), {'ordering': 'description'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('exercises_list'), {'min_total_load': 'heavy'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -99,6 +99,14 @@ class ExerciseTest(APITestCase):
             'founder': connie.founder.pk,
             'is_default': False,
             "movements": [],
+            'estimated_duration': connie.estimated_duration,
+            'total_repetitions': connie.total_repetitions,
+            'total_distance': connie.total_distance,
+            'total_load': connie.total_load,
+            'training_count': connie.training_count,
+            'done_count': connie.done_count,
+            'last_trained_at': connie.last_trained_at,
+            'version': connie.version,
         }
 
         for movement in connie.movements.all():
@@ -182,6 +190,14 @@ class ExerciseTest(APITestCase):
             'founder': connie.founder.pk,
             'is_default': False,
             "movements": [],
+            'estimated_duration': connie.estimated_duration,
+            'total_repetitions': connie.total_repetitions,
+            'total_distance': connie.total_distance,
+            'total_load': connie.total_load,
+            'training_count': connie.training_count,
+            'done_count': connie.done_count,
+            'last_trained_at': connie.last_trained_at,
+            'version': connie.version,
         }
 
         for movement in connie.movements.all():
@@ -320,7 +336,15 @@ class ExerciseTest(APITestCase):
             'goal_value': fran.goal_value,
             'founder': fran.founder.pk,
             'is_default': fran.is_default,
-            "movements": []
+            "movements": [],
+            'estimated_duration': fran.estimated_duration,
+            'total_repetitions': fran.total_repetitions,
+            'total_distance': fran.total_distance,
+            'total_load': fran.total_load,
+            'training_count': fran.training_count,
+            'done_count': fran.done_count,
+            'last_trained_at': fran.last_trained_at,
+            'version': fran.version,
         }
         for movement in fran.movements.all():
             mvt_per_exo = MovementsPerExercise.objects.filter(exercise=fran,
@@ -385,6 +409,14 @@ class ExerciseTest(APITestCase):
             'founder': chelsea.founder.pk,
             'is_default': False,
             "movements": [],
+            'estimated_duration': chelsea.estimated_duration,
+            'total_repetitions': chelsea.total_repetitions,
+            'total_distance': chelsea.total_distance,
+            'total_load': chelsea.total_load,
+            'training_count': chelsea.training_count,
+            'done_count': chelsea.done_count,
+            'last_trained_at': chelsea.last_trained_at,
+            'version': chelsea.version,
         }
 
         for movement in chelsea.movements.all():
@@ -435,6 +467,14 @@ class ExerciseTest(APITestCase):
             'founder': chelsea.founder.pk,
             'is_default': False,
             "movements": [],
+            'estimated_duration': chelsea.estimated_duration,
+            'total_repetitions': chelsea.total_repetitions,
+            'total_distance': chelsea.total_distance,
+            'total_load': chelsea.total_load,
+            'training_count': chelsea.training_count,
+            'done_count': chelsea.done_count,
+            'last_trained_at': chelsea.last_trained_at,
+            'version': chelsea.version,
         }
 
         for movement in chelsea.movements.all():
@@ -547,7 +587,15 @@ class ExerciseTest(APITestCase):
             'goal_value': fran.goal_value,
             'founder': fran.founder.pk,
             'is_default': fran.is_default,
-            "movements": []
+            "movements": [],
+            'estimated_duration': fran.estimated_duration,
+            'total_repetitions': fran.total_repetitions,
+            'total_distance': fran.total_distance,
+            'total_load': fran.total_load,
+            'training_count': fran.training_count,
+            'done_count': fran.done_count,
+            'last_trained_at': fran.last_trained_at,
+            'version': fran.version,
         }
         for movement in fran.movements.all():
             mvt_per_exo = MovementsPerExercise.objects.filter(exercise=fran,
@@ -647,6 +695,14 @@ class ExerciseTest(APITestCase):
             'founder': connie.founder.pk,
             'is_default': False,
             "movements": [],
+            'estimated_duration': connie.estimated_duration,
+            'total_repetitions': connie.total_repetitions,
+            'total_distance': connie.total_distance,
+            'total_load': connie.total_load,
+            'training_count': connie.training_count,
+            'done_count': connie.done_count,
+            'last_trained_at': connie.last_trained_at,
+            'version': connie.version,
         }
 
         for movement in connie.movements.all():
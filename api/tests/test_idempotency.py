@@ -0,0 +1,187 @@
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise, Training, IdempotencyKey
+from ..idempotency import IdempotentRequest, RequestInProgress, prune_idempotency_keys
+from .helper_dbtestdata import TestDatabase
+
+class IdempotencyTest(APITestCase):
+    """
+    This class will test the Idempotency-Key header on the creations of
+    ExerciseList and TrainingList. What will be tested:
+        -> With non admin account:
+            SUCCESS:
+                -> Create an exercise once when the request is sent twice with the same key
+                -> Create a training once when the request is sent twice with the same key
+                -> Create twice without key or with two users
+                -> Run again a request which failed
+                -> Take the lock of a request which has not answered in time
+                -> Delete the expired keys
+            FAIL:
+                -> Reuse a key with another body
+                -> Send a key while the first request is still in progress
+                -> Store a response after the lock has been taken by another request
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.url = reverse('exercises_list')
+        self.data = {
+            'name': "fran",
+            'description': "hard workout based on 21-15-9 sequence",
+            'exercise_type': "FORTIME",
+            'goal_type': "round",
+            'goal_value': 3,
+            'founder': User.objects.get(username='ordinary_user').pk,
+            'movements': []
+        }
+
+    def test_non_admin_create_exercise_twice_with_same_key(self):
+        """
+        Test if the retry returns the first response without creating a second exercise
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        initial_exercises = Exercise.objects.count()
+        first = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        retry = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Exercise.objects.count(), initial_exercises + 1)
+
+    def test_non_admin_create_training_twice_with_same_key(self):
+        """
+        Test if the retry of a training creation does not create a second training
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        initial_trainings = Training.objects.count()
+        data = {
+            "founder": User.objects.get(username='new_user').pk,
+            "date": datetime(2018, 11, 11),
+            "performance_type": 'duree',
+            "performance_value": 0,
+            "done": False,
+            "exercise": {
+                'id': connie.pk,
+                'name': connie.name,
+                'description': connie.description,
+                'exercise_type': connie.exercise_type,
+                'goal_type': connie.goal_type,
+                'goal_value': connie.goal_value,
+                'founder': connie.founder.pk,
+                'is_default': False,
+            }
+        }
+        url = reverse('trainings_list')
+        for _ in range(3):
+            response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='connie-1')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Training.objects.count(), initial_trainings + 1)
+
+    def test_non_admin_create_twice_without_same_key(self):
+        """
+        Test if the requests without key, or with the key of another user, all create an exercise
+        """
+        initial_exercises = Exercise.objects.count()
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        self.client.post(self.url, self.data, format='json')
+        self.client.post(self.url, self.data, format='json')
+        self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.client.login(username='new_user', password='new_password')
+        self.data['founder'] = User.objects.get(username='new_user').pk
+        response = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Exercise.objects.count(), initial_exercises + 4)
+
+    def test_non_admin_run_again_failed_request(self):
+        """
+        Test if a failed request is not kept, its retry is run
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        invalid = dict(self.data, exercise_type='YOGA')
+        response = self.client.post(self.url, invalid, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_non_admin_reuse_key_with_another_body(self):
+        """
+        Test if the API returns a 400 status when a key is sent again with another body
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        response = self.client.post(self.url, dict(self.data, goal_value=5), format='json',
+                                    HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def lock(self, locked_until, username='ordinary_user'):
+        """
+        Hold the lock of the key fran-1 as a request which is still running
+        """
+        return IdempotencyKey.objects.create(user=User.objects.get(username=username), path=self.url,
+                                             key='fran-1', fingerprint='running', token=uuid.uuid4(),
+                                             locked_until=locked_until, created_at=timezone.now())
+
+    def test_non_admin_send_key_in_progress(self):
+        """
+        Test if the API returns a 409 status when the first request holds the lock
+        longer than the duplicates wait, and if the lock is kept
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        lock = self.lock(timezone.now() + timedelta(seconds=30))
+        initial_exercises = Exercise.objects.count()
+        with mock.patch.object(IdempotentRequest, 'WAIT_TIMEOUT', 0.1):
+            response = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Exercise.objects.count(), initial_exercises)
+        self.assertEqual(IdempotencyKey.objects.get().token, lock.token)
+
+    def test_non_admin_take_expired_lock(self):
+        """
+        Test if the lock of a request which has not answered before its timeout is taken,
+        and if that request can neither store its response nor drop the new lock
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        lock = self.lock(timezone.now() - timedelta(seconds=1))
+        response = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        stored = IdempotencyKey.objects.get()
+        self.assertNotEqual(stored.token, lock.token)
+        self.assertEqual(stored.response['id'], response.data['id'])
+
+        late = IdempotentRequest(mock.Mock(user=stored.user, path=self.url, data=self.data), 'fran-1')
+        late.token = lock.token
+        with self.assertRaises(RequestInProgress):
+            late.save(response)
+        late.release()
+        self.assertEqual(IdempotencyKey.objects.get().status_code, status.HTTP_201_CREATED)
+
+    def test_non_admin_delete_expired_keys(self):
+        """
+        Test if the keys older than the replay time are deleted, and if an expired key runs the request again
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.assertEqual(prune_idempotency_keys(), 0)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=IdempotentRequest.TTL + 1))
+        initial_exercises = Exercise.objects.count()
+        response = self.client.post(self.url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='fran-1')
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Exercise.objects.count(), initial_exercises + 1)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=IdempotentRequest.TTL + 1))
+        self.assertEqual(prune_idempotency_keys(), 1)
+        self.assertFalse(IdempotencyKey.objects.exists())
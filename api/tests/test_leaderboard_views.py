@@ -0,0 +1,170 @@
+from datetime import datetime
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise, LeaderboardEntry, Training
+from ..leaderboards import Leaderboard
+from .helper_dbtestdata import TestDatabase
+from .helper_oncommit import run_on_commit
+
+class LeaderboardTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    ExerciseLeaderboard view. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Get the leaderboard of a default exercise
+        -> With non admin account:
+            SUCCESS:
+                -> Get the top and the rank of the request user
+                -> The ranking follows the trainings created, updated and deleted,
+                   the cached snapshot is updated in place
+                -> The cached top ignores the rolled back trainings
+            FAIL:
+                -> Get the leaderboard of a non default exercise
+                -> Get the leaderboard with an unknown performance type
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        # The snapshots are cached and must not leak between tests
+        cache.clear()
+        admin_user = User.objects.get(username='admin_user')
+        self.chelsea = Exercise.objects.get(Q(name='chelsea'), Q(founder=admin_user))
+        self.url = reverse('exercise_leaderboard', kwargs={'pk': self.chelsea.pk})
+
+    def test_not_connected_get_leaderboard(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        response = self.client.get(self.url, {'performance_type': Training.ROUND}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_get_leaderboard(self):
+        """
+        Test if, when we are logged with a non admin account, the API returns:
+            - a 200 status on this request
+            - the users ranked on their best done training
+            - no rank for the request user without done training
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        new_user = User.objects.get(username='new_user')
+        ordinary_user = User.objects.get(username='ordinary_user')
+        response = self.client.get(self.url, {'performance_type': Training.ROUND}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['top'], [{'rank': 1, 'founder': new_user.pk, 'performance_value': 15}])
+        self.assertEqual(response.data['user'], {'rank': None, 'founder': ordinary_user.pk, 'performance_value': None})
+
+    def test_non_admin_leaderboard_follows_trainings(self):
+        """
+        Test if the best of the user and the cached snapshot are updated in place
+        when a training is created, updated and deleted
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        new_user = User.objects.get(username='new_user')
+        ordinary_user = User.objects.get(username='ordinary_user')
+        self.client.get(self.url, {'performance_type': Training.ROUND}, format='json')
+
+        with run_on_commit():
+            training = Training.objects.create(exercise=self.chelsea,
+                                               founder=ordinary_user,
+                                               date=datetime(2018, 9, 1),
+                                               performance_type=Training.ROUND,
+                                               performance_value=20,
+                                               done=True)
+        self.assertEqual(cache.get(Leaderboard.cache_key(self.chelsea.pk, Training.ROUND)).keys, [-20, -15])
+        response = self.client.get(self.url, {'performance_type': Training.ROUND, 'user': new_user.pk}, format='json')
+        self.assertEqual([row['founder'] for row in response.data['top']], [ordinary_user.pk, new_user.pk])
+        self.assertEqual(response.data['user']['rank'], 2)
+
+        training.performance_value = 10
+        with run_on_commit():
+            training.save()
+        self.assertEqual(LeaderboardEntry.objects.get(exercise=self.chelsea, founder=ordinary_user).best, 10)
+        response = self.client.get(self.url, {'performance_type': Training.ROUND}, format='json')
+        self.assertEqual(response.data['user'], {'rank': 2, 'founder': ordinary_user.pk, 'performance_value': 10})
+
+        with run_on_commit():
+            training.delete()
+        self.assertFalse(LeaderboardEntry.objects.filter(exercise=self.chelsea, founder=ordinary_user).exists())
+        response = self.client.get(self.url, {'performance_type': Training.ROUND}, format='json')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['user']['rank'], None)
+
+    def test_non_admin_leaderboard_keeps_best_training(self):
+        """
+        Test if a worse training does not change the best of the user and if the users
+        with the same best share the same rank
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        new_user = User.objects.get(username='new_user')
+        ordinary_user = User.objects.get(username='ordinary_user')
+        self.client.get(self.url, {'performance_type': Training.ROUND}, format='json')
+
+        with run_on_commit():
+            for value in (15, 12):
+                Training.objects.create(exercise=self.chelsea,
+                                        founder=ordinary_user,
+                                        date=datetime(2018, 9, 1),
+                                        performance_type=Training.ROUND,
+                                        performance_value=value,
+                                        done=True)
+        response = self.client.get(self.url, {'performance_type': Training.ROUND}, format='json')
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['top'], [{'rank': 1, 'founder': founder, 'performance_value': 15}
+                                                for founder in sorted([new_user.pk, ordinary_user.pk])])
+        self.assertEqual(response.data['user'], {'rank': 1, 'founder': ordinary_user.pk, 'performance_value': 15})
+
+    def test_non_admin_leaderboard_ignores_rolled_back_trainings(self):
+        """
+        Test if the cached top is kept when the transaction of a training is rolled back
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        ordinary_user = User.objects.get(username='ordinary_user')
+        self.client.get(self.url, {'performance_type': Training.ROUND}, format='json')
+
+        with run_on_commit():
+            try:
+                with transaction.atomic():
+                    Training.objects.create(exercise=self.chelsea,
+                                            founder=ordinary_user,
+                                            date=datetime(2018, 9, 1),
+                                            performance_type=Training.ROUND,
+                                            performance_value=20,
+                                            done=True)
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertIsNotNone(cache.get(Leaderboard.cache_key(self.chelsea.pk, Training.ROUND)))
+        response = self.client.get(self.url, {'performance_type': Training.ROUND}, format='json')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['user']['rank'], None)
+
+    def test_non_admin_get_leaderboard_of_non_default_exercise(self):
+        """
+        Test if the API returns a 404 status for an exercise which is not a default one
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        connie = Exercise.objects.get(name='connie')
+        url = reverse('exercise_leaderboard', kwargs={'pk': connie.pk})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_non_admin_get_leaderboard_with_unknown_performance_type(self):
+        """
+        Test if the API returns a 400 status for an unknown performance type
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        response = self.client.get(self.url, {'performance_type': 'weight'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
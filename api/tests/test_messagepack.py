@@ -0,0 +1,123 @@
+import json
+from datetime import datetime
+import msgpack
+from django.db.models import Q
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise, Movement, MovementSettings, Training
+from .helper_dbtestdata import TestDatabase
+
+class MessagePackTest(APITestCase):
+    """
+    This class will test the MessagePack content negotiation. What will be tested:
+        -> With admin account:
+            SUCCESS:
+                -> Get the exercises as MessagePack, with the same content as JSON
+                -> Create an exercise with a MessagePack body
+        -> With non admin account:
+            SUCCESS:
+                -> Get a training as MessagePack, with the same content as JSON
+                -> Update a training with a MessagePack body
+            FAIL:
+                -> Send an invalid MessagePack body
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def get_both(self, url):
+        """
+        Return the response content as JSON and as MessagePack
+        """
+        as_json = self.client.get(url, HTTP_ACCEPT='application/json')
+        as_msgpack = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(as_msgpack.status_code, status.HTTP_200_OK)
+        self.assertEqual(as_msgpack['Content-Type'], 'application/msgpack')
+        self.assertLess(len(as_msgpack.content), len(as_json.content))
+        return json.loads(as_json.content.decode('utf-8')), msgpack.unpackb(as_msgpack.content, raw=False)
+
+    def test_admin_get_exercises_as_msgpack(self):
+        """
+        Test if the exercise list rendered as MessagePack has the same content as JSON
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        as_json, as_msgpack = self.get_both(reverse('exercises_list'))
+        self.assertEqual(as_msgpack, as_json)
+
+    def test_admin_create_exercise_with_msgpack(self):
+        """
+        Test if an exercise with movements can be created from a MessagePack body
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        founder = User.objects.get(username='admin_user')
+        squat = Movement.objects.get(name="squat")
+        rep = MovementSettings.objects.get(name="repetitions")
+        data = {
+            'name': "fran",
+            'description': "hard workout based on 21-15-9 sequence",
+            'exercise_type': "FORTIME",
+            'goal_type': "round",
+            'goal_value': 3,
+            'founder': founder.pk,
+            'is_default': True,
+            "movements": [
+                {
+                    "movement": squat.pk,
+                    "movement_number": 1,
+                    "movement_settings": [
+                        {
+                            "setting": rep.pk,
+                            "setting_value": 10
+                        }
+                    ]
+                }
+            ]
+        }
+        url = reverse('exercises_list')
+        response = self.client.post(url, msgpack.packb(data), content_type='application/msgpack',
+                                    HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        content = msgpack.unpackb(response.content, raw=False)
+        fran = Exercise.objects.get(name="fran")
+        self.assertEqual(content['id'], fran.pk)
+        self.assertEqual(content['movements'][0]['movement_settings'][0]['setting_value'], 10)
+
+    def test_non_admin_get_training_as_msgpack(self):
+        """
+        Test if a training rendered as MessagePack has the same content as JSON, dates included
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        training = Training.objects.get(Q(exercise=connie), Q(date=datetime(2018, 4, 5)))
+        as_json, as_msgpack = self.get_both(reverse('training_detail', kwargs={'pk': training.pk}))
+        self.assertEqual(as_msgpack, as_json)
+        self.assertEqual(as_msgpack['date'], '2018-04-05T00:00:00Z')
+
+    def test_non_admin_update_training_with_msgpack(self):
+        """
+        Test if a training can be updated from a MessagePack body
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        training = Training.objects.get(Q(exercise=connie), Q(date=datetime(2018, 4, 5)))
+        url = reverse('training_detail', kwargs={'pk': training.pk})
+        response = self.client.patch(url, msgpack.packb({'performance_value': 210}),
+                                     content_type='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        training.refresh_from_db()
+        self.assertEqual(training.performance_value, 210)
+
+    def test_non_admin_send_invalid_msgpack(self):
+        """
+        Test if the API returns a 400 status for a truncated MessagePack body
+        """
+        self.client.login(username='new_user', password='new_password')
+        url = reverse('exercises_list')
+        response = self.client.post(url, msgpack.packb({'name': 'fran'})[:-2], content_type='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,94 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Exercise, Movement, Training
+from .helper_dbtestdata import TestDatabase
+
+class MultiGetTest(APITestCase):
+    """
+    This class will test the ?ids= parameter of ExerciseList, MovementList
+    and TrainingList. What will be tested:
+        -> With admin account:
+            SUCCESS:
+                -> Get the trainings of all the users by ids
+        -> With non admin account:
+            SUCCESS:
+                -> Get the exercises by ids in the order asked, with their movements
+                -> Get the movements by ids in the order asked
+                -> Get only its own trainings by ids
+            FAIL:
+                -> Get the objects with invalid ids or too many ids
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def test_non_admin_get_exercises_by_ids(self):
+        """
+        Test if the exercises are returned in the order of the ids with one query
+        for the exercises and the prefetches of their movements, without the exercise
+        of another user
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        o_chelsea = Exercise.objects.get(name="chelsea", founder__username='ordinary_user')
+        url = reverse('exercises_list')
+        ids = '{},{},{}'.format(connie.pk, o_chelsea.pk, a_chelsea.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([exercise['id'] for exercise in response.data], [connie.pk, a_chelsea.pk])
+        self.assertEqual(len(response.data[0]['movements']), 2)
+        self.assertEqual(len([query for query in queries if 'api_' in query['sql']]), 3)
+
+    def test_non_admin_get_movements_by_ids(self):
+        """
+        Test if the movements are returned in the order of the ids
+        """
+        self.client.login(username='new_user', password='new_password')
+        movements = list(Movement.objects.order_by('-name'))
+        url = reverse('movements_list')
+        response = self.client.get(url, {'ids': ','.join(str(movement.pk) for movement in movements)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([movement['name'] for movement in response.data], [movement.name for movement in movements])
+
+    def test_non_admin_get_trainings_by_ids(self):
+        """
+        Test if a user only gets its own trainings
+        """
+        self.client.login(username='new_user', password='new_password')
+        trainings = list(Training.objects.order_by('-date'))
+        url = reverse('trainings_list')
+        response = self.client.get(url, {'ids': ','.join(str(training.pk) for training in trainings)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([training['id'] for training in response.data],
+                         [training.pk for training in trainings if training.founder.username == 'new_user'])
+
+    def test_admin_get_trainings_by_ids(self):
+        """
+        Test if an admin gets the trainings of all the users
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        trainings = list(Training.objects.order_by('-date'))
+        url = reverse('trainings_list')
+        response = self.client.get(url, {'ids': ','.join(str(training.pk) for training in trainings)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([training['id'] for training in response.data], [training.pk for training in trainings])
+
+    def test_non_admin_get_invalid_ids(self):
+        """
+        Test if the API returns a 400 status for ids which are not integers or too many ids
+        """
+        self.client.login(username='new_user', password='new_password')
+        url = reverse('exercises_list')
+        response = self.client.get(url, {'ids': '1,two'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'ids': ','.join(str(pk) for pk in range(1, 102))}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,105 @@
+import io
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from ..models import Exercise, Training
+from ..parsers import FastJSONParser
+from ..renderers import FastJSONRenderer
+from ..serializers import ExerciseSerializer, TrainingSerializer
+from .helper_dbtestdata import TestDatabase
+
+class FastJSONTest(APITestCase):
+    """
+    This class will test the orjson renderer and parser. What will be tested:
+        -> FastJSONRenderer:
+            SUCCESS:
+                -> Render the exercises and trainings as the stdlib renderer
+                -> Render datetimes, decimals, None and lazy strings as the stdlib renderer
+                -> Fall back to the stdlib renderer without orjson or when indented
+        -> FastJSONParser:
+            SUCCESS:
+                -> Parse a training payload
+            FAIL:
+                -> Parse an invalid payload
+        -> API:
+            SUCCESS:
+                -> Get and post JSON through the default renderer and parser
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def test_render_serialized_data_as_stdlib(self):
+        """
+        Test if the exercise and training lists are rendered byte for byte as the stdlib does
+        """
+        exercises = ExerciseSerializer(Exercise.objects.all(), many=True).data
+        trainings = TrainingSerializer(Training.objects.all(), many=True).data
+        for data in (exercises, trainings):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_render_special_values_as_stdlib(self):
+        """
+        Test if the values orjson does not render natively are rendered as the stdlib does
+        """
+        data = {
+            'date': timezone.make_aware(datetime(2018, 4, 5, 10, 30, 15, 123456)),
+            'naive_date': datetime(2018, 4, 5),
+            'decimal': Decimal('12.50'),
+            'none': None,
+            'lazy': gettext_lazy('description'),
+            'separator': 'line\u2028separator',
+            1: 'integer key',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_render_fallback(self):
+        """
+        Test if the stdlib is used without orjson and for the indented JSON
+        """
+        data = {'name': 'chelsea', 'goal_value': 30}
+        with mock.patch('api.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = FastJSONRenderer().render(data, 'application/json; indent=4')
+        self.assertEqual(indented, JSONRenderer().render(data, 'application/json; indent=4'))
+
+    def test_parse_payload(self):
+        """
+        Test if a training payload is parsed
+        """
+        stream = io.BytesIO('{"performance_type": "duree", "performance_value": 230, "done": true, "note": "été"}'.encode('utf-8'))
+        data = FastJSONParser().parse(stream)
+        self.assertEqual(data, {'performance_type': 'duree', 'performance_value': 230, 'done': True, 'note': 'été'})
+
+    def test_parse_invalid_payload(self):
+        """
+        Test if an invalid payload or a NaN raises a parse error
+        """
+        for payload in (b'{"name": ', b'{"value": NaN}'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(payload))
+
+    def test_api_uses_fast_json(self):
+        """
+        Test if the API renders and parses JSON with the default classes
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        url = reverse('exercises_list')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.json(), [dict(exercise) for exercise in response.data])
+
+        response = self.client.post(url, '{"name": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
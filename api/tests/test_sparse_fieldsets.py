@@ -0,0 +1,111 @@
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise, Movement, Training
+from .helper_dbtestdata import TestDatabase
+
+class SparseFieldsetTest(APITestCase):
+    """
+    This class will test the ?fields= parameter of the list and detail views. What will be tested:
+        -> With non admin account:
+            SUCCESS:
+                -> Get the exercises with only the fields asked, without loading the others
+                -> Get the exercises with their movements prefetched
+                -> Get one exercise with only the fields asked
+                -> Get the trainings with their nested exercise
+                -> Get the movements with their settings
+            FAIL:
+                -> Get the exercises with an unknown field
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.client.login(username='ordinary_user', password='ordinary_password')
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def test_non_admin_get_exercises_with_fields(self):
+        """
+        Test if only the fields asked are rendered and loaded from the database
+        """
+        url = reverse('exercises_list')
+        response, queries = self.get(url, {'fields': 'id,name'})
+        user = User.objects.get(username='ordinary_user')
+        self.assertEqual(len(response.data), Exercise.objects.filter(Q(is_default=True) | Q(founder=user)).count())
+        for exercise in response.data:
+            self.assertEqual(set(exercise), {'id', 'name'})
+
+        exercise_queries = [sql for sql in queries if 'api_exercise' in sql or 'api_movementsperexercise' in sql]
+        self.assertEqual(len(exercise_queries), 1)
+        self.assertNotIn('description', exercise_queries[0])
+
+    def test_non_admin_get_exercises_with_movements(self):
+        """
+        Test if the movements and their settings are prefetched instead of loaded per exercise
+        """
+        url = reverse('exercises_list')
+        response, queries = self.get(url, {'fields': 'name,movements'})
+        self.assertTrue(all(set(exercise) == {'name', 'movements'} for exercise in response.data))
+        self.assertTrue(any(exercise['movements'] for exercise in response.data))
+        self.assertEqual(len([sql for sql in queries if 'api_movement' in sql]), 2)
+
+        response, queries = self.get(url, {})
+        self.assertIn('description', response.data[0])
+        self.assertEqual(len([sql for sql in queries if 'api_movement' in sql]), 2)
+
+    def test_non_admin_get_one_exercise_with_fields(self):
+        """
+        Test if the detail view renders only the fields asked
+        """
+        chelsea = Exercise.objects.get(Q(name='chelsea'), Q(founder__username='ordinary_user'))
+        url = reverse('exercise_detail', kwargs={'pk': chelsea.pk})
+        response, queries = self.get(url, {'fields': 'name,goal_type'})
+        self.assertEqual(response.data, {'name': chelsea.name, 'goal_type': chelsea.goal_type})
+
+    def test_non_admin_get_trainings_with_exercise(self):
+        """
+        Test if the nested exercise of the trainings is joined when it is asked
+        """
+        url = reverse('trainings_list')
+        response, queries = self.get(url, {'fields': 'id,exercise'})
+        trainings = Training.objects.filter(founder__username='ordinary_user')
+        self.assertEqual(len(response.data), trainings.count())
+        for training in response.data:
+            self.assertEqual(set(training), {'id', 'exercise'})
+            self.assertEqual(training['exercise']['name'], 'chelsea')
+
+        response, queries = self.get(url, {'fields': 'id,done'})
+        self.assertFalse([sql for sql in queries if 'api_exercise' in sql])
+
+    def test_non_admin_get_movements_with_settings(self):
+        """
+        Test if the settings of the movements are rendered from one prefetch
+        """
+        url = reverse('movements_list')
+        response, queries = self.get(url, {'fields': 'name,settings'})
+        squat = Movement.objects.get(name='squat')
+        movement = next(movement for movement in response.data if movement['name'] == 'squat')
+        self.assertCountEqual(movement['settings'], [setting.pk for setting in squat.settings.all()])
+        self.assertEqual(len([sql for sql in queries if 'api_movement_settings' in sql]), 1)
+
+    def test_non_admin_get_exercises_with_unknown_field(self):
+        """
+        Test if the API returns a 400 status for an unknown field
+        """
+        url = reverse('exercises_list')
+        response = self.client.get(url, {'fields': 'id,calories'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
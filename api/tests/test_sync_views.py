@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Exercise, MovementsPerExercise, MovementSettingsPerMovementsPerExercise, Training, Tombstone
+from ..sync import encode_token
+from .helper_dbtestdata import TestDatabase
+
+class SyncTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    SyncView. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Get the changes
+        -> With admin account:
+            SUCCESS:
+                -> Get all the exercises and trainings without token
+        -> With non admin account:
+            SUCCESS:
+                -> Get the visible exercises and own trainings without token
+                -> Get only the rows changed and deleted since the token
+                -> Get no deletion of the rows of other users
+                -> Get a full sync with an expired token
+            FAIL:
+                -> Get the changes with an invalid token
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper, the rows are
+        considered synced an hour ago
+        """
+        TestDatabase.create()
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        for model in (Exercise, MovementsPerExercise, MovementSettingsPerMovementsPerExercise, Training):
+            model.objects.update(updated_at=an_hour_ago)
+        cls.token = encode_token(an_hour_ago + timedelta(minutes=5))
+
+    def get_changes(self, **params):
+        response = self.client.get(reverse('sync'), params, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_not_connected_get_changes(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        response = self.client.get(reverse('sync'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_admin_get_all_changes(self):
+        """
+        Test if an admin gets all the exercises and trainings on the first sync
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        changes = self.get_changes()
+        self.assertTrue(changes['full'])
+        self.assertEqual(len(changes['exercises']), Exercise.objects.count())
+        self.assertEqual(len(changes['trainings']), Training.objects.count())
+
+    def test_non_admin_get_all_changes(self):
+        """
+        Test if a user gets the default exercises, its own exercises and trainings
+        with their movements and settings on the first sync
+        """
+        self.client.login(username='new_user', password='new_password')
+        changes = self.get_changes()
+        self.assertTrue(changes['full'])
+        self.assertTrue(changes['token'])
+        exercises = Exercise.objects.filter(Q(is_default=True) | Q(founder__username='new_user'))
+        self.assertEqual([row['id'] for row in changes['exercises']], sorted(exercise.pk for exercise in exercises))
+        self.assertEqual(len(changes['exercise_movements']),
+                         MovementsPerExercise.objects.filter(exercise__in=exercises).count())
+        self.assertEqual(len(changes['exercise_movement_settings']),
+                         MovementSettingsPerMovementsPerExercise.objects
+                         .filter(exercise_movement__exercise__in=exercises).count())
+        self.assertEqual(len(changes['trainings']), 3)
+        self.assertEqual(changes['deleted']['trainings'], [])
+
+    def test_non_admin_get_changes_since_token(self):
+        """
+        Test if only the rows changed since the token are returned, with the ids
+        of the rows deleted
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.assertEqual(self.get_changes(since=self.token)['trainings'], [])
+
+        trainings = Training.objects.filter(founder__username='new_user').order_by('date')
+        updated, deleted = trainings[0], trainings[1]
+        updated.performance_value = 18
+        updated.save()
+        deleted_id = deleted.pk
+        deleted.delete()
+        connie = Exercise.objects.get(name='connie')
+        setting = MovementSettingsPerMovementsPerExercise.objects.filter(exercise_movement__exercise=connie).first()
+        setting.setting_value = 30
+        setting.save()
+
+        changes = self.get_changes(since=self.token)
+        self.assertFalse(changes['full'])
+        self.assertEqual([(row['id'], row['performance_value']) for row in changes['trainings']],
+                         [(updated.pk, 18)])
+        self.assertEqual(changes['deleted']['trainings'], [deleted_id])
+        self.assertEqual(changes['exercises'], [])
+        self.assertEqual(changes['exercise_movements'], [])
+        self.assertEqual([(row['id'], row['setting_value']) for row in changes['exercise_movement_settings']],
+                         [(setting.pk, 30)])
+
+    def test_non_admin_get_exercise_deleted_since_token(self):
+        """
+        Test if the nested rows of a deleted exercise are also returned as deleted,
+        and not to the other users
+        """
+        connie = Exercise.objects.get(name='connie')
+        movement_ids = sorted(connie.exercise_with_movements.values_list('id', flat=True))
+        connie_id = connie.pk
+        connie.delete()
+        self.assertEqual(Tombstone.objects.filter(object_type=Tombstone.EXERCISE_MOVEMENT).count(), 2)
+
+        self.client.login(username='new_user', password='new_password')
+        deleted = self.get_changes(since=self.token)['deleted']
+        self.assertEqual(deleted['exercises'], [connie_id])
+        self.assertEqual(sorted(deleted['exercise_movements']), movement_ids)
+        self.assertEqual(len(deleted['exercise_movement_settings']), 3)
+        self.assertEqual(len(deleted['trainings']), 2)
+
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        deleted = self.get_changes(since=self.token)['deleted']
+        self.assertEqual(deleted['exercises'], [])
+        self.assertEqual(deleted['trainings'], [])
+
+    def test_non_admin_get_changes_with_expired_token(self):
+        """
+        Test if a token older than the tombstones retention gives a full sync
+        """
+        self.client.login(username='new_user', password='new_password')
+        changes = self.get_changes(since=encode_token(timezone.now() - timedelta(days=365)))
+        self.assertTrue(changes['full'])
+        self.assertEqual(len(changes['trainings']), 3)
+
+    def test_non_admin_get_changes_with_invalid_token(self):
+        """
+        Test if the API returns a 400 status for a token it did not create
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(reverse('sync'), {'since': 'not a token'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
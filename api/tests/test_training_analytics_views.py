@@ -0,0 +1,95 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Training
+from .helper_dbtestdata import TestDatabase
+
+class TrainingAnalyticsTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    TrainingAnalyticsView. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Get the analytics
+        -> With non admin account:
+            SUCCESS:
+                -> Get the load of each done training of the request user
+                -> Get the load, the acwr and the monotony per week
+                -> Get empty analytics without done training
+            FAIL:
+                -> Get the analytics with an unknown metric
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def test_not_connected_get_analytics(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        url = reverse('trainings_analytics')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_get_sessions_analytics(self):
+        """
+        Test if the load of a session is one round of the exercise multiplied by the rounds:
+            - chelsea: 5 + 10 + 15 reps without load, 15 rounds done
+            - connie: 25 + 50 reps with 20kg on the 50 reps, 5 rounds as goal
+        """
+        self.client.login(username='new_user', password='new_password')
+        url = reverse('trainings_analytics')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        sessions = response.data['sessions']
+        trainings = Training.objects.filter(founder__username='new_user', done=True).order_by('date')
+        self.assertEqual(sessions['id'], [training.pk for training in trainings])
+        self.assertEqual(sessions['date'], ['2018-03-08', '2018-04-05', '2018-05-02'])
+        self.assertEqual(sessions['volume'], [450, 375, 375])
+        self.assertEqual(sessions['tonnage'], [0, 5000, 5000])
+        self.assertEqual(sessions['distance'], [0, 0, 0])
+
+    def test_non_admin_get_weeks_analytics(self):
+        """
+        Test if the weeks start on monday, cover the whole period and contain
+        the acwr and the monotony of the chosen metric
+        """
+        self.client.login(username='new_user', password='new_password')
+        url = reverse('trainings_analytics')
+        response = self.client.get(url, {'metric': 'tonnage'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        weeks = response.data['weeks']
+        self.assertEqual(len(weeks['week']), 9)
+        self.assertEqual(weeks['week'][0], '2018-03-05')
+        self.assertEqual(weeks['sessions'], [1, 0, 0, 0, 1, 0, 0, 0, 1])
+        self.assertEqual(weeks['volume'][0], 450)
+        self.assertEqual(weeks['tonnage'][4], 5000)
+        self.assertEqual(weeks['acwr'][:5], [None, None, None, None, 4.0])
+        self.assertEqual(weeks['monotony'][4], 0.408)
+        self.assertIsNone(weeks['monotony'][1])
+
+    def test_non_admin_get_empty_analytics(self):
+        """
+        Test if the analytics are empty when the request user has no done training
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        url = reverse('trainings_analytics')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['sessions']['id'], [])
+        self.assertEqual(response.data['weeks']['week'], [])
+
+    def test_non_admin_get_analytics_with_unknown_metric(self):
+        """
+        Test if the API returns a 400 status for an unknown metric
+        """
+        self.client.login(username='new_user', password='new_password')
+        url = reverse('trainings_analytics')
+        response = self.client.get(url, {'metric': 'speed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
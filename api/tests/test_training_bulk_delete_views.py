@@ -0,0 +1,141 @@
+from datetime import datetime
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise, Training, TrainingRollup, Tombstone, UserStats
+from ..leaderboards import Leaderboard
+from ..sketches import percentiles
+from ..counters import rebuild_counters
+from ..rollups import rebuild_rollups
+from .helper_dbtestdata import TestDatabase
+from .helper_oncommit import run_on_commit
+
+class TrainingBulkDeleteTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    TrainingBulkDelete view. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Delete trainings
+        -> With non admin account:
+            SUCCESS:
+                -> Delete its trainings by ids with one statement, not the ones of the others
+                -> Delete its trainings between two dates
+                -> Refresh the tombstones, counters, rollups, leaderboards and percentiles
+                   without rebuilding the counters nor the rollups
+            FAIL:
+                -> Delete trainings without ids nor dates
+                -> Delete trainings with invalid parameters
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        cache.clear()
+        percentiles.clear()
+        percentiles.background = False
+        self.addCleanup(setattr, percentiles, 'background', True)
+        self.new_user = User.objects.get(username='new_user')
+        self.connie = Exercise.objects.get(name="connie")
+        self.url = reverse('trainings_bulk_delete')
+
+    def test_not_connected_delete_trainings(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        response = self.client.post(self.url, {'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_delete_trainings_by_ids(self):
+        """
+        Test if only the trainings of the request user are deleted, with one statement,
+        and if their tombstones are written
+        """
+        self.client.login(username='new_user', password='new_password')
+        ids = list(Training.objects.filter(exercise=self.connie).values_list('id', flat=True))
+        other = Training.objects.exclude(founder=self.new_user).first()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'ids': ids + [other.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'deleted': 2})
+        self.assertEqual(len([query for query in queries if 'DELETE FROM api_training' in query['sql']]), 1)
+
+        self.assertFalse(Training.objects.filter(pk__in=ids).exists())
+        self.assertTrue(Training.objects.filter(pk=other.pk).exists())
+        self.assertEqual(sorted(Tombstone.objects.filter(object_type=Tombstone.TRAINING, owner_id=self.new_user.pk)
+                                .values_list('object_id', flat=True)), sorted(ids))
+
+        response = self.client.post(self.url, {'ids': ids}, format='json')
+        self.assertEqual(response.data, {'deleted': 0})
+
+    def test_non_admin_delete_trainings_between_dates(self):
+        """
+        Test if only the trainings of the request user between the dates (included) are deleted
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.post(self.url, {'start': '2018-03-08', 'end': '2018-04-05'}, format='json')
+        self.assertEqual(response.data, {'deleted': 2})
+        self.assertEqual(list(Training.objects.filter(founder=self.new_user).values_list('date', flat=True)),
+                         [timezone.make_aware(datetime(2018, 5, 2))])
+
+        response = self.client.post(self.url, {'start': '2018-01-01'}, format='json')
+        self.assertEqual(response.data, {'deleted': 1})
+        self.assertTrue(Training.objects.filter(date__lt=datetime(2018, 3, 1)).exists())
+
+    def test_non_admin_delete_trainings_refresh_aggregates(self):
+        """
+        Test if the counters, rollups, leaderboards and percentiles do not count
+        the deleted trainings anymore, only the rollups of the deleted trainings are written
+        """
+        self.client.login(username='new_user', password='new_password')
+        leaderboard = Leaderboard.get(self.connie.pk, Training.TIME)
+        self.assertIn(self.new_user.pk, [founder for _, founder, _ in leaderboard.top(10)])
+        self.assertEqual(percentiles.get(self.connie.pk, Training.TIME).count, 2)
+
+        with run_on_commit(), CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {'end': '2018-04-30'}, format='json')
+        self.assertFalse([query for query in queries if 'INSERT INTO api_trainingrollup' in query['sql']
+                          or 'DELETE FROM "api_trainingrollup"' in query['sql']])
+        self.assertEqual(rebuild_counters(), (0, 0))
+        self.assertEqual(UserStats.objects.get(user=self.new_user).done_count, 1)
+        # The emptied rollups are kept with no done training
+        rollups = list(TrainingRollup.objects.filter(founder=self.new_user, done_count__gt=0)
+                       .values_list('period', 'period_start', 'exercise_type', 'done_count', 'performance_sum'))
+        rebuild_rollups(founder_ids=[self.new_user.pk])
+        self.assertCountEqual(rollups, TrainingRollup.objects.filter(founder=self.new_user)
+                              .values_list('period', 'period_start', 'exercise_type', 'done_count', 'performance_sum'))
+
+        self.assertEqual(Leaderboard.get(self.connie.pk, Training.TIME).best(self.new_user.pk), 330)
+        # The sketch forgets the deleted trainings when it is rebuilt
+        self.assertEqual(percentiles.get(self.connie.pk, Training.TIME).count, 2)
+        percentiles.rebuild(self.connie.pk, Training.TIME)
+        self.assertEqual(percentiles.get(self.connie.pk, Training.TIME).count, 1)
+
+    def test_non_admin_delete_trainings_without_criteria(self):
+        """
+        Test if a 400 error is returned without ids nor dates, nothing is deleted
+        """
+        self.client.login(username='new_user', password='new_password')
+        count = Training.objects.count()
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Training.objects.count(), count)
+
+    def test_non_admin_delete_trainings_with_invalid_parameters(self):
+        """
+        Test if a 400 error is returned with invalid ids or dates
+        """
+        self.client.login(username='new_user', password='new_password')
+        for data in ({'ids': ['a']}, {'start': '2018-13-01'}, {'start': '2018-05-01', 'end': '2018-04-01'}):
+            response = self.client.post(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
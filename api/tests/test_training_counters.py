@@ -0,0 +1,187 @@
+from datetime import datetime
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise, Training, UserStats
+from ..counters import rebuild_counters
+from ..serializers import ExerciseSerializer
+from .helper_dbtestdata import TestDatabase
+
+class TrainingCountersTest(APITestCase):
+    """
+    This class will test the training counters of the exercises and of the users,
+    and the TrainingCounters view. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Get the counters of the request user
+        -> With non admin account:
+            SUCCESS:
+                -> Get the counters of the request user
+                -> Get the counters of a user without training
+                -> Count a created training
+                -> Count a training done afterwards or moved to another exercise
+                -> Count the trainings of a default exercise in the write path
+                -> Keep counting the trainings of an exercise whose is_default is switched
+                -> Uncount a deleted training
+                -> Sort the exercises on their counters
+                -> Keep the counters written during an update of the exercise
+        -> Repair:
+            SUCCESS:
+                -> Nothing to repair after the writes
+                -> Repair the wrong counters with the repaircounters command
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        self.connie = Exercise.objects.get(name="connie")
+        self.new_user = User.objects.get(username='new_user')
+
+    @staticmethod
+    def date(*args):
+        return timezone.make_aware(datetime(*args))
+
+    @staticmethod
+    def counters(instance):
+        instance.refresh_from_db()
+        return (instance.training_count, instance.done_count, instance.last_trained_at)
+
+    def test_not_connected_get_counters(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        response = self.client.get(reverse('trainings_counters'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_get_counters(self):
+        """
+        Test if the counters of the request user are returned
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        response = self.client.get(reverse('trainings_counters'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['training_count'], 2)
+        self.assertEqual(response.data['done_count'], 1)
+        self.assertTrue(response.data['last_trained_at'].startswith('2018-01-25'))
+
+    def test_admin_get_counters_without_training(self):
+        """
+        Test if the counters of a user without training are zeros
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        response = self.client.get(reverse('trainings_counters'), format='json')
+        self.assertEqual(response.data, {'training_count': 0, 'done_count': 0, 'last_trained_at': None})
+
+    def test_non_admin_count_created_training(self):
+        """
+        Test if a created training is counted on its exercise and its founder
+        """
+        self.assertEqual(self.counters(self.connie), (2, 2, self.date(2018, 5, 2)))
+        Training.objects.create(exercise=self.connie, founder=self.new_user, date=self.date(2018, 9, 1),
+                                performance_type=Training.TIME, performance_value=300, done=True)
+        Training.objects.create(exercise=self.connie, founder=self.new_user, date=self.date(2018, 10, 1),
+                                performance_type=Training.TIME)
+        self.assertEqual(self.counters(self.connie), (4, 3, self.date(2018, 9, 1)))
+        self.assertEqual(self.counters(self.new_user.training_stats), (5, 4, self.date(2018, 9, 1)))
+
+    def test_non_admin_count_updated_training(self):
+        """
+        Test if a training done afterwards or moved to another exercise is counted again,
+        on a default exercise too
+        """
+        training = Training.objects.get(exercise=self.a_chelsea, done=False)
+        training.done = True
+        training.performance_value = 12
+        training.save()
+        self.assertEqual(self.counters(self.a_chelsea), (2, 2, self.date(2018, 8, 8)))
+        self.assertEqual(self.counters(training.founder.training_stats), (2, 2, self.date(2018, 8, 8)))
+
+        training.exercise = self.connie
+        training.save()
+        self.assertEqual(self.counters(self.a_chelsea), (1, 1, self.date(2018, 3, 8)))
+        self.assertEqual(self.counters(self.connie), (3, 3, self.date(2018, 8, 8)))
+        self.assertEqual(rebuild_counters(), (0, 0))
+
+    def test_non_admin_uncount_deleted_training(self):
+        """
+        Test if a deleted training is uncounted and if the last date is read again
+        """
+        self.client.login(username='new_user', password='new_password')
+        training = Training.objects.get(exercise=self.connie, date=self.date(2018, 5, 2))
+        response = self.client.delete(reverse('training_detail', kwargs={'pk': training.pk}), format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.counters(self.connie), (1, 1, self.date(2018, 4, 5)))
+        self.assertEqual(self.counters(self.new_user.training_stats), (2, 2, self.date(2018, 4, 5)))
+
+    def test_non_admin_count_switched_default_exercise(self):
+        """
+        Test if the trainings of an exercise switched to a default one and back are still
+        counted, and if a removal never brings a counter below zero
+        """
+        self.client.login(username='new_user', password='new_password')
+        url = reverse('exercise_detail', kwargs={'pk': self.connie.pk})
+        response = self.client.patch(url, {'is_default': True}, format='json')
+        self.assertTrue(response.data['is_default'])
+        Training.objects.get(exercise=self.connie, date=self.date(2018, 5, 2)).delete()
+        self.client.patch(url, {'is_default': False}, format='json')
+        self.assertEqual(self.counters(self.connie), (1, 1, self.date(2018, 4, 5)))
+
+        Exercise.objects.filter(pk=self.connie.pk).update(training_count=0, done_count=0)
+        response = self.client.delete(reverse('training_detail', kwargs={'pk': Training.objects.get(exercise=self.connie).pk}),
+                                      format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.counters(self.connie), (0, 0, None))
+
+    def test_non_admin_sort_exercises_on_counters(self):
+        """
+        Test if the exercises can be sorted on their counters
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(reverse('exercises_list'), {'ordering': '-done_count'}, format='json')
+        self.assertEqual([exercise['id'] for exercise in response.data], [self.connie.pk, self.a_chelsea.pk])
+        self.assertEqual([exercise['done_count'] for exercise in response.data], [2, 1])
+        response = self.client.get(reverse('exercises_list'), {'ordering': '-training_count,id'}, format='json')
+        self.assertEqual([exercise['training_count'] for exercise in response.data], [2, 2])
+
+    def test_non_admin_update_exercise_keeps_counters(self):
+        """
+        Test if an update of an exercise does not write back the counters it loaded
+        when a training has been created in the meantime
+        """
+        exercise = Exercise.objects.get(pk=self.connie.pk)
+        Training.objects.create(exercise=self.connie, founder=self.new_user, date=self.date(2018, 9, 1),
+                                performance_type=Training.TIME, performance_value=300, done=True)
+        serializer = ExerciseSerializer(exercise, data={'goal_value': 3}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        self.assertEqual(self.counters(self.connie), (3, 3, self.date(2018, 9, 1)))
+        self.assertEqual((self.connie.goal_value, self.connie.version), (3, 2))
+
+    def test_nothing_to_repair_after_writes(self):
+        """
+        Test if the counters maintained by the writes are the ones recomputed from the trainings
+        """
+        Training.objects.filter(exercise=self.connie).first().delete()
+        self.assertEqual(rebuild_counters(), (0, 0))
+
+    def test_repair_counters(self):
+        """
+        Test if the repaircounters command fixes the wrong counters and says how many
+        """
+        Exercise.objects.filter(pk=self.connie.pk).update(training_count=10, last_trained_at=None)
+        UserStats.objects.filter(user=self.new_user).delete()
+        out = StringIO()
+        call_command('repaircounters', stdout=out)
+        self.assertEqual(out.getvalue().strip(), "1 exercises and 1 users repaired")
+        self.assertEqual(self.counters(self.connie), (2, 2, self.date(2018, 5, 2)))
+        self.assertEqual(self.counters(UserStats.objects.get(user=self.new_user)), (3, 3, self.date(2018, 5, 2)))
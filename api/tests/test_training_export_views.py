@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Training
+from .helper_dbtestdata import TestDatabase
+
+class TrainingExportTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    TrainingExportView. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Export the trainings
+        -> With admin account:
+            SUCCESS:
+                -> Export all the trainings
+        -> With non admin account:
+            SUCCESS:
+                -> Export the trainings only if founder == request.user as CSV
+                -> Export the trainings as NDJSON with the format or the Accept header
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def export(self, **kwargs):
+        url = reverse('trainings_export')
+        response = self.client.get(url, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_not_connected_export_trainings(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        url = reverse('trainings_export')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_admin_export_all_trainings(self):
+        """
+        Test if, when we are logged with an admin account, the export contains all the trainings
+        """
+        self.client.login(username='admin_user', password='admin_password')
+        response, content = self.export()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(len(rows), Training.objects.count() + 1)
+
+    def test_non_admin_export_trainings_as_csv(self):
+        """
+        Test if the CSV export contains a header and the trainings of the request user
+        ordered by date, with the name and type of their exercise
+        """
+        self.client.login(username='new_user', password='new_password')
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('trainings.csv', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        trainings = Training.objects.filter(founder__username='new_user').order_by('date')
+        self.assertEqual([int(row['id']) for row in rows], [training.pk for training in trainings])
+        self.assertEqual(rows[0]['date'], '2018-03-08T00:00:00Z')
+        self.assertEqual(rows[0]['performance_value'], '15')
+        self.assertEqual(rows[0]['exercise_name'], 'chelsea')
+        self.assertEqual(rows[0]['exercise_type'], 'EMOM')
+
+    def test_non_admin_export_trainings_as_ndjson(self):
+        """
+        Test if the NDJSON export contains one training per line
+        """
+        self.client.login(username='new_user', password='new_password')
+        response, content = self.export(data={'format': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]['exercise_name'], 'connie')
+        self.assertEqual(rows[1]['performance_type'], Training.TIME)
+        self.assertEqual(rows[1]['performance_value'], 230)
+        self.assertIs(rows[1]['done'], True)
+
+        response, content = self.export(HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(len(content.splitlines()), 3)
@@ -0,0 +1,198 @@
+import random
+from datetime import datetime
+from unittest import mock
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Exercise, Training
+from ..sketches import TDigest, percentiles
+from .helper_dbtestdata import TestDatabase
+from .helper_oncommit import run_on_commit
+
+class TrainingPercentileTest(APITestCase):
+    """
+    This class will test the percentile of the trainings. What will be tested:
+        -> TDigest:
+            SUCCESS:
+                -> Estimate the distribution of a large population
+                -> Count the values equal to the asked one for half
+        -> With non admin account:
+            SUCCESS:
+                -> Get a training without percentile by default
+                -> Get a training with its percentile when it is asked
+                -> Get no percentile for a training which is not done
+                -> The percentile follows the trainings created, buffered until a flush
+                -> The percentile adds the updated values without rebuilding the sketch
+                -> The percentile forgets the trainings deleted once the sketch is rebuilt
+                -> A read never builds the sketch, it is built in the background
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        # The sketches are kept in memory and must not leak between tests
+        percentiles.clear()
+        # The test transaction is not visible from the background thread
+        percentiles.background = False
+        self.addCleanup(setattr, percentiles, 'background', True)
+        connie = Exercise.objects.get(name="connie")
+        self.connie_training = Training.objects.get(Q(exercise=connie), Q(date=datetime(2018, 4, 5)))
+        self.url = reverse('training_detail', kwargs={'pk': self.connie_training.pk})
+
+    def test_tdigest_estimates_distribution(self):
+        """
+        Test if the cdf estimated by the sketch is close to the exact one
+        """
+        generator = random.Random(42)
+        values = sorted(generator.randint(0, 3600) for _ in range(20000))
+        digest = TDigest()
+        for value in values:
+            digest.add(value)
+        digest.compress()
+        self.assertLess(len(digest.centroids[0]), len(values) / 10)
+        for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+            self.assertAlmostEqual(digest.cdf(values[int(q * len(values))]), q, delta=0.01)
+
+    def test_tdigest_counts_ties_for_half(self):
+        """
+        Test if the values equal to the asked one are counted for half, even when
+        they are spread over several centroids
+        """
+        digest = TDigest()
+        for value in (5, 5, 5, 5):
+            digest.add(value)
+        digest.compress()
+        self.assertEqual(digest.cdf(5), 0.5)
+
+        generator = random.Random(42)
+        values = [round(generator.gauss(15, 3)) for _ in range(50000)]
+        digest = TDigest()
+        for value in values:
+            digest.add(value)
+        digest.compress()
+        for value in (10, 15, 20):
+            exact = (sum(1 for other in values if other < value) + values.count(value) / 2) / len(values)
+            self.assertAlmostEqual(digest.cdf(value), exact, delta=0.01)
+
+    def test_non_admin_get_training_without_percentile(self):
+        """
+        Test if the percentile is not rendered by default
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('percentile', response.data)
+
+    def test_non_admin_get_training_with_percentile(self):
+        """
+        Test if, when the percentile is asked, the API returns the share of the trainings
+        on the same exercise reaching at least this performance (lower is better for a time)
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.client.get(self.url, {'percentile': 'true'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['percentile'], 25.0)
+
+    def test_non_admin_get_not_done_training_percentile(self):
+        """
+        Test if the percentile is None for a training which is not done
+        """
+        self.client.login(username='ordinary_user', password='ordinary_password')
+        training = Training.objects.get(Q(founder__username='ordinary_user'), Q(done=False))
+        url = reverse('training_detail', kwargs={'pk': training.pk})
+        response = self.client.get(url, {'percentile': 'true'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['percentile'])
+
+    def test_non_admin_percentile_follows_trainings(self):
+        """
+        Test if the sketch in memory buffers the trainings created done or which
+        become done, and counts them once the buffer is flushed
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.client.get(self.url, {'percentile': 'true'}, format='json')
+
+        new_user = User.objects.get(username='new_user')
+        with run_on_commit():
+            training = Training.objects.create(exercise=self.connie_training.exercise,
+                                               founder=new_user,
+                                               date=datetime(2018, 9, 1),
+                                               performance_type=Training.TIME,
+                                               performance_value=100,
+                                               done=True)
+        response = self.client.get(self.url, {'percentile': 'true'}, format='json')
+        self.assertEqual(response.data['percentile'], 25.0)
+        percentiles.flush()
+        response = self.client.get(self.url, {'percentile': 'true'}, format='json')
+        self.assertEqual(response.data['percentile'], 50.0)
+
+        with run_on_commit():
+            training = Training.objects.create(exercise=self.connie_training.exercise,
+                                               founder=new_user,
+                                               date=datetime(2018, 9, 2),
+                                               performance_type=Training.TIME)
+            training.performance_value = 120
+            training.done = True
+            training.save()
+        percentiles.flush()
+        response = self.client.get(self.url, {'percentile': 'true'}, format='json')
+        self.assertEqual(response.data['percentile'], 62.5)
+
+    def test_non_admin_percentile_adds_updated_trainings(self):
+        """
+        Test if the new value of an updated training is added to the sketch in memory,
+        without dropping it
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = self.connie_training.exercise
+        digest = percentiles.get(connie.pk, Training.TIME)
+        training = Training.objects.filter(exercise=connie, done=True).exclude(pk=self.connie_training.pk).get()
+        training.performance_value = 1000
+        with run_on_commit():
+            training.save()
+        percentiles.flush()
+        self.assertIs(percentiles.get(connie.pk, Training.TIME), digest)
+        self.assertEqual(digest.count, 3)
+
+    def test_non_admin_percentile_forgets_deleted_trainings(self):
+        """
+        Test if the sketch does not count a deleted training anymore once it is rebuilt
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = self.connie_training.exercise
+        self.assertEqual(percentiles.get(connie.pk, Training.TIME).count, 2)
+        training = Training.objects.filter(exercise=connie, done=True).exclude(pk=self.connie_training.pk).get()
+        with run_on_commit():
+            training.delete()
+        self.assertEqual(percentiles.get(connie.pk, Training.TIME).count, 2)
+        percentiles.rebuild(connie.pk, Training.TIME)
+        self.assertEqual(percentiles.get(connie.pk, Training.TIME).count, 1)
+        response = self.client.get(self.url, {'percentile': 'true'}, format='json')
+        self.assertEqual(response.data['percentile'], 50.0)
+
+    def test_percentile_built_in_background(self):
+        """
+        Test if a read without sketch queries nothing, returns no percentile and
+        starts the build of the sketch in a background thread
+        """
+        percentiles.background = True
+        connie = self.connie_training.exercise
+        with mock.patch('api.sketches.threading.Thread') as thread, \
+                CaptureQueriesContext(connection) as queries:
+            self.assertIsNone(percentiles.top_percent(connie.pk, Training.TIME, 100))
+        self.assertEqual(len(queries), 0)
+        thread.assert_called_once_with(target=percentiles.run_rebuild, args=(connie.pk, Training.TIME), daemon=True)
+        # The build is already scheduled
+        with mock.patch('api.sketches.threading.Thread') as thread:
+            percentiles.get(connie.pk, Training.TIME)
+        thread.assert_not_called()
+        percentiles.rebuilding.clear()
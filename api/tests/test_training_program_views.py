@@ -0,0 +1,161 @@
+from datetime import timedelta
+from unittest import mock
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from ..models import Equipment, Exercise, Movement, MovementsPerExercise, Training, TrainingRollup, UserStats
+from ..counters import rebuild_counters
+from .helper_dbtestdata import TestDatabase
+
+class TrainingProgramTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    TrainingProgram view. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Plan a program
+        -> With non admin account:
+            SUCCESS:
+                -> Plan a program with the exercise types taking turns, with one insert,
+                   and count its trainings
+                -> Plan a program without repeating the movements of the day before
+                -> Plan the same program with the same seed
+            FAIL:
+                -> Plan a program with an exercise type without available exercise
+                -> Plan a program which cannot avoid the movements of the day before
+                -> Plan a program with invalid parameters
+                -> Keep no training when its counters can not be written
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.equipments = list(Equipment.objects.values_list('id', flat=True))
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.a_chelsea = Exercise.objects.get(name="chelsea", is_default=True)
+        self.connie = Exercise.objects.get(name="connie")
+
+    def plan(self, **data):
+        data = dict({'weeks': 2, 'sessions_per_week': 3, 'exercise_types': [Exercise.EMOM, Exercise.FORTIME],
+                     'equipment': self.equipments, 'start': self.start}, **data)
+        data = {name: value for name, value in data.items() if value is not None}
+        return self.client.post(reverse('trainings_program'), data, format='json')
+
+    def test_not_connected_plan_program(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        response = self.plan()
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_plan_program(self):
+        """
+        Test if the trainings are created for the request user, not done, on the days
+        spread over the weeks, the exercise types taking turns, with one insert, and if
+        they are counted on the user and on the exercises
+        """
+        self.client.login(username='new_user', password='new_password')
+        new_user = User.objects.get(username='new_user')
+        rollups = list(TrainingRollup.objects.values_list('id', 'done_count'))
+        initial_trainings = new_user.training_stats.training_count
+        with CaptureQueriesContext(connection) as queries:
+            response = self.plan()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT INTO "api_training"')]), 1)
+        self.assertEqual(response.data['count'], 6)
+
+        trainings = Training.objects.filter(pk__in=[training['id'] for training in response.data['trainings']]).order_by('date')
+        self.assertEqual([training.exercise_id for training in trainings],
+                         [self.a_chelsea.pk, self.connie.pk] * 3)
+        self.assertEqual([(training.date - self.start).days for training in trainings], [0, 2, 5, 7, 9, 12])
+        self.assertTrue(all(training.founder == new_user and not training.done for training in trainings))
+        self.assertEqual([training.performance_type for training in trainings[:2]],
+                         [self.a_chelsea.goal_type, self.connie.goal_type])
+        self.assertEqual(list(TrainingRollup.objects.values_list('id', 'done_count')), rollups)
+
+        self.assertEqual(Exercise.objects.get(pk=self.a_chelsea.pk).training_count, self.a_chelsea.training_count + 3)
+        self.assertEqual(Exercise.objects.get(pk=self.connie.pk).training_count, self.connie.training_count + 3)
+        self.assertEqual(UserStats.objects.get(user=new_user).training_count, initial_trainings + 6)
+        self.assertEqual(rebuild_counters(), (0, 0))
+
+    def test_non_admin_plan_program_without_repeated_movements(self):
+        """
+        Test if two exercises sharing a movement are never planned on two days in a row
+        """
+        self.client.login(username='new_user', password='new_password')
+        pushups = Exercise.objects.create(name="pushups", exercise_type=Exercise.FORTIME, goal_type=Exercise.TIME,
+                                          founder=User.objects.get(username='new_user'))
+        MovementsPerExercise.objects.create(exercise=pushups, movement=Movement.objects.get(name="pushup"),
+                                            movement_number=1)
+        response = self.plan(sessions_per_week=7, exercise_types=[Exercise.FORTIME])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        exercises = [training['exercise'] for training in response.data['trainings']]
+        self.assertEqual(len(exercises), 14)
+        self.assertEqual(set(exercises), {self.connie.pk, pushups.pk})
+        self.assertEqual(len(set(exercises[::2])), 1)
+        self.assertEqual(len(set(exercises[1::2])), 1)
+
+    def test_non_admin_plan_same_program_with_seed(self):
+        """
+        Test if the same seed plans the same program
+        """
+        self.client.login(username='new_user', password='new_password')
+        first = self.plan(seed=3, exercise_types=[Exercise.EMOM, Exercise.FORTIME], weeks=4)
+        second = self.plan(seed=3, exercise_types=[Exercise.EMOM, Exercise.FORTIME], weeks=4)
+        self.assertEqual([training['exercise'] for training in first.data['trainings']],
+                         [training['exercise'] for training in second.data['trainings']])
+
+    def test_non_admin_plan_program_without_available_exercise(self):
+        """
+        Test if a 400 error is returned when an exercise type has no exercise the user can see and do
+        """
+        self.client.login(username='new_user', password='new_password')
+        balle = Equipment.objects.get(name="balle")
+        response = self.plan(equipment=[pk for pk in self.equipments if pk != balle.pk])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('exercise_types', response.data)
+
+        # STRENGTH, AMRAP, EMOM and RUNNING by default
+        response = self.plan(exercise_types=None)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('RUNNING', response.data['exercise_types'])
+        self.assertFalse(Training.objects.filter(date__gte=self.start).exists())
+
+    def test_non_admin_plan_program_with_repeated_movements(self):
+        """
+        Test if a 400 error is returned when the movements of the day before cannot be avoided
+        """
+        self.client.login(username='new_user', password='new_password')
+        response = self.plan(sessions_per_week=7)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Training.objects.filter(date__gte=self.start).exists())
+
+    def test_non_admin_plan_program_with_invalid_parameters(self):
+        """
+        Test if a 400 error is returned with invalid parameters
+        """
+        self.client.login(username='new_user', password='new_password')
+        for data in ({'weeks': 0}, {'weeks': 53}, {'sessions_per_week': 8},
+                     {'exercise_types': []}, {'exercise_types': ['YOGA']}):
+            response = self.plan(**data)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_admin_plan_program_rolled_back_with_counters(self):
+        """
+        Test if the trainings of a program are not kept when its counters fail
+        """
+        self.client.login(username='new_user', password='new_password')
+        count = Training.objects.count()
+        with mock.patch('api.programs.apply_trainings', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.plan()
+        self.assertEqual(Training.objects.count(), count)
@@ -0,0 +1,130 @@
+from datetime import datetime
+from django.db.models import Q
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Exercise, Training, TrainingRollup
+from ..rollups import rebuild_rollups
+from .helper_dbtestdata import TestDatabase
+
+class TrainingStatsTest(APITestCase):
+    """
+    This class will test all the interactions we can have with
+    TrainingStats view and the rollups behind it. What will be tested:
+        -> Not Connected:
+            FAIL:
+                -> Get the stats
+        -> With non admin account:
+            SUCCESS:
+                -> Get the done trainings per week and per month
+                -> Filter the stats by exercise type and dates
+                -> The rollups follow the trainings updated and deleted
+                -> The rollups follow the exercise type updated
+                -> The rollups rebuilt are the same as the ones maintained
+            FAIL:
+                -> Get the stats with an unknown period
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def get_stats(self, **params):
+        url = reverse('trainings_stats')
+        response = self.client.get(url, params, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row['period_start'], row['exercise_type'], row['done_count'], row['performance_sum'])
+                for row in response.data]
+
+    def test_not_connected_get_stats(self):
+        """
+        Test if, we are not authenticated, the API returns a 403 status on this request
+        """
+        url = reverse('trainings_stats')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_admin_get_stats(self):
+        """
+        Test if the API returns the done trainings of the request user per week and per month
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.assertEqual(self.get_stats(), [
+            ('2018-03-05', Exercise.EMOM, 1, 15),
+            ('2018-04-02', Exercise.FORTIME, 1, 230),
+            ('2018-04-30', Exercise.FORTIME, 1, 330),
+        ])
+        self.assertEqual(self.get_stats(period='month'), [
+            ('2018-03-01', Exercise.EMOM, 1, 15),
+            ('2018-04-01', Exercise.FORTIME, 1, 230),
+            ('2018-05-01', Exercise.FORTIME, 1, 330),
+        ])
+
+    def test_non_admin_get_filtered_stats(self):
+        """
+        Test if the stats can be filtered by exercise type and by dates
+        """
+        self.client.login(username='new_user', password='new_password')
+        self.assertEqual(self.get_stats(exercise_type=Exercise.FORTIME, end='2018-04-29'), [
+            ('2018-04-02', Exercise.FORTIME, 1, 230),
+        ])
+
+    def test_non_admin_stats_follow_trainings(self):
+        """
+        Test if the rollups are updated when a training is moved, undone and deleted
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        training = Training.objects.get(Q(exercise=connie), Q(date=datetime(2018, 4, 5)))
+        training.date = datetime(2018, 5, 3)
+        training.save()
+        self.assertEqual(self.get_stats(period='month', exercise_type=Exercise.FORTIME), [
+            ('2018-05-01', Exercise.FORTIME, 2, 560),
+        ])
+
+        training.done = False
+        training.save()
+        self.assertEqual(self.get_stats(period='month', exercise_type=Exercise.FORTIME), [
+            ('2018-05-01', Exercise.FORTIME, 1, 330),
+        ])
+
+        Training.objects.get(Q(exercise=connie), Q(date=datetime(2018, 5, 2))).delete()
+        self.assertEqual(self.get_stats(period='month', exercise_type=Exercise.FORTIME), [])
+
+    def test_non_admin_stats_follow_exercise_type(self):
+        """
+        Test if the rollups are rebuilt when the type of an exercise is updated
+        """
+        self.client.login(username='new_user', password='new_password')
+        connie = Exercise.objects.get(name="connie")
+        url = reverse('exercise_detail', kwargs={'pk': connie.pk})
+        response = self.client.patch(url, {'exercise_type': Exercise.AMRAP}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_stats(period='month', exercise_type=Exercise.AMRAP), [
+            ('2018-04-01', Exercise.AMRAP, 1, 230),
+            ('2018-05-01', Exercise.AMRAP, 1, 330),
+        ])
+
+    def test_rebuilt_rollups_match_maintained_rollups(self):
+        """
+        Test if the rollups rebuilt from the trainings are the ones maintained on each write
+        """
+        fields = ('founder', 'period', 'period_start', 'exercise_type', 'done_count', 'performance_sum')
+        maintained = list(TrainingRollup.objects.filter(done_count__gt=0).order_by(*fields).values_list(*fields))
+        rebuild_rollups()
+        rebuilt = list(TrainingRollup.objects.order_by(*fields).values_list(*fields))
+        self.assertEqual(rebuilt, maintained)
+
+    def test_non_admin_get_stats_with_unknown_period(self):
+        """
+        Test if the API returns a 400 status for an unknown period or date
+        """
+        self.client.login(username='new_user', password='new_password')
+        url = reverse('trainings_stats')
+        response = self.client.get(url, {'period': 'year'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'start': '2018-02-30'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
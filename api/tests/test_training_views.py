@@ -27,6 +27,7 @@ class TrainingTest(APITestCase):
         -> With non admin account:
             SUCCESS:
                 -> Get the trainings only if founder == request.user
+                -> Get the trainings as columns only if founder == request.user
                 -> Get one specific training only if founder == request.user
                 -> Create a new training from an existing exercise only if exercise is_default or 
                     exercise founder == request.user
@@ -96,10 +97,11 @@ class TrainingTest(APITestCase):
         training_response = {
             "id": connie_training.pk,
             "founder": connie_training.founder.pk,
-            "date": connie_training.date,
+            "date": '2018-04-05T00:00:00Z',
             "performance_type": connie_training.performance_type,
             "performance_value": connie_training.performance_value,
             "done": connie_training.done,
+            "version": connie_training.version,
             "exercise": {
                 'id': connie.pk,
                 'name': connie.name,
@@ -110,6 +112,14 @@ class TrainingTest(APITestCase):
                 'founder': connie.founder.pk,
                 'is_default': False,
                 "movements": [],
+                'version': connie.version,
+                'estimated_duration': connie.estimated_duration,
+                'total_repetitions': connie.total_repetitions,
+                'total_distance': connie.total_distance,
+                'total_load': connie.total_load,
+                'training_count': 2,
+                'done_count': 2,
+                'last_trained_at': '2018-05-02T00:00:00Z',
             }
         }
 
@@ -134,8 +144,9 @@ class TrainingTest(APITestCase):
                     }
                     movement_dict['movement_settings'].append(setting_dict)
             training_response['exercise']['movements'].append(movement_dict)
+        training_response['exercise']['movements'].sort(key=lambda movement: movement['id'])
         
-        self.assertCountEqual(response.data, training_response)
+        self.assertEqual(response.data, training_response)
 
     def test_admin_create_one_exercise(self):
         """
@@ -208,6 +219,7 @@ class TrainingTest(APITestCase):
             "performance_type": connie_training.performance_type,
             "performance_value": 50,
             "done": connie_training.done,
+            "version": connie_training.version,
             "exercise": {
                 'id': connie.pk,
                 'name': connie.name,
@@ -283,6 +295,7 @@ class TrainingTest(APITestCase):
             "performance_type": connie_training.performance_type,
             "performance_value": 50,
             "done": connie_training.done,
+            "version": connie_training.version,
             "exercise": {
                 'id': connie.pk,
                 'name': connie.name,
@@ -350,6 +363,60 @@ class TrainingTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), allowed_trainings.count())
 
+    def test_non_admin_get_columnar_trainings(self):
+        """
+        Test if, when we are logged with a non admin account and ask for columns, the API returns:
+            - a 200 status on this request
+            - one array per field for the trainings where the request user is the founder
+            - the exercises referenced by these trainings
+        """
+        self.client.login(username='new_user', password='new_password')
+        user = User.objects.get(username='new_user')
+        allowed_trainings = Training.objects.filter(founder=user).order_by('date')
+        url = reverse('trainings_list')
+        response = self.client.get(url, {'format': 'columnar'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/vnd.fitperf.columnar+json')
+
+        columns = response.json()
+        self.assertEqual(columns['id'], [training.pk for training in allowed_trainings])
+        self.assertEqual(columns['date'], ['2018-03-08T00:00:00Z', '2018-04-05T00:00:00Z', '2018-05-02T00:00:00Z'])
+        self.assertEqual(columns['performance_value'], [training.performance_value for training in allowed_trainings])
+        self.assertEqual(columns['done'], [True, True, True])
+        self.assertEqual(columns['exercise_id'], [training.exercise_id for training in allowed_trainings])
+
+        connie = Exercise.objects.get(name="connie")
+        self.assertEqual(len(columns['exercises']), 2)
+        self.assertEqual(columns['exercises'][str(connie.pk)], {
+            'name': connie.name,
+            'exercise_type': connie.exercise_type,
+            'goal_type': connie.goal_type,
+            'goal_value': connie.goal_value,
+            'is_default': connie.is_default,
+        })
+
+    def test_non_admin_get_columnar_trainings_by_ids_and_fields(self):
+        """
+        Test if the columns follow ?ids= (in their order) and ?fields=, and if unknown
+        fields are refused
+        """
+        self.client.login(username='new_user', password='new_password')
+        user = User.objects.get(username='new_user')
+        ids = list(Training.objects.filter(founder=user).order_by('-date').values_list('id', flat=True)[:2])
+        other = Training.objects.exclude(founder=user).first()
+        url = reverse('trainings_list')
+        response = self.client.get(url, {'format': 'columnar', 'ids': ','.join(map(str, ids + [other.pk]))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['id'], ids)
+
+        response = self.client.get(url, {'format': 'columnar', 'fields': 'date,done'})
+        self.assertEqual(sorted(response.json()), ['date', 'done', 'id'])
+        response = self.client.get(url, {'format': 'columnar', 'fields': 'exercise'})
+        self.assertEqual(sorted(response.json()), ['exercise_id', 'exercises', 'id'])
+
+        response = self.client.get(url, {'format': 'columnar', 'fields': 'id,weight'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_non_admin_get_founder_training(self):
         """
         Test if, when we are logged with a non admin account, the API returns:
@@ -367,10 +434,11 @@ class TrainingTest(APITestCase):
         training_response = {
             "id": connie_training.pk,
             "founder": connie_training.founder.pk,
-            "date": connie_training.date,
+            "date": '2018-04-05T00:00:00Z',
             "performance_type": connie_training.performance_type,
             "performance_value": connie_training.performance_value,
             "done": connie_training.done,
+            "version": connie_training.version,
             "exercise": {
                 'id': connie.pk,
                 'name': connie.name,
@@ -381,6 +449,14 @@ class TrainingTest(APITestCase):
                 'founder': connie.founder.pk,
                 'is_default': False,
                 "movements": [],
+                'version': connie.version,
+                'estimated_duration': connie.estimated_duration,
+                'total_repetitions': connie.total_repetitions,
+                'total_distance': connie.total_distance,
+                'total_load': connie.total_load,
+                'training_count': 2,
+                'done_count': 2,
+                'last_trained_at': '2018-05-02T00:00:00Z',
             }
         }
 
@@ -405,8 +481,9 @@ class TrainingTest(APITestCase):
                     }
                     movement_dict['movement_settings'].append(setting_dict)
             training_response['exercise']['movements'].append(movement_dict)
+        training_response['exercise']['movements'].sort(key=lambda movement: movement['id'])
         
-        self.assertCountEqual(response.data, training_response)
+        self.assertEqual(response.data, training_response)
 
     def test_non_admin_get_non_founder_training(self):
         """
@@ -521,6 +598,7 @@ class TrainingTest(APITestCase):
             "performance_type": connie_training.performance_type,
             "performance_value": 50,
             "done": connie_training.done,
+            "version": connie_training.version,
             "exercise": {
                 'id': connie.pk,
                 'name': connie.name,
@@ -0,0 +1,108 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Exercise, Training
+from .helper_dbtestdata import TestDatabase
+
+class VersionTest(APITestCase):
+    """
+    This class will test the optimistic concurrency of the updates of
+    ExerciseDetail and TrainingDetail views. What will be tested:
+        -> With non admin account:
+            SUCCESS:
+                -> Get the version of an exercise in the ETag header
+                -> Update an exercise with the version it has in If-Match
+                -> Update an exercise without If-Match or with If-Match: *
+                -> Update a training with the version it has in If-Match
+            FAIL:
+                -> Update an exercise with an outdated version in If-Match
+                -> Update a training with an outdated version in If-Match
+                -> Update an exercise with an invalid If-Match
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create a database for test with TestDatabase helper
+        """
+        TestDatabase.create()
+
+    def setUp(self):
+        self.connie = Exercise.objects.get(name="connie")
+        self.url = reverse('exercise_detail', kwargs={'pk': self.connie.pk})
+        self.client.login(username='new_user', password='new_password')
+
+    def test_non_admin_get_exercise_version(self):
+        """
+        Test if the version of an exercise is returned in its ETag and its data
+        """
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response['ETag'], '"1"')
+        self.assertEqual(response.data['version'], 1)
+
+    def test_non_admin_update_exercise_with_version(self):
+        """
+        Test if the update is applied with a conditional UPDATE when the version
+        in If-Match is the current one, and if the new version is returned
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, {'goal_value': 3}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertEqual(response.data['version'], 2)
+        self.assertTrue(any(query['sql'].startswith('UPDATE "api_exercise" SET "version"')
+                            and '"version" = 1' in query['sql'] for query in queries))
+
+        response = self.client.patch(self.url, {'goal_value': 4}, format='json', HTTP_IF_MATCH='W/"2"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Exercise.objects.values_list('goal_value', 'version').get(pk=self.connie.pk), (4, 3))
+
+    def test_non_admin_update_exercise_without_version(self):
+        """
+        Test if an update without If-Match or with If-Match: * is applied and moves the version
+        """
+        response = self.client.patch(self.url, {'goal_value': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+        response = self.client.patch(self.url, {'goal_value': 4}, format='json', HTTP_IF_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['version'], 3)
+
+    def test_non_admin_update_exercise_with_outdated_version(self):
+        """
+        Test if a 412 error is returned and nothing is written when the exercise
+        has been updated since the version in If-Match
+        """
+        self.client.patch(self.url, {'goal_value': 3}, format='json', HTTP_IF_MATCH='"1"')
+        response = self.client.patch(self.url, {'goal_value': 4, 'name': 'lost update'},
+                                     format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(Exercise.objects.values_list('name', 'goal_value', 'version').get(pk=self.connie.pk),
+                         ('connie', 3, 2))
+
+    def test_non_admin_update_exercise_with_invalid_version(self):
+        """
+        Test if a 412 error is returned when If-Match cannot match a version
+        """
+        response = self.client.patch(self.url, {'goal_value': 3}, format='json', HTTP_IF_MATCH='"abc"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(Exercise.objects.get(pk=self.connie.pk).version, 1)
+
+    def test_non_admin_update_training_with_version(self):
+        """
+        Test if a training is updated with the version it has in If-Match, and not with an outdated one
+        """
+        training = Training.objects.filter(exercise=self.connie).first()
+        url = reverse('training_detail', kwargs={'pk': training.pk})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response['ETag'], '"1"')
+
+        response = self.client.patch(url, {'performance_value': 200}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+
+        response = self.client.patch(url, {'performance_value': 100}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(Training.objects.values_list('performance_value', 'version').get(pk=training.pk), (200, 2))
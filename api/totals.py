@@ -0,0 +1,71 @@
+from django.db import connection
+
+from .models import Exercise, MovementSettings
+
+TOTAL_FIELDS = ('estimated_duration', 'total_repetitions', 'total_distance', 'total_load')
+
+# Rough paces used to estimate the duration of a round
+SECONDS_PER_REPETITION = 3
+SECONDS_PER_METER = 0.3
+SECONDS_PER_CALORIE = 4
+SECONDS_PER_MOVEMENT = 30
+
+# The goal value is a number of minutes for a time, of meters for a distance
+# and of rounds for rounds, the movements are done once for the other goals
+UPDATE_SQL = """
+    UPDATE api_exercise exercise
+    SET total_repetitions = totals.rounds * totals.repetitions,
+        total_distance = totals.rounds * totals.distance,
+        total_load = totals.rounds * totals.load,
+        estimated_duration = CASE
+            WHEN totals.goal_type = %(goal_time)s AND totals.goal_value > 0 THEN totals.goal_value * 60
+            WHEN totals.goal_type = %(goal_distance)s AND totals.goal_value > 0 THEN round(totals.goal_value * %(seconds_per_meter)s)
+            ELSE round(totals.rounds * totals.seconds)
+        END
+    FROM (
+        SELECT exercise.id, exercise.goal_type, exercise.goal_value,
+               CASE WHEN exercise.goal_type = %(goal_round)s AND exercise.goal_value > 0 THEN exercise.goal_value ELSE 1 END AS rounds,
+               COALESCE(sum(movement.repetitions), 0) AS repetitions,
+               COALESCE(sum(movement.distance), 0) AS distance,
+               COALESCE(sum(movement.repetitions * movement.weight), 0) AS load,
+               COALESCE(sum(CASE WHEN movement.repetitions + movement.distance + movement.calories = 0
+                                 THEN %(seconds_per_movement)s
+                                 ELSE movement.repetitions * %(seconds_per_repetition)s
+                                      + movement.distance * %(seconds_per_meter)s
+                                      + movement.calories * %(seconds_per_calorie)s END), 0) AS seconds
+        FROM api_exercise exercise
+        LEFT JOIN (
+            SELECT exercise_movement.exercise_id,
+                   COALESCE(sum(value.setting_value) FILTER (WHERE setting.name = %(setting_repetitions)s), 0) AS repetitions,
+                   COALESCE(sum(value.setting_value) FILTER (WHERE setting.name = %(setting_distance)s), 0) AS distance,
+                   COALESCE(sum(value.setting_value) FILTER (WHERE setting.name = %(setting_calories)s), 0) AS calories,
+                   COALESCE(sum(value.setting_value) FILTER (WHERE setting.name IN (%(setting_weight)s, %(setting_lest)s)), 0) AS weight
+            FROM api_movementsperexercise exercise_movement
+            LEFT JOIN api_movementsettingspermovementsperexercise value ON value.exercise_movement_id = exercise_movement.id
+            LEFT JOIN api_movementsettings setting ON setting.id = value.setting_id
+            GROUP BY exercise_movement.id
+        ) movement ON movement.exercise_id = exercise.id
+        WHERE {exercise_filter}
+        GROUP BY exercise.id
+    ) totals
+    WHERE totals.id = exercise.id
+"""
+
+def update_exercise_totals(exercise_ids=None):
+    """
+    Recompute the totals and the estimated duration of some exercises (all by default) with one statement
+    """
+    params = {
+        'goal_time': Exercise.TIME, 'goal_distance': Exercise.DISTANCE, 'goal_round': Exercise.ROUND,
+        'setting_repetitions': MovementSettings.REPETITIONS, 'setting_distance': MovementSettings.DISTANCE,
+        'setting_calories': MovementSettings.CALORIES, 'setting_weight': MovementSettings.WEIGHT,
+        'setting_lest': MovementSettings.LEST,
+        'seconds_per_repetition': SECONDS_PER_REPETITION, 'seconds_per_meter': SECONDS_PER_METER,
+        'seconds_per_calorie': SECONDS_PER_CALORIE, 'seconds_per_movement': SECONDS_PER_MOVEMENT,
+    }
+    exercise_filter = "TRUE"
+    if exercise_ids is not None:
+        exercise_filter = "exercise.id = ANY(%(exercise_ids)s)"
+        params['exercise_ids'] = list(exercise_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(UPDATE_SQL.format(exercise_filter=exercise_filter), params)
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import EquipmentList, EquipmentDetail, MovementList, MovementDetail, MovementSettingsList, MovementSettingsDetail, ExerciseList, ExerciseDetail, TrainingList, TrainingDetail
+from .views import EquipmentList, EquipmentDetail, MovementList, MovementDetail, MovementSettingsList, MovementSettingsDetail, ExerciseList, ExerciseSearch, ExerciseAvailable, ExerciseDetail, ExerciseClone, ExerciseSimilar, ExerciseLeaderboard, ExerciseProgression, TrainingList, TrainingProgram, TrainingBulkDelete, TrainingExportView, TrainingAnalyticsView, TrainingStats, TrainingCounters, TrainingDetail, SyncView, BootstrapView, BatchView
 
 urlpatterns = [
     path('equipments/', EquipmentList.as_view(), name='equipments_list'),
@@ -10,7 +10,22 @@ urlpatterns = [
     path('movement-settings/', MovementSettingsList.as_view(), name='movement_settings_list'),
     path('movement-settings/<int:pk>/', MovementSettingsDetail.as_view(), name='movement_setting_detail'),
     path('exercises/', ExerciseList.as_view(), name="exercises_list"),
+    path('exercises/search/', ExerciseSearch.as_view(), name="exercises_search"),
+    path('exercises/available/', ExerciseAvailable.as_view(), name="exercises_available"),
     path('exercises/<int:pk>/', ExerciseDetail.as_view(), name="exercise_detail"),
+    path('exercises/<int:pk>/clone/', ExerciseClone.as_view(), name="exercise_clone"),
+    path('exercises/<int:pk>/similar/', ExerciseSimilar.as_view(), name="exercise_similar"),
+    path('exercises/<int:pk>/leaderboard/', ExerciseLeaderboard.as_view(), name="exercise_leaderboard"),
+    path('exercises/<int:pk>/progression/', ExerciseProgression.as_view(), name="exercise_progression"),
     path('trainings/', TrainingList.as_view(), name="trainings_list"),
+    path('trainings/program/', TrainingProgram.as_view(), name="trainings_program"),
+    path('trainings/bulk-delete/', TrainingBulkDelete.as_view(), name="trainings_bulk_delete"),
+    path('trainings/export/', TrainingExportView.as_view(), name="trainings_export"),
+    path('trainings/analytics/', TrainingAnalyticsView.as_view(), name="trainings_analytics"),
+    path('trainings/stats/', TrainingStats.as_view(), name="trainings_stats"),
+    path('trainings/counters/', TrainingCounters.as_view(), name="trainings_counters"),
     path('trainings/<int:pk>/', TrainingDetail.as_view(), name="training_detail"),
+    path('sync/', SyncView.as_view(), name="sync"),
+    path('bootstrap/', BootstrapView.as_view(), name="bootstrap"),
+    path('batch/', BatchView.as_view(), name="batch"),
 ]
\ No newline at end of file
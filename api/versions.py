@@ -0,0 +1,43 @@
+from django.db.models import F
+from rest_framework import exceptions, status
+
+HEADER = 'HTTP_IF_MATCH'
+
+class PreconditionFailed(exceptions.APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'This object has been modified since the version given in If-Match.'
+    default_code = 'precondition_failed'
+
+def etag(instance):
+    return '"{}"'.format(instance.version)
+
+def expected_version(request):
+    """
+    Return the version of an If-Match header ("3" or W/"3"), None without header or with *,
+    raise a 412 error when the header cannot match any version
+    """
+    value = request.META.get(HEADER, '').strip()
+    if not value or value == '*':
+        return None
+    if value.startswith('W/'):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise PreconditionFailed()
+
+def claim_version(instance, expected=None):
+    """
+    Move a row to its next version with a conditional UPDATE ... WHERE version = expected,
+    raise a 412 error when another write has changed the version in the meantime.
+    The row stays locked by the UPDATE until the end of the transaction of the write.
+    """
+    rows = type(instance).objects.filter(pk=instance.pk)
+    if expected is not None:
+        rows = rows.filter(version=expected)
+    if not rows.update(version=F('version') + 1):
+        raise PreconditionFailed()
+    if expected is None:
+        instance.version = rows.values_list('version', flat=True).get()
+    else:
+        instance.version = expected + 1
@@ -1,65 +1,566 @@
-from rest_framework import generics, permissions
+from rest_framework import generics, permissions, exceptions, status
+from rest_framework.settings import api_settings
+from rest_framework.response import Response
 
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import F, Q, Case, When, IntegerField
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.contrib.auth.models import User
-from .models import Equipment, Movement, MovementSettings, Exercise, MovementsPerExercise, Training
-from .serializers import EquipmentSerializer, MovementSerializer, MovementSettingsSerializer, ExerciseSerializer, TrainingSerializer
+from .models import Equipment, Movement, MovementSettings, Exercise, MovementsPerExercise, Training, TrainingRollup, UserStats
+from .serializers import EquipmentSerializer, MovementSerializer, MovementSettingsSerializer, ExerciseSerializer, TrainingSerializer, TrainingRollupSerializer, BatchSerializer, ProgramSerializer, UserStatsSerializer, TrainingBulkDeleteSerializer
 from .permissions import IsAdminOrReadOnly, IsExerciseDefaultOrIsAdminOrFounder, IsFounderOrReadOnly, IsAdminOrFounderOrReadOnly, IsAdminOrFounder
+from .leaderboards import Leaderboard
+from .analytics import TrainingAnalytics, PerformanceProgression, METRICS
+from .exports import TrainingExport, TrainingColumns
+from .renderers import CSVRenderer, NDJSONRenderer, ColumnarJSONRenderer
+from .sync import ChangesFeed, decode_token
+from .idempotency import IdempotentRequest
+from .versions import etag, expected_version
+from .clones import clone_exercise
+from .bootstrap import Bootstrap
+from .batch import Batch
+from .search import search_exercises
+from .filters import ExerciseFilterBackend
+from .requirements import equipment_mask
+from .similarity import similarities
+from .programs import ProgramGenerator
+from .deletions import delete_trainings
 
-class EquipmentList(generics.ListCreateAPIView):
+def get_int_param(request, name, default=None, minimum=None, maximum=None):
+    """
+    Read an integer query parameter and bound it, raise a 400 error if it is not an integer
+    """
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise exceptions.ValidationError({name: 'A valid integer is required.'})
+    if minimum is not None:
+        value = max(value, minimum)
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+def get_date_param(request, name):
+    """
+    Read a date query parameter (YYYY-MM-DD), raise a 400 error if it is not a valid date
+    """
+    try:
+        value = parse_date(request.query_params.get(name, ''))
+    except ValueError:
+        value = None
+    if value is None:
+        raise exceptions.ValidationError({name: 'A valid date (YYYY-MM-DD) is required.'})
+    return value
+
+def get_ids_param(request, name='ids', maximum=100):
+    """
+    Read a comma separated list of ids (?ids=3,1,2) without duplicates, keeping its order,
+    raise a 400 error if one of them is not an integer or if there are too many
+    """
+    try:
+        ids = [int(value) for value in request.query_params[name].split(',') if value.strip()]
+    except ValueError:
+        raise exceptions.ValidationError({name: 'A comma separated list of integers is required.'})
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > maximum:
+        raise exceptions.ValidationError({name: 'Ensure there are no more than {} ids.'.format(maximum)})
+    return ids
+
+def get_performance_type_param(request, default):
+    performance_type = request.query_params.get('performance_type', default)
+    if performance_type not in dict(Training.PERFORMANCE_TYPE):
+        raise exceptions.ValidationError({'performance_type': '"{}" is not a valid choice.'.format(performance_type)})
+    return performance_type
+
+class SparseFieldsetViewMixin:
+    """
+    Prepare the queryset for the fields asked with ?fields= (see SparseFieldsetMixin)
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return self.get_serializer_class().setup_queryset(queryset, self.request)
+
+class MultiGetViewMixin:
+    """
+    Return only the objects listed with ?ids=3,1,2, in this order, with one query.
+    The ids the user cannot see are left out, as the list queryset is filtered.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if 'ids' not in self.request.query_params:
+            return queryset
+        ids = get_ids_param(self.request)
+        position = Case(*[When(pk=pk, then=index) for index, pk in enumerate(ids)], output_field=IntegerField())
+        return queryset.filter(pk__in=ids).order_by(position) if ids else queryset.none()
+
+class IdempotentCreateMixin:
+    """
+    Replay the response of a create sent again with the same Idempotency-Key header
+    instead of creating the object twice (see IdempotentRequest)
+    """
+
+    def create(self, request, *args, **kwargs):
+        idempotent = IdempotentRequest.from_request(request)
+        if idempotent is None:
+            return super().create(request, *args, **kwargs)
+
+        stored = idempotent.acquire()
+        if stored is None:
+            try:
+                # The response is stored with the object created, or not at all
+                with transaction.atomic():
+                    response = super().create(request, *args, **kwargs)
+                    # The errors are not kept, the retries of a failed request are run again
+                    if status.is_success(response.status_code):
+                        idempotent.save(response)
+                return response
+            finally:
+                idempotent.release()
+
+        fingerprint, status_code, data = stored
+        if fingerprint != idempotent.fingerprint:
+            raise exceptions.ValidationError({'Idempotency-Key': 'This key has already been used with another request.'})
+        response = Response(data, status=status_code)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+class VersionedUpdateMixin:
+    """
+    Optimistic concurrency of the updates: the responses give the version of the object
+    in an ETag header, and an update sent with If-Match: "<version>" is only applied
+    if the object still has this version, with a 412 error otherwise (see claim_version)
+    """
+
+    def get_object(self):
+        self.versioned_object = super().get_object()
+        return self.versioned_object
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in ('PUT', 'PATCH'):
+            context['expected_version'] = expected_version(self.request)
+        return context
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        versioned_object = getattr(self, 'versioned_object', None)
+        if versioned_object is not None and request.method != 'DELETE' and status.is_success(response.status_code):
+            response['ETag'] = etag(versioned_object)
+        return response
+
+class EquipmentList(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     permission_classes = (permissions.IsAuthenticated, IsAdminOrReadOnly,)
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
 
-class EquipmentDetail(generics.RetrieveUpdateDestroyAPIView):
+class EquipmentDetail(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated, IsAdminOrReadOnly,)
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
 
-class MovementList(generics.ListCreateAPIView):
+class MovementList(MultiGetViewMixin, SparseFieldsetViewMixin, generics.ListCreateAPIView):
     permission_classes = (permissions.IsAuthenticated, IsAdminOrReadOnly,)
     queryset = Movement.objects.all()
     serializer_class = MovementSerializer
 
-class MovementDetail(generics.RetrieveUpdateDestroyAPIView):
+class MovementDetail(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated, IsAdminOrReadOnly,)
     queryset = Movement.objects.all()
     serializer_class = MovementSerializer
 
-class MovementSettingsList(generics.ListCreateAPIView):
+class MovementSettingsList(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     permission_classes = (permissions.IsAuthenticated, IsAdminOrReadOnly,)
     queryset = MovementSettings.objects.all()
     serializer_class = MovementSettingsSerializer
 
-class MovementSettingsDetail(generics.RetrieveUpdateDestroyAPIView):
+class MovementSettingsDetail(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated, IsAdminOrReadOnly,)
     queryset = MovementSettings.objects.all()
     serializer_class = MovementSettingsSerializer
 
-class ExerciseList(generics.ListCreateAPIView):
+class ExerciseList(IdempotentCreateMixin, MultiGetViewMixin, SparseFieldsetViewMixin, generics.ListCreateAPIView):
+    """
+    The exercises can be filtered by exercise_type, goal_type, is_default,
+    movement, equipment and bounds of their totals, and sorted on their
+    totals or training counters with ordering (see ExerciseFilterBackend)
+    """
     permission_classes = (permissions.IsAuthenticated, IsAdminOrFounderOrReadOnly)
     serializer_class = ExerciseSerializer
+    filter_backends = (ExerciseFilterBackend,)
 
     def get_queryset(self):
         if self.request.user.is_staff:
             return Exercise.objects.all()
         return Exercise.objects.filter(Q(is_default=True) | Q(founder=self.request.user))
 
-class ExerciseDetail(generics.RetrieveUpdateDestroyAPIView):
+class ExerciseSearch(SparseFieldsetViewMixin, generics.ListAPIView):
+    """
+    Exercises the request user can see matching a text, the best match first.
+    Query parameters:
+        -> q: the text searched, fuzzy on the name and full-text (French) on the description
+        -> limit: the number of exercises returned (20 by default, 100 max)
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = ExerciseSerializer
+
+    def get_queryset(self):
+        text = self.request.query_params.get('q', '').strip()
+        if not text:
+            raise exceptions.ValidationError({'q': 'This field may not be blank.'})
+        if self.request.user.is_staff:
+            exercises = Exercise.objects.all()
+        else:
+            exercises = Exercise.objects.filter(Q(is_default=True) | Q(founder=self.request.user))
+        return search_exercises(exercises, text)
+
+    def list(self, request, *args, **kwargs):
+        limit = get_int_param(request, 'limit', default=20, minimum=1, maximum=100)
+        exercises = self.filter_queryset(self.get_queryset())[:limit]
+        return Response(self.get_serializer(exercises, many=True).data)
+
+class ExerciseAvailable(SparseFieldsetViewMixin, generics.ListAPIView):
+    """
+    Exercises the request user can see and do with its equipments: all the equipments
+    of their movements are among the ones given.
+    Query parameters:
+        -> equipment: the ids of the equipments of the user (1,2,3 or repeated)
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = ExerciseSerializer
+
+    def get_queryset(self):
+        try:
+            equipment_ids = [int(value) for values in self.request.query_params.getlist('equipment')
+                             for value in values.split(',') if value.strip()]
+        except ValueError:
+            raise exceptions.ValidationError({'equipment': 'A comma separated list of integers is required.'})
+        if self.request.user.is_staff:
+            exercises = Exercise.objects.all()
+        else:
+            exercises = Exercise.objects.filter(Q(is_default=True) | Q(founder=self.request.user))
+        # No bit out of the equipments of the user
+        return (exercises.annotate(missing_equipment=F('required_equipment').bitand(~equipment_mask(equipment_ids)))
+                .filter(missing_equipment=0)
+                .order_by('id'))
+
+class ExerciseDetail(VersionedUpdateMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated, IsExerciseDefaultOrIsAdminOrFounder)
     queryset = Exercise.objects.all()
     serializer_class = ExerciseSerializer
 
-class TrainingList(generics.ListCreateAPIView):
+class ExerciseClone(generics.GenericAPIView):
+    """
+    Copy an exercise the request user can see, with its movements and settings,
+    as a private exercise of the request user. Return the id of the copy.
+    Body parameters:
+        -> name: the name of the copy, which must not be the name of another exercise of the user.
+           By default, the name of the exercise, numbered if the user already has an exercise with this name
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Exercise.objects.all()
+        return Exercise.objects.filter(Q(is_default=True) | Q(founder=self.request.user))
+
+    def post(self, request, *args, **kwargs):
+        exercise = self.get_object()
+        name = str(request.data['name']) if request.data.get('name') else None
+        max_length = Exercise._meta.get_field('name').max_length
+        if name is not None and len(name) > max_length:
+            raise exceptions.ValidationError({'name': 'Ensure this field has no more than {} characters.'.format(max_length)})
+        # The trainings find their exercise by its name and founder
+        if name is not None and Exercise.objects.filter(founder=request.user, name=name).exists():
+            raise exceptions.ValidationError({'name': 'You already have an exercise with this name.'})
+        return Response({'id': clone_exercise(exercise, request.user, name)}, status=status.HTTP_201_CREATED)
+
+class ExerciseSimilar(generics.GenericAPIView):
+    """
+    The exercises the most similar to an exercise (same movements with close settings)
+    among the exercises the request user can see, the most similar first.
+    Query parameters:
+        -> k: the number of exercises (10 by default, 100 max)
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Exercise.objects.all()
+        return Exercise.objects.filter(Q(is_default=True) | Q(founder=self.request.user))
+
+    def get(self, request, *args, **kwargs):
+        exercise = self.get_object()
+        k = get_int_param(request, 'k', default=10, minimum=1, maximum=100)
+        neighbors = similarities.similar(exercise.pk, request.user, k)
+        names = dict(Exercise.objects.filter(pk__in=[pk for pk, _ in neighbors]).values_list('id', 'name'))
+        return Response({
+            'exercise': exercise.pk,
+            'similar': [{'id': pk, 'name': names[pk], 'similarity': similarity}
+                        for pk, similarity in neighbors if pk in names],
+        })
+
+class ExerciseLeaderboard(generics.GenericAPIView):
+    """
+    Ranking of the users on a default exercise, based on the best done training of each user.
+    Query parameters:
+        -> performance_type: the performance ranked, the goal type of the exercise by default
+        -> k: the number of users in the top (10 by default, 100 max)
+        -> user: the user whose rank is returned, the request user by default
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    queryset = Exercise.objects.filter(is_default=True)
+
+    def get(self, request, *args, **kwargs):
+        exercise = self.get_object()
+        performance_type = get_performance_type_param(request, exercise.goal_type)
+        k = get_int_param(request, 'k', default=10, minimum=1, maximum=100)
+        user = get_int_param(request, 'user', default=request.user.pk)
+
+        leaderboard = Leaderboard.get(exercise.pk, performance_type)
+        best = leaderboard.best(user)
+        return Response({
+            'exercise': exercise.pk,
+            'performance_type': performance_type,
+            'count': leaderboard.count,
+            'top': [{'rank': rank, 'founder': founder, 'performance_value': value}
+                    for rank, founder, value in leaderboard.top(k)],
+            'user': {'rank': leaderboard.rank(user, best), 'founder': user, 'performance_value': best},
+        })
+
+class ExerciseProgression(generics.GenericAPIView):
+    """
+    Performance values of the request user on an exercise over time, downsampled
+    to keep the shape of the curve.
+    Query parameters:
+        -> performance_type: the one of the last done training by default
+        -> points: the maximum number of points returned (200 by default, 3 to 2000)
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Exercise.objects.all()
+        return Exercise.objects.filter(Q(is_default=True) | Q(founder=self.request.user))
+
+    def get(self, request, *args, **kwargs):
+        exercise = self.get_object()
+        last_performance_type = (Training.objects.filter(founder=request.user, exercise=exercise, done=True)
+                                 .order_by('-date')
+                                 .values_list('performance_type', flat=True)
+                                 .first())
+        performance_type = get_performance_type_param(request, last_performance_type or exercise.goal_type)
+        points = get_int_param(request, 'points', default=200, minimum=3, maximum=2000)
+        return Response(PerformanceProgression(request.user, exercise, performance_type).compute(points))
+
+class TrainingList(IdempotentCreateMixin, MultiGetViewMixin, SparseFieldsetViewMixin, generics.ListCreateAPIView):
+    """
+    With ?format=columnar, the trainings are returned as one array per field
+    and a dictionary of the exercises they reference, ?ids= and ?fields= apply too
+    """
     permission_classes = (permissions.IsAuthenticated, IsAdminOrFounder)
     serializer_class = TrainingSerializer
+    renderer_classes = tuple(api_settings.DEFAULT_RENDERER_CLASSES) + (ColumnarJSONRenderer,)
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Training.objects.all()
+        return Training.objects.filter(founder=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format == ColumnarJSONRenderer.format:
+            fields = TrainingSerializer.requested_fields(request)
+            unknown = fields - set(TrainingSerializer.Meta.fields) if fields is not None else None
+            if unknown:
+                raise exceptions.ValidationError({'fields': 'Unknown fields: {}'.format(', '.join(sorted(unknown)))})
+            trainings = self.filter_queryset(self.get_queryset())
+            # The trainings asked with ?ids= keep their order
+            if 'ids' not in request.query_params:
+                trainings = trainings.order_by('date', 'id')
+            return Response(TrainingColumns(trainings, fields).data())
+        return super().list(request, *args, **kwargs)
+
+class TrainingProgram(generics.GenericAPIView):
+    """
+    Plan a program of trainings (not done) for the request user, the exercise types
+    taking turns, with the exercises it can see and do with its equipments and
+    without repeating a movement of the day before. Return the trainings created.
+    Body parameters:
+        -> weeks: the length of the program (1 to 52)
+        -> sessions_per_week: the number of trainings a week (1 to 7)
+        -> exercise_types: the types of exercises, STRENGTH, AMRAP, EMOM and RUNNING by default
+        -> equipment: the ids of the equipments of the user
+        -> start: the date of the first training, now by default
+        -> seed: the same seed plans the same program
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = ProgramSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        program = ProgramGenerator(request.user, data['exercise_types'], data['equipment'], data['weeks'],
+                                   data['sessions_per_week'], data.get('start', timezone.now()), data.get('seed'))
+        trainings = program.create()
+        return Response({
+            'count': len(trainings),
+            'trainings': [{'id': training.pk, 'exercise': training.exercise_id, 'date': training.date}
+                          for training in trainings],
+        }, status=status.HTTP_201_CREATED)
+
+class TrainingBulkDelete(generics.GenericAPIView):
+    """
+    Delete trainings of the request user with one statement, return how many were deleted.
+    The trainings of the other users are never deleted, whatever the ids given.
+    Body parameters:
+        -> ids: the ids of the trainings (10000 max)
+        -> start, end: only the trainings between these dates (YYYY-MM-DD, included)
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = TrainingBulkDeleteSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'deleted': delete_trainings(request.user, **serializer.validated_data)})
+
+class TrainingExportView(generics.GenericAPIView):
+    """
+    Stream all the trainings of the request user (all the trainings for an admin)
+    as CSV (?format=csv or Accept: text/csv, by default) or as newline-delimited JSON
+    (?format=ndjson or Accept: application/x-ndjson)
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    renderer_classes = (CSVRenderer, NDJSONRenderer)
 
     def get_queryset(self):
         if self.request.user.is_staff:
             return Training.objects.all()
         return Training.objects.filter(founder=self.request.user)
 
-class TrainingDetail(generics.RetrieveUpdateDestroyAPIView):
+    def get(self, request, *args, **kwargs):
+        export = TrainingExport(self.get_queryset())
+        renderer = request.accepted_renderer
+        if renderer.format == NDJSONRenderer.format:
+            lines = export.ndjson_lines()
+        else:
+            lines = export.csv_lines()
+        response = StreamingHttpResponse(lines, content_type='{}; charset=utf-8'.format(renderer.media_type))
+        response['Content-Disposition'] = 'attachment; filename="trainings.{}"'.format(renderer.format)
+        return response
+
+class TrainingAnalyticsView(generics.GenericAPIView):
+    """
+    Training load of the request user per session and per week.
+    Query parameters:
+        -> metric: the load used for the acute:chronic workload ratio and the monotony,
+            one of volume (default), tonnage, distance, calories
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        metric = request.query_params.get('metric', 'volume')
+        if metric not in METRICS:
+            raise exceptions.ValidationError({'metric': '"{}" is not a valid choice.'.format(metric)})
+        return Response(TrainingAnalytics(request.user, metric).compute())
+
+class TrainingStats(generics.ListAPIView):
+    """
+    Done trainings of the request user per period and exercise type, read from the rollups.
+    Query parameters:
+        -> period: week (default) or month
+        -> exercise_type: only this exercise type
+        -> start, end: only the periods starting between these dates (YYYY-MM-DD)
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = TrainingRollupSerializer
+
+    def get_queryset(self):
+        params = self.request.query_params
+        period = params.get('period', TrainingRollup.WEEK)
+        if period not in dict(TrainingRollup.PERIOD):
+            raise exceptions.ValidationError({'period': '"{}" is not a valid choice.'.format(period)})
+        rollups = TrainingRollup.objects.filter(founder=self.request.user, period=period, done_count__gt=0)
+        if 'exercise_type' in params:
+            rollups = rollups.filter(exercise_type=params['exercise_type'])
+        if 'start' in params:
+            rollups = rollups.filter(period_start__gte=get_date_param(self.request, 'start'))
+        if 'end' in params:
+            rollups = rollups.filter(period_start__lte=get_date_param(self.request, 'end'))
+        return rollups.order_by('period_start', 'exercise_type')
+
+class TrainingCounters(generics.GenericAPIView):
+    """
+    Trainings of the request user, done ones and date of the last done one, read from its stats.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = UserStatsSerializer
+
+    def get(self, request, *args, **kwargs):
+        stats = UserStats.objects.filter(user=request.user).first() or UserStats(user=request.user)
+        return Response(self.get_serializer(stats).data)
+
+class TrainingDetail(VersionedUpdateMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated, IsAdminOrFounder)
     queryset = Training.objects.all()
-    serializer_class = TrainingSerializer
\ No newline at end of file
+    serializer_class = TrainingSerializer
+
+class SyncView(generics.GenericAPIView):
+    """
+    Changes feed of the offline clients: the exercises, their movements and settings
+    and the trainings changed since the token, and the ids of the ones deleted.
+    Query parameters:
+        -> since: the token returned by the previous sync, everything is returned without it
+    The rows changed just before the token can be returned again, the clients upsert them by id.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        since = decode_token(since) if since else None
+        return Response(ChangesFeed(request.user, since).compute())
+
+class BootstrapView(generics.GenericAPIView):
+    """
+    Everything the app needs when it starts, in one request: the catalog (equipments,
+    movements and movement settings), the exercises the request user can see and
+    its last trainings.
+    Query parameters:
+        -> trainings: the number of trainings returned (20 by default, 100 max)
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        trainings_count = get_int_param(request, 'trainings', default=20, minimum=0, maximum=100)
+        return Response(Bootstrap(request, trainings_count).compute())
+
+class BatchView(generics.GenericAPIView):
+    """
+    Run several requests of the API in one round trip, as the request user.
+    Body parameters:
+        -> requests: the list of requests {method, path, body, headers}, 20 max,
+            the path is relative to the API root (exercises/1/?fields=id), the export
+            cannot be called from a batch since its response is streamed
+        -> atomic: run the requests in one transaction, stopped and rolled back at the first failure
+    Return the list of the responses {status, headers, body}, with a 400 status
+    when an atomic batch has been rolled back.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = BatchSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        root = request.path_info[:-len('batch/')]
+        batch = Batch(request, root, serializer.validated_data['requests'], serializer.validated_data['atomic'])
+        responses, succeeded = batch.run()
+        if batch.atomic and not succeeded:
+            return Response(responses, status=status.HTTP_400_BAD_REQUEST)
+        return Response(responses)